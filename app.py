@@ -5,6 +5,33 @@ import numpy as np
 import plotly.graph_objs as go
 import plotly.express as px
 
+from uywa.ajuste import (
+    CLAVES as CLAVES_AJUSTE, ESTADOS as ESTADOS_AJUSTE, MODELOS as MODELOS_AJUSTE, a_genetica as ajustes_a_genetica,
+    ajustar_archivo
+)
+from uywa.almacen import AlmacenEscenarios
+from uywa.cache import estadisticas as estadisticas_cache
+from uywa.catalogo import a_genetica, cargar_catalogo
+from uywa.comparador import (
+    MAX_BARRAS, MODOS, TOP_N, UMBRAL_NOMBRES, VARIABLES_COMPARADOR, figura_distribucion, figura_ranking
+)
+from uywa.curvas import curvas_escenario, genetica_base, hash_genetica, tabla_curvas
+from uywa.dietas import (
+    FASES, NUTRIENTES, aporte_nutrientes, formular, ingredientes_base, precio_medio, precio_por_edad,
+    preparar_ingredientes, problema_fase, requisitos_base
+)
+from uywa.dinamica import FRACCION_PRIMERA_SEMANA, alimento_por_edad_salida, simular_por_linea
+from uywa.exportar import FORMATOS, Exportacion, bloques_escenarios, bloques_grilla, curvas_diarias, resumen_riesgo
+from uywa.granja import (
+    COLUMNAS_GALPONES, FRECUENCIAS, VARIABLES_DIARIAS, galpones_ejemplo, resumen_por, resumir_calendario,
+    simular_portafolio, trayectoria_precios
+)
+from uywa.kpis import calcular_kpis
+from uywa.optimizador import EDAD_MIN_SALIDA, OBJETIVOS, edad_optima
+from uywa.perfil import ACTIVO_DEFECTO, RUTA_LOG, Perfil, leer_log
+from uywa.riesgo import DISTRIBUCIONES, distribucion, reagrupar_histograma, simular_margen
+from uywa.sensibilidad import VARIABLES as VARIABLES_SENSIBILIDAD, barrido, grilla_margen, tornado
+
 st.set_page_config(page_title="Gestión y Análisis de Dietas", layout="wide")
 
 # --- FONDO CORPORATIVO Y SIDEBAR LEGIBLE ---
@@ -45,9 +72,14 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def logo():
+    with open("nombre_archivo_logo.png", "rb") as f:
+        return f.read()
+
 # ---------- SIDEBAR EMPRESARIAL ----------
 with st.sidebar:
-    st.image("nombre_archivo_logo.png", width=110)
+    st.image(logo(), width=110)
     st.markdown(
         """
         <div style='text-align: center; margin-bottom:10px;'>
@@ -72,81 +104,226 @@ with st.sidebar:
         [
             "Simulador Productivo",
             "Simulador Económico",
+            "Formulación de Dietas",
+            "Portafolio de Granja",
             "Comparador de Escenarios"
         ],
         key="menu_radio"
     )
+    perfilar = st.checkbox("Perfilar ejecución", value=ACTIVO_DEFECTO, key="perfilar")
+    if perfilar:
+        st.checkbox(f"Guardar perfiles en {RUTA_LOG}", key="guardar_perfil")
+
+perfil = Perfil(menu, activo=perfilar)
 
 st.title("Gestión y Análisis de Dietas")
 
 # ==================== Inicialización de session_state ====================
-datos_geneticos_base = pd.DataFrame({
-    "linea": ["Cobb", "Cobb", "Cobb", "Cobb", "Ross", "Ross", "Ross", "Ross"],
-    "edad": [28, 35, 42, 49, 28, 35, 42, 49],
-    "peso": [1.35, 1.95, 2.5, 3.05, 1.35, 1.95, 2.5, 3.05],
-    "consumo": [2.2, 3.1, 4.3, 5.6, 2.2, 3.1, 4.3, 5.6],
-    "fcr": [1.63, 1.59, 1.72, 1.84, 1.63, 1.59, 1.72, 1.84]
-})
-
-if "genetica_edit" not in st.session_state:
-    st.session_state["genetica_edit"] = datos_geneticos_base.copy()
-elif not isinstance(st.session_state["genetica_edit"], pd.DataFrame):
-    st.session_state["genetica_edit"] = datos_geneticos_base.copy()
-
-if 'escenarios_guardados' not in st.session_state:
-    st.session_state['escenarios_guardados'] = []
-if 'escenarios_eco' not in st.session_state:
-    st.session_state['escenarios_eco'] = []
+# La genética de la sesión es una referencia: mientras no se edite, todas las
+# sesiones apuntan a la misma tabla de referencia y a las mismas curvas.
+def fijar_genetica(df_genetica):
+    st.session_state["genetica_edit"] = df_genetica
+    st.session_state["genetica_hash"] = hash_genetica(df_genetica)
 
-# ---------------------- SIMULADOR PRODUCTIVO ----------------------
-if menu == "Simulador Productivo":
-    st.header("Simulador Productivo Mejorado")
+with perfil.seccion("Genética: inicialización"):
+    if not isinstance(st.session_state.get("genetica_edit"), pd.DataFrame) or "genetica_hash" not in st.session_state:
+        fijar_genetica(genetica_base())
 
-    with st.expander("Mostrar y editar genética cargada"):
-        df_edit = st.data_editor(
-            st.session_state["genetica_edit"], 
-            num_rows="dynamic", 
-            use_container_width=True, 
-            key="edit_genetica"
+# ==================== Cálculos cacheados ====================
+@st.cache_data(max_entries=20, show_spinner="Simulando escenarios de riesgo...")
+def simular_riesgo(distribuciones, consumo, aves_ini, otros_costos, n_sorteos, semilla):
+    return simular_margen(distribuciones, consumo, aves_ini, otros_costos, n_sorteos=n_sorteos, semilla=semilla)
+
+@st.cache_data(max_entries=10, show_spinner="Simulando el portafolio de galpones...")
+def simular_granja(galpones, _genetica, clave_genetica, anclas, inicio, fin, fraccion_semana):
+    # La genética entra a la clave por su hash, sin volver a serializar la tabla.
+    precios = trayectoria_precios(anclas, pd.date_range(inicio, fin, freq="D"))
+    return simular_portafolio(galpones, tabla_curvas(_genetica, clave_genetica), precios, inicio, fin,
+                              fraccion_primera_semana=fraccion_semana)
+
+@st.cache_resource
+def obtener_almacen():
+    return AlmacenEscenarios()
+
+almacen = obtener_almacen()
+
+# ==================== Perfilado ====================
+def mostrar_figura(fig, nombre, perfil):
+    with perfil.seccion(f"Serialización: {nombre}"):
+        st.plotly_chart(fig, use_container_width=True)
+    perfil.figura(nombre, fig)
+
+def mostrar_perfil(perfil):
+    if not perfil.activo:
+        return
+    if st.session_state.get("guardar_perfil"):
+        perfil.guardar()
+    registro = perfil.registro()
+    with st.expander(f"Perfil de la ejecución: {perfil.etiqueta} ({registro['total_ms']:.0f} ms)"):
+        c1, c2 = st.columns(2)
+        c1.dataframe(pd.DataFrame(registro["secciones"], columns=["seccion", "ms"]).round(2), use_container_width=True)
+        c2.dataframe(pd.DataFrame(registro["figuras"], columns=["figura", "bytes"]), use_container_width=True)
+        st.caption("Cachés compartidas del proceso")
+        st.dataframe(estadisticas_cache().round(2), use_container_width=True, hide_index=True)
+        historico = leer_log()
+        if len(historico):
+            st.caption(f"Histórico de {RUTA_LOG}")
+            st.dataframe(
+                historico.groupby(["ejecucion", "seccion"])["ms"].describe(percentiles=[0.5, 0.95])
+                [["count", "50%", "95%", "max"]].round(2),
+                use_container_width=True
+            )
+
+# ==================== Exportación ====================
+# El archivo se escribe en un hilo de fondo; la página solo consulta su estado
+# y, al terminar, ofrece la descarga.
+@st.fragment(run_every=1)
+def progreso_exportacion(clave):
+    exportacion = st.session_state[f"exportacion_{clave}"]
+    if exportacion.listo():
+        st.rerun()
+    texto = f"Generando {exportacion.nombre_archivo}: {exportacion.filas:,} filas escritas"
+    progreso = exportacion.progreso()
+    if progreso is None:
+        st.caption(texto + "...")
+    else:
+        st.progress(progreso, text=texto)
+
+def panel_exportacion(clave, nombre, preparar, total=None):
+    # `preparar()` arma las tablas (o sus generadores de bloques) solo al pulsar el botón.
+    c1, c2 = st.columns([1, 3], vertical_alignment="bottom")
+    formato = c1.selectbox(
+        "Formato", list(FORMATOS), format_func=FORMATOS.get, key=f"formato_{clave}",
+        help="Con millones de filas, Parquet se genera en segundos; Excel puede tardar minutos."
+    )
+    if c2.button("Generar exportación", key=f"exportar_{clave}"):
+        anterior = st.session_state.pop(f"exportacion_{clave}", None)
+        if anterior is not None:
+            anterior.descartar()
+        st.session_state[f"exportacion_{clave}"] = Exportacion(preparar(), nombre, formato, total=total)
+    exportacion = st.session_state.get(f"exportacion_{clave}")
+    if exportacion is None:
+        return
+    if not exportacion.listo():
+        progreso_exportacion(clave)
+    elif exportacion.error() is not None:
+        st.error(f"No se pudo exportar: {exportacion.error()}")
+    else:
+        st.download_button(
+            f"Descargar {exportacion.nombre_archivo} ({exportacion.tamano_mb():.2f} MB)", exportacion.contenido,
+            file_name=exportacion.nombre_archivo, mime=exportacion.mime, on_click="ignore", key=f"descargar_{clave}"
         )
-        if st.button("Guardar cambios en la genética"):
-            st.session_state["genetica_edit"] = df_edit
-            st.success("¡Cambios guardados!")
-    df_lineas = st.session_state["genetica_edit"].copy()
+        st.caption(f"{exportacion.filas:,} filas en {exportacion.duracion:.1f} s")
+
+# ==================== Comparador de escenarios ====================
+def mostrar_comparador(tipo, clave, filtros=None):
+    filtros = filtros or {}
+    with perfil.seccion(f"Comparador {clave}: conteo"):
+        n = almacen.contar(tipo, **filtros)
+    if n == 0:
+        st.info("Ningún escenario coincide con los filtros.")
+        return
+    variables = VARIABLES_COMPARADOR[tipo]
+    c1, c2, c3 = st.columns(3)
+    var_comp = c1.selectbox("Variable a comparar", list(variables), format_func=variables.get, key=f"var_comp_{clave}")
+    modo = c2.selectbox("Vista", MODOS, key=f"modo_comp_{clave}")
+    top_n = c3.number_input("Escenarios en el ranking", 1, min(n, MAX_BARRAS), min(n, TOP_N), key=f"top_n_{clave}")
+
+    tam_pagina = 50
+    paginas = -(-n // tam_pagina)
+    pagina = st.number_input("Página de la tabla", 1, paginas, 1, key=f"pagina_{clave}") if paginas > 1 else 1
+    with perfil.seccion(f"Comparador {clave}: DataFrame de la tabla"):
+        df_tabla = almacen.leer(
+            tipo, orden=var_comp, descendente=True, limite=tam_pagina,
+            desplazamiento=(pagina - 1) * tam_pagina, **filtros
+        )
+    st.dataframe(df_tabla)
+    st.caption(f"{n:,} escenarios · página {pagina} de {paginas}, ordenados por {variables[var_comp]}")
+
+    if modo == MODOS[0]:
+        with perfil.seccion(f"Comparador {clave}: DataFrame del gráfico"):
+            df_comp = almacen.leer(tipo, columnas=["id", "nombre", var_comp], orden=var_comp, descendente=True, limite=top_n, **filtros)
+        with perfil.seccion("Figura: comparador"):
+            fig = figura_ranking(df_comp, var_comp, variables[var_comp])
+    else:
+        columnas = [var_comp] + (["nombre"] if n <= UMBRAL_NOMBRES else [])
+        with perfil.seccion(f"Comparador {clave}: DataFrame del gráfico"):
+            df_comp = almacen.leer(tipo, columnas=columnas, **filtros)
+        with perfil.seccion("Figura: comparador"):
+            fig = figura_distribucion(df_comp[var_comp], variables[var_comp], df_comp.get("nombre"))
+    mostrar_figura(fig, "comparador", perfil)
 
+    with st.expander(f"Exportar los {n:,} escenarios"):
+        panel_exportacion(
+            clave, f"escenarios_{tipo}", lambda: {f"Escenarios {tipo}": bloques_escenarios(almacen, tipo, **filtros)}, total=n
+        )
+
+# ==================== Simulación productiva ====================
+VISTAS_PRODUCTIVAS = [
+    "Peso", "Consumo", "FCR", "GDP", "IEP", "Consumo diario", "Producción total", "Rentabilidad",
+    "Dinámica diaria", "Gráfico Combinado"
+]
+
+# Los widgets de la simulación viven en un fragmento: moverlos solo vuelve a
+# ejecutar esta función, no el CSS, la barra lateral ni el editor de genética.
+@st.fragment
+def simulador_productivo(curvas):
+    # Un fragmento se vuelve a ejecutar solo, así que lleva su propio perfil.
+    perfil = Perfil("Simulador Productivo (fragmento)", activo=st.session_state.get("perfilar", ACTIVO_DEFECTO))
     st.subheader("Parámetros de simulación e interacción")
     col1, col2, col3 = st.columns(3)
     with col1:
-        lineas_disponibles = list(df_lineas['linea'].unique())
+        lineas_disponibles = list(curvas)
         linea_sel = st.selectbox("Selecciona línea genética", lineas_disponibles)
-        edad_inicial = st.number_input("Edad inicial (días)", min_value=0, max_value=40, value=0)
+        df_gen = curvas[linea_sel]
+        edad_max = int(df_gen['edad'].iloc[-1])
+        edad_inicial = st.number_input("Edad inicial (días)", min_value=0, max_value=max(min(40, edad_max - 1), 0), value=0)
         aves_ini = st.number_input("Aves iniciales", min_value=1000, max_value=100000, value=10000)
     with col2:
         mortalidad = st.slider("Mortalidad (%)", 0.0, 20.0, 5.0, 0.1)
-        edad_salida = st.selectbox("Edad de salida (días)", sorted(df_lineas[df_lineas['linea']==linea_sel]['edad'].unique()), index=2)
-        precio_alimento_kg = st.slider("Precio alimento (USD/kg)", 0.20, 1.50, 0.50, 0.01)
+        mort_semana = st.slider("Mortalidad en la primera semana (% del total)", 0, 100, int(FRACCION_PRIMERA_SEMANA * 100), 5)
+        edad_salida = st.slider("Edad de salida (días)", min(edad_inicial + 1, edad_max), edad_max, min(max(42, edad_inicial + 1), edad_max))
+        usar_dieta = "dieta" in st.session_state and st.toggle("Usar precios de la dieta formulada", key="usar_dieta_prod")
+        precio_alimento_kg = st.slider("Precio alimento (USD/kg)", 0.20, 1.50, 0.50, 0.01, disabled=usar_dieta)
     with col3:
         precio_venta_kg = st.slider("Precio venta pollo vivo (USD/kg)", 0.5, 4.0, 2.0, 0.01)
-        df_gen = df_lineas[df_lineas['linea'] == linea_sel].copy().reset_index(drop=True)
-        peso_sug = float(df_gen[df_gen['edad'] == edad_salida]['peso'].values[0])
-        consumo_sug = float(df_gen[df_gen['edad'] == edad_salida]['consumo'].values[0])
-        peso_final = st.number_input("Peso final esperado (kg)", min_value=0.5, max_value=5.0, value=peso_sug)
-        consumo_total = st.number_input("Consumo acumulado (kg/ave)", min_value=1.0, max_value=10.0, value=consumo_sug)
+        peso_sug = float(df_gen.at[edad_salida, 'peso'])
+        consumo_sug = float(df_gen.at[edad_salida, 'consumo'])
+        peso_final = st.number_input("Peso final esperado (kg)", min_value=0.01, max_value=5.0, value=min(peso_sug, 5.0))
+        consumo_total = st.number_input("Consumo acumulado (kg/ave)", min_value=0.0, max_value=10.0, value=min(consumo_sug, 10.0))
 
-    aves_finales = aves_ini * (1 - mortalidad/100)
-    try:
-        peso_inicial = float(df_gen[df_gen['edad'] == edad_inicial]['peso'].values[0])
-    except:
-        peso_inicial = 0.04
-
-    fcr_real = consumo_total / peso_final if peso_final > 0 else np.nan
-    gdp = (peso_final - peso_inicial) / (edad_salida - edad_inicial) if (edad_salida - edad_inicial) > 0 else 0
-    consumo_diario = consumo_total / edad_salida if edad_salida > 0 else 0
-    iep = (peso_final * (aves_finales/aves_ini) * 100) / (edad_salida * fcr_real) if (edad_salida * fcr_real) > 0 else 0
-    prod_total = aves_finales * peso_final
-    costo_alim = consumo_total * aves_ini * precio_alimento_kg
-    ingreso_bruto = prod_total * precio_venta_kg
-    margen_neto = ingreso_bruto - costo_alim
+    peso_inicial = float(df_gen.at[edad_inicial, 'peso'])
+    fraccion_semana = mort_semana / 100
+
+    # Aves vivas, alimento y biomasa día a día; el costo de alimento de los
+    # KPIs es el integrado sobre las aves vivas de cada día.
+    # Con la dieta formulada cada día de edad paga el precio de su fase.
+    precio_dia = precio_por_edad(st.session_state["dieta"]["fases"])[None, :] if usar_dieta else precio_alimento_kg
+    with perfil.seccion("KPIs: dinámica diaria"):
+        dinamica = simular_por_linea(
+            curvas, [linea_sel], aves_ini, mortalidad, edad_inicial, edad_salida, precio_dia,
+            peso_final=peso_final, consumo_total=consumo_total, fraccion_primera_semana=fraccion_semana
+        )
+    if usar_dieta:
+        precio_alimento_kg = float(dinamica["costo_alim"][0] / dinamica["alimento_total"][0])
+        st.caption(f"Precio medio del alimento con la dieta formulada: {precio_alimento_kg:.3f} USD/kg")
+    with perfil.seccion("KPIs: calcular_kpis"):
+        kpis = calcular_kpis(
+            peso_final=peso_final, consumo_total=consumo_total, aves_ini=aves_ini,
+            mortalidad=mortalidad, precio_alimento_kg=precio_alimento_kg,
+            precio_venta_kg=precio_venta_kg, edad_salida=edad_salida,
+            edad_inicial=edad_inicial, peso_inicial=peso_inicial,
+            alimento_total=float(dinamica["alimento_total"][0])
+        )
+    aves_finales = float(kpis["aves_finales"])
+    fcr_real = float(kpis["fcr"])
+    gdp = float(kpis["gdp"])
+    consumo_diario = float(kpis["consumo_diario"])
+    iep = float(kpis["iep"])
+    prod_total = float(kpis["prod_total"])
+    costo_alim = float(kpis["costo_alim"])
+    ingreso_bruto = float(kpis["ingreso_bruto"])
+    margen_neto = float(kpis["margen_neto"])
 
     st.markdown("### KPIs productivos y económicos")
     kpi1, kpi2, kpi3, kpi4 = st.columns(4)
@@ -161,11 +338,51 @@ if menu == "Simulador Productivo":
     kpi7.metric("Ingreso bruto (USD)", f"{ingreso_bruto:,.2f}")
     kpi8.metric("Mortalidad (%)", f"{mortalidad:.2f}")
 
+    if st.toggle("Optimizar edad de salida", key="mostrar_optimizador"):
+        c1, c2, c3 = st.columns(3)
+        objetivo_opt = c1.selectbox("Objetivo", list(OBJETIVOS), format_func=OBJETIVOS.get)
+        edad_min_opt = c2.number_input(
+            "Edad mínima de salida (días)", min_value=min(edad_inicial + 1, edad_max), max_value=edad_max,
+            value=min(max(EDAD_MIN_SALIDA, edad_inicial + 1), edad_max)
+        )
+        dias_vacio = c3.number_input("Días de vacío sanitario", min_value=0, max_value=60, value=14)
+        with perfil.seccion("Optimizador: edad óptima"):
+            tabla_opt, optimos = edad_optima(
+                df_gen, precio_venta_kg, precio_alimento_kg, aves_ini, mortalidad,
+                edad_inicial=edad_inicial, dias_vacio=dias_vacio, edad_min=edad_min_opt,
+                fraccion_primera_semana=fraccion_semana
+            )
+        for col, (objetivo, (edad_opt, valor_opt)) in zip(st.columns(3), optimos.items()):
+            col.metric(f"Edad óptima por {OBJETIVOS[objetivo]}", f"{edad_opt} días", f"{valor_opt:,.2f}", delta_color="off")
+        edad_opt = optimos[objetivo_opt][0]
+        fila_opt = tabla_opt.set_index("edad").loc[edad_opt]
+        st.caption(
+            f"A {edad_opt} días: precio de equilibrio del alimento {fila_opt['equilibrio_alimento']:.3f} USD/kg, "
+            f"precio de equilibrio del pollo vivo {fila_opt['equilibrio_venta']:.3f} USD/kg."
+        )
+        c1, c2 = st.columns(2)
+        with c1:
+            with perfil.seccion("Figura: óptimo por edad"):
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=tabla_opt["edad"], y=tabla_opt[objetivo_opt], mode="lines", name=OBJETIVOS[objetivo_opt]))
+                fig.add_trace(go.Scatter(x=[edad_opt], y=[optimos[objetivo_opt][1]], mode="markers", name="Óptimo", marker=dict(size=16, color="red")))
+                fig.update_layout(title=f"{OBJETIVOS[objetivo_opt]} vs Edad de salida", xaxis_title="Edad (días)")
+            mostrar_figura(fig, "óptimo por edad", perfil)
+        with c2:
+            with perfil.seccion("Figura: precios de equilibrio"):
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=tabla_opt["edad"], y=tabla_opt["equilibrio_alimento"], mode="lines", name="Equilibrio alimento"))
+                fig.add_trace(go.Scatter(x=tabla_opt["edad"], y=tabla_opt["equilibrio_venta"], mode="lines", name="Equilibrio pollo vivo"))
+                fig.add_hline(y=precio_alimento_kg, line_dash="dot", annotation_text="Precio alimento actual")
+                fig.add_hline(y=precio_venta_kg, line_dash="dash", annotation_text="Precio venta actual")
+                fig.update_layout(title="Precios de equilibrio vs Edad de salida", xaxis_title="Edad (días)", yaxis_title="USD/kg")
+            mostrar_figura(fig, "precios de equilibrio", perfil)
+
     st.markdown("---")
 
-    nombre_escenario = st.text_input("Nombre del escenario", f"Escenario {len(st.session_state['escenarios_guardados'])+1}")
+    nombre_escenario = st.text_input("Nombre del escenario", f"Escenario {almacen.contar('productivo')+1}")
     if st.button("Guardar este escenario"):
-        st.session_state['escenarios_guardados'].append({
+        almacen.guardar("productivo", {
             "nombre": nombre_escenario,
             "linea": linea_sel,
             "edad_ini": edad_inicial,
@@ -187,300 +404,525 @@ if menu == "Simulador Productivo":
             "margen_neto": margen_neto,
             "consumo_diario": consumo_diario
         })
+        st.session_state["escenario_guardado"] = True
+        st.rerun(scope="app")
+    if st.session_state.pop("escenario_guardado", False):
         st.success("¡Escenario guardado!")
 
     st.markdown("### Visualización de variables")
-    tabs = st.tabs([
-        "Peso", "Consumo", "FCR", "GDP", "IEP", "Consumo diario", "Producción total", "Rentabilidad", "Gráfico Combinado"
-    ])
+    vista = st.segmented_control("Variable a visualizar", VISTAS_PRODUCTIVAS, default="Peso", key="vista_prod") or "Peso"
     edades = df_gen['edad']
-    gdp_curve = [ (df_gen.loc[i, "peso"] - df_gen.loc[0, "peso"]) / (df_gen.loc[i,"edad"]-df_gen.loc[0,"edad"]) if (df_gen.loc[i,"edad"]-df_gen.loc[0,"edad"])>0 else 0 for i in range(len(df_gen))]
-    iep_curve = [ 
-        (df_gen.loc[i, "peso"] * (aves_finales/aves_ini) * 100) / (df_gen.loc[i,"edad"] * df_gen.loc[i,"fcr"])
-        if (df_gen.loc[i,"edad"] * df_gen.loc[i,"fcr"])>0 else 0
-        for i in range(len(df_gen))
-    ]
-    consumo_diario_curve = [df_gen.loc[i,"consumo"]/df_gen.loc[i,"edad"] if df_gen.loc[i,"edad"]>0 else 0 for i in range(len(df_gen))]
-    prod_total_curve = [aves_finales * df_gen.loc[i,"peso"] for i in range(len(df_gen))]
-    rentabilidad_curve = [ (prod_total_curve[i]*precio_venta_kg) - (df_gen.loc[i,"consumo"]*aves_ini*precio_alimento_kg) for i in range(len(df_gen))]
-    with tabs[0]:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=edades, y=df_gen['peso'], mode="lines+markers", name="Peso"))
-        fig.add_trace(go.Scatter(x=[edad_salida], y=[peso_final], mode="markers", name="Simulación", marker=dict(size=16, color="red")))
-        fig.update_layout(title="Peso vs Edad", xaxis_title="Edad (días)", yaxis_title="Peso (kg)")
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs[1]:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=edades, y=df_gen['consumo'], mode="lines+markers", name="Consumo"))
-        fig.add_trace(go.Scatter(x=[edad_salida], y=[consumo_total], mode="markers", name="Simulación", marker=dict(size=16, color="red")))
-        fig.update_layout(title="Consumo vs Edad", xaxis_title="Edad (días)", yaxis_title="Consumo (kg/ave)")
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs[2]:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=edades, y=df_gen['fcr'], mode="lines+markers", name="FCR"))
-        fig.add_trace(go.Scatter(x=[edad_salida], y=[fcr_real], mode="markers", name="Simulación", marker=dict(size=16, color="red")))
-        fig.update_layout(title="FCR vs Edad", xaxis_title="Edad (días)", yaxis_title="FCR")
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs[3]:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=edades, y=gdp_curve, mode="lines+markers", name="GDP"))
-        fig.add_trace(go.Scatter(x=[edad_salida], y=[gdp], mode="markers", name="Simulación", marker=dict(size=16, color="red")))
-        fig.update_layout(title="GDP vs Edad", xaxis_title="Edad (días)", yaxis_title="GDP (kg/día)")
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs[4]:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=edades, y=iep_curve, mode="lines+markers", name="IEP"))
-        fig.add_trace(go.Scatter(x=[edad_salida], y=[iep], mode="markers", name="Simulación", marker=dict(size=16, color="red")))
-        fig.update_layout(title="IEP vs Edad", xaxis_title="Edad (días)", yaxis_title="IEP")
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs[5]:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=edades, y=consumo_diario_curve, mode="lines+markers", name="Consumo Diario"))
-        fig.add_trace(go.Scatter(x=[edad_salida], y=[consumo_diario], mode="markers", name="Simulación", marker=dict(size=16, color="red")))
-        fig.update_layout(title="Consumo diario vs Edad", xaxis_title="Edad (días)", yaxis_title="Consumo diario (kg/ave)")
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs[6]:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=edades, y=prod_total_curve, mode="lines+markers", name="Producción total"))
-        fig.add_trace(go.Scatter(x=[edad_salida], y=[prod_total], mode="markers", name="Simulación", marker=dict(size=16, color="red")))
-        fig.update_layout(title="Producción total carne vs Edad", xaxis_title="Edad (días)", yaxis_title="Producción total (kg)")
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs[7]:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=edades, y=rentabilidad_curve, mode="lines+markers", name="Rentabilidad"))
-        fig.add_trace(go.Scatter(x=[edad_salida], y=[margen_neto], mode="markers", name="Simulación", marker=dict(size=16, color="red")))
-        fig.update_layout(title="Rentabilidad vs Edad", xaxis_title="Edad (días)", yaxis_title="Rentabilidad (USD)")
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs[8]:
-        opciones = st.multiselect(
-            "Elige las variables a visualizar en el gráfico combinado",
-            ["Peso", "Consumo", "FCR", "GDP", "IEP", "Consumo diario", "Producción total", "Rentabilidad"],
-            default=["Peso", "Consumo"]
+    with perfil.seccion("Curvas: escenario"):
+        curvas_esc = curvas_escenario(
+            df_gen, aves_ini, aves_finales, precio_alimento_kg, precio_venta_kg,
+            alimento_total=alimento_por_edad_salida(df_gen, aves_ini, mortalidad, edad_inicial, fraccion_semana)
         )
+    # Variable: (curva vs edad, valor simulado, nombre de la traza, título, eje Y)
+    series = {
+        "Peso": (df_gen['peso'], peso_final, "Peso", "Peso vs Edad", "Peso (kg)"),
+        "Consumo": (df_gen['consumo'], consumo_total, "Consumo", "Consumo vs Edad", "Consumo (kg/ave)"),
+        "FCR": (df_gen['fcr'], fcr_real, "FCR", "FCR vs Edad", "FCR"),
+        "GDP": (df_gen['gdp'], gdp, "GDP", "GDP vs Edad", "GDP (kg/día)"),
+        "IEP": (curvas_esc["iep"], iep, "IEP", "IEP vs Edad", "IEP"),
+        "Consumo diario": (df_gen['consumo_diario'], consumo_diario, "Consumo Diario", "Consumo diario vs Edad", "Consumo diario (kg/ave)"),
+        "Producción total": (curvas_esc["prod_total"], prod_total, "Producción total", "Producción total carne vs Edad", "Producción total (kg)"),
+        "Rentabilidad": (curvas_esc["rentabilidad"], margen_neto, "Rentabilidad", "Rentabilidad vs Edad", "Rentabilidad (USD)"),
+    }
+    with perfil.seccion("Figura: variable productiva"):
         fig = go.Figure()
-        if "Peso" in opciones:
-            fig.add_trace(go.Scatter(x=edades, y=df_gen['peso'], mode="lines+markers", name="Peso"))
-        if "Consumo" in opciones:
-            fig.add_trace(go.Scatter(x=edades, y=df_gen['consumo'], mode="lines+markers", name="Consumo"))
-        if "FCR" in opciones:
-            fig.add_trace(go.Scatter(x=edades, y=df_gen['fcr'], mode="lines+markers", name="FCR"))
-        if "GDP" in opciones:
-            fig.add_trace(go.Scatter(x=edades, y=gdp_curve, mode="lines+markers", name="GDP"))
-        if "IEP" in opciones:
-            fig.add_trace(go.Scatter(x=edades, y=iep_curve, mode="lines+markers", name="IEP"))
-        if "Consumo diario" in opciones:
-            fig.add_trace(go.Scatter(x=edades, y=consumo_diario_curve, mode="lines+markers", name="Consumo Diario"))
-        if "Producción total" in opciones:
-            fig.add_trace(go.Scatter(x=edades, y=prod_total_curve, mode="lines+markers", name="Producción total"))
-        if "Rentabilidad" in opciones:
-            fig.add_trace(go.Scatter(x=edades, y=rentabilidad_curve, mode="lines+markers", name="Rentabilidad"))
-        fig.update_layout(title="Variables seleccionadas vs Edad", xaxis_title="Edad (días)")
-        st.plotly_chart(fig, use_container_width=True)
+        if vista == "Gráfico Combinado":
+            opciones = st.multiselect(
+                "Elige las variables a visualizar en el gráfico combinado",
+                list(series),
+                default=["Peso", "Consumo"]
+            )
+            for opcion in opciones:
+                curva, _, nombre_traza, _, _ = series[opcion]
+                fig.add_trace(go.Scatter(x=edades, y=curva, mode="lines", name=nombre_traza))
+            fig.update_layout(title="Variables seleccionadas vs Edad", xaxis_title="Edad (días)")
+        elif vista == "Dinámica diaria":
+            ciclo = slice(edad_inicial, edad_salida + 1)
+            dias = np.arange(dinamica["vivos"].shape[1])[ciclo]
+            fig.add_trace(go.Scatter(x=dias, y=dinamica["vivos"][0, ciclo], mode="lines", name="Aves vivas"))
+            fig.add_trace(go.Scatter(x=dias, y=dinamica["biomasa"][0, ciclo], mode="lines", name="Biomasa (kg)"))
+            fig.add_trace(go.Scatter(
+                x=dias, y=dinamica["costo_alim_acum"][0, ciclo], mode="lines",
+                name="Costo alimento acumulado (USD)", yaxis="y2"
+            ))
+            fig.update_layout(
+                title="Dinámica diaria del lote", xaxis_title="Edad (días)", yaxis_title="Aves / kg",
+                yaxis2=dict(title="USD", overlaying="y", side="right")
+            )
+        else:
+            curva, valor_sim, nombre_traza, titulo, eje_y = series[vista]
+            fig.add_trace(go.Scatter(x=edades, y=curva, mode="lines", name=nombre_traza))
+            fig.add_trace(go.Scatter(x=[edad_salida], y=[valor_sim], mode="markers", name="Simulación", marker=dict(size=16, color="red")))
+            fig.update_layout(title=titulo, xaxis_title="Edad (días)", yaxis_title=eje_y)
+    mostrar_figura(fig, "variable productiva", perfil)
+    mostrar_perfil(perfil)
+
+
+# ---------------------- SIMULADOR PRODUCTIVO ----------------------
+if menu == "Simulador Productivo":
+    st.header("Simulador Productivo Mejorado")
+
+    with st.expander("Importar catálogo de genética (Excel/CSV)"):
+        archivo_catalogo = st.file_uploader("Catálogo de la casa genética", type=["xlsx", "csv"], key="catalogo_genetica")
+        modo_import = st.selectbox("Al importar", ["Añadir a la genética actual", "Reemplazar la genética actual"], key="modo_import")
+        if archivo_catalogo is not None and st.button("Importar catálogo"):
+            try:
+                with perfil.seccion("Genética: importación del catálogo"):
+                    catalogo = cargar_catalogo(archivo_catalogo.getvalue(), archivo_catalogo.name)
+            except ValueError as e:
+                st.error(f"El catálogo no es válido: {e}")
+            else:
+                genetica_nueva = a_genetica(catalogo)
+                if modo_import == "Añadir a la genética actual":
+                    actual = st.session_state["genetica_edit"]
+                    genetica_nueva = pd.concat(
+                        [actual[~actual["linea"].isin(genetica_nueva["linea"])], genetica_nueva], ignore_index=True
+                    )
+                fijar_genetica(genetica_nueva)
+                st.success(f"Catálogo importado: {catalogo.index.get_level_values('linea').nunique()} líneas, {len(catalogo):,} filas.")
+
+    with st.expander("Ajustar curvas a registros históricos de lotes (Excel/CSV)"):
+        st.caption("Pesajes por lote con línea, edad, peso y, opcionalmente, consumo acumulado, granja, lote y fecha o temporada.")
+        archivo_registros = st.file_uploader("Registros de lotes", type=["xlsx", "csv"], key="registros_historicos")
+        c1, c2 = st.columns(2)
+        claves_ajuste = c1.multiselect("Agrupar por", CLAVES_AJUSTE, default=["granja", "linea", "temporada"], key="claves_ajuste")
+        modelo_ajuste = c2.selectbox("Modelo", list(MODELOS_AJUSTE), format_func=str.capitalize, key="modelo_ajuste")
+        if archivo_registros is not None and st.button("Ajustar curvas"):
+            try:
+                with perfil.seccion("Ajuste: curvas históricas"):
+                    st.session_state["ajustes"] = ajustar_archivo(
+                        archivo_registros.getvalue(), archivo_registros.name, claves_ajuste, modelo_ajuste
+                    )
+            except ValueError as e:
+                st.error(f"Los registros no son válidos: {e}")
+        if "ajustes" in st.session_state:
+            ajustes = st.session_state["ajustes"]
+            st.dataframe(ajustes, use_container_width=True)
+            resumen = ", ".join(
+                f"{n:,} {ESTADOS_AJUSTE[estado].lower()}" for estado, n in ajustes["estado"].value_counts().items()
+            )
+            st.caption(f"{len(ajustes):,} ajustes: {resumen}. Solo los convergidos pasan a la genética.")
+            if st.button("Añadir curvas ajustadas a la genética"):
+                try:
+                    genetica_ajustada = ajustes_a_genetica(ajustes)
+                except ValueError as e:
+                    st.error(str(e))
+                else:
+                    actual = st.session_state["genetica_edit"]
+                    fijar_genetica(pd.concat(
+                        [actual[~actual["linea"].isin(genetica_ajustada["linea"])], genetica_ajustada], ignore_index=True
+                    ))
+                    st.success(f"{genetica_ajustada['linea'].nunique()} líneas ajustadas disponibles en el simulador.")
+
+    with st.expander("Mostrar y editar genética cargada"):
+        with perfil.seccion("Genética: editor"):
+            df_edit = st.data_editor(
+                st.session_state["genetica_edit"], 
+                num_rows="dynamic", 
+                use_container_width=True, 
+                key="edit_genetica"
+            )
+        if st.button("Guardar cambios en la genética"):
+            if hash_genetica(df_edit) != st.session_state["genetica_hash"]:
+                # La genética nueva tiene otro hash, así que es otra clave de la
+                # caché compartida. Las curvas anteriores quedan ahí porque otras
+                # sesiones (casi siempre con la genética de referencia) las siguen
+                # usando; el LRU las descarta cuando nadie las pide.
+                fijar_genetica(df_edit)
+                st.success("¡Cambios guardados!")
+            else:
+                st.info("La genética no tiene cambios.")
+    with perfil.seccion("Curvas: tabla diaria"):
+        curvas = tabla_curvas(st.session_state["genetica_edit"], st.session_state["genetica_hash"])
+
+    with perfil.seccion("Simulador productivo (fragmento)"):
+        simulador_productivo(curvas)
 
-    if len(st.session_state['escenarios_guardados']) > 0:
+    with st.expander("Exportar curvas diarias de la genética"):
+        panel_exportacion("curvas", "curvas_diarias", lambda: {"Curvas diarias": curvas_diarias(curvas)})
+
+    if almacen.contar("productivo") > 0:
         st.markdown("### Comparador de escenarios guardados")
-        df_hist = pd.DataFrame(st.session_state['escenarios_guardados'])
-        st.dataframe(df_hist)
-        var_comp = st.selectbox("Selecciona variable a comparar", [
-            "peso_fin","consumo","fcr","gdp","iep","prod_total","costo_alim","ingreso_bruto","margen_neto","consumo_diario"
-        ], format_func=lambda x: {
-            "peso_fin":"Peso final",
-            "consumo":"Consumo acumulado",
-            "fcr":"FCR",
-            "gdp":"GDP",
-            "iep":"IEP",
-            "prod_total":"Producción total",
-            "costo_alim":"Costo alimento",
-            "ingreso_bruto":"Ingreso bruto",
-            "margen_neto":"Rentabilidad",
-            "consumo_diario":"Consumo diario"
-        }[x])
-        fig = go.Figure()
-        for idx, row in df_hist.iterrows():
-            fig.add_trace(go.Bar(
-                name=row["nombre"],
-                x=[row["nombre"]], y=[row[var_comp]]
-            ))
-        fig.update_layout(title=f"Comparativa de {var_comp}", barmode="group")
-        st.plotly_chart(fig)
+        mostrar_comparador("productivo", "prod_sim")
 
 # ---------------------- SIMULADOR ECONOMICO ----------------------
 elif menu == "Simulador Económico":
     st.header("Simulador Económico Interactivo")
+    modo_eco = st.selectbox("Modo de simulación", ["Determinístico", "Riesgo"], key="modo_eco")
     col1, col2, col3 = st.columns(3)
     with col1:
         precio_venta = st.slider("Precio venta (USD/kg)", 0.5, 4.0, 2.0, 0.01)
         peso_final = st.slider("Peso final (kg)", 1.0, 4.0, 2.5, 0.1)
     with col2:
-        precio_alimento = st.slider("Precio alimento (USD/kg)", 0.2, 1.5, 0.5, 0.01)
+        usar_dieta_eco = "dieta" in st.session_state and st.toggle("Usar precio medio de la dieta formulada", key="usar_dieta_eco")
+        precio_alimento = st.slider("Precio alimento (USD/kg)", 0.2, 1.5, 0.5, 0.01, disabled=usar_dieta_eco)
+        if usar_dieta_eco:
+            precio_alimento = st.session_state["dieta"]["medio"]
+            st.caption(f"Dieta formulada: {precio_alimento:.3f} USD/kg")
         consumo = st.slider("Consumo acumulado (kg/ave)", 2.0, 7.0, 4.5, 0.1)
     with col3:
         aves_ini = st.number_input("Aves iniciales", 1000, 100000, 10000)
         mortalidad = st.slider("Mortalidad (%)", 0.0, 20.0, 5.0, 0.1)
         otros_costos = st.slider("Otros costos por ave (USD)", 0.0, 2.0, 0.5, 0.01)
 
-    aves_finales = aves_ini * (1 - mortalidad/100)
-    prod_total = aves_finales * peso_final
-    costo_alim = consumo * aves_ini * precio_alimento
-    costo_total = costo_alim + aves_ini * otros_costos
-    ingreso_bruto = prod_total * precio_venta
-    margen_neto = ingreso_bruto - costo_total
-    margen_ave = margen_neto / aves_finales if aves_finales > 0 else 0
-    rentabilidad = (margen_neto / costo_total)*100 if costo_total>0 else 0
-
-    st.markdown("### KPIs económicos")
-    k1, k2, k3, k4 = st.columns(4)
-    k1.metric("Margen neto total (USD)", f"{margen_neto:,.2f}")
-    k2.metric("Margen neto por ave (USD)", f"{margen_ave:.2f}")
-    k3.metric("Rentabilidad (%)", f"{rentabilidad:.2f}")
-    k4.metric("Producción total carne (kg)", f"{prod_total:,.0f}")
-
-    k5, k6, k7 = st.columns(3)
-    k5.metric("Costo total alimento (USD)", f"{costo_alim:,.2f}")
-    k6.metric("Costo total (USD)", f"{costo_total:,.2f}")
-    k7.metric("Ingreso bruto (USD)", f"{ingreso_bruto:,.2f}")
+    if modo_eco == "Riesgo":
+        st.markdown("### Distribuciones de las variables inciertas")
+        st.caption("El valor de cada slider es la media (Normal) o el centro (Uniforme, Triangular) de su distribución.")
+        variables_riesgo = {
+            "precio_venta_kg": ("Precio venta (USD/kg)", precio_venta, 0.20),
+            "precio_alimento_kg": ("Precio alimento (USD/kg)", precio_alimento, 0.05),
+            "mortalidad": ("Mortalidad (%)", mortalidad, 2.0),
+            "peso_final": ("Peso final (kg)", peso_final, 0.20),
+        }
+        distribuciones = {}
+        for col, (var, (etiqueta, base, variacion_def)) in zip(st.columns(4), variables_riesgo.items()):
+            with col:
+                tipo = st.selectbox(etiqueta, DISTRIBUCIONES, index=1, key=f"dist_{var}")
+                variacion = st.number_input("Desviación / semiamplitud", min_value=0.0, value=variacion_def, format="%.3f", key=f"var_{var}")
+            distribuciones[var] = distribucion(tipo, base, variacion)
+        c1, c2 = st.columns(2)
+        n_sorteos = c1.select_slider(
+            "Número de sorteos", [100_000, 1_000_000, 2_000_000, 5_000_000, 10_000_000],
+            value=1_000_000, format_func=lambda x: f"{x:,}"
+        )
+        semilla = c2.number_input("Semilla", 0, 2**31 - 1, 42)
+        with perfil.seccion("Riesgo: simulación Monte Carlo"):
+            res = simular_riesgo(distribuciones, consumo, aves_ini, otros_costos, n_sorteos, semilla)
 
-    st.markdown("---")
-    tabs_e = st.tabs(["Margen vs Precio Venta", "Margen vs Precio Alimento", "Margen vs Consumo", "Gráfico Combinado"])
-    precios_venta = np.linspace(0.5, 4.0, 60)
-    margenes_venta = [(prod_total*p - costo_total) for p in precios_venta]
-    precios_alim = np.linspace(0.2, 1.5, 60)
-    margenes_alim = [(prod_total*precio_venta - (consumo*aves_ini*pa + aves_ini*otros_costos)) for pa in precios_alim]
-    consumos = np.linspace(2.0, 7.0, 60)
-    margenes_consumo = [(prod_total*precio_venta - (c*aves_ini*precio_alimento + aves_ini*otros_costos)) for c in consumos]
-    with tabs_e[0]:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=precios_venta, y=margenes_venta, mode="lines", name="Margen neto"))
-        fig.add_trace(go.Scatter(x=[precio_venta], y=[margen_neto], mode="markers", marker=dict(size=14, color="red"), name="Simulación actual"))
-        fig.update_layout(title="Margen vs Precio Venta", xaxis_title="Precio venta (USD/kg)", yaxis_title="Margen neto (USD)")
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs_e[1]:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=precios_alim, y=margenes_alim, mode="lines", name="Margen neto"))
-        fig.add_trace(go.Scatter(x=[precio_alimento], y=[margen_neto], mode="markers", marker=dict(size=14, color="red"), name="Simulación actual"))
-        fig.update_layout(title="Margen vs Precio Alimento", xaxis_title="Precio alimento (USD/kg)", yaxis_title="Margen neto (USD)")
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs_e[2]:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=consumos, y=margenes_consumo, mode="lines", name="Margen neto"))
-        fig.add_trace(go.Scatter(x=[consumo], y=[margen_neto], mode="markers", marker=dict(size=14, color="red"), name="Simulación actual"))
-        fig.update_layout(title="Margen vs Consumo", xaxis_title="Consumo acumulado (kg/ave)", yaxis_title="Margen neto (USD)")
-        st.plotly_chart(fig, use_container_width=True)
-    with tabs_e[3]:
-        opciones_e = st.multiselect(
-            "Elige las variables económicas a visualizar",
-            ["Margen neto", "Producción total", "Costo total", "Ingreso bruto", "Rentabilidad"],
-            default=["Margen neto", "Producción total"]
+        st.markdown("### Riesgo del margen neto")
+        r1, r2, r3, r4 = st.columns(4)
+        r1.metric("P5 margen (USD)", f"{res['p5']:,.2f}")
+        r2.metric("P50 margen (USD)", f"{res['p50']:,.2f}")
+        r3.metric("P95 margen (USD)", f"{res['p95']:,.2f}")
+        r4.metric("Probabilidad de pérdida", f"{res['prob_perdida']*100:.2f} %")
+        centros, anchos, conteos = reagrupar_histograma(res["bordes"], res["conteos"])
+        with perfil.seccion("Figura: distribución del margen"):
+            fig = go.Figure(go.Bar(x=centros, y=conteos / res["n_sorteos"], width=anchos, name="Frecuencia"))
+            for etiqueta, valor in (("P5", res["p5"]), ("P50", res["p50"]), ("P95", res["p95"])):
+                fig.add_vline(x=valor, line_dash="dash", annotation_text=etiqueta)
+            fig.add_vline(x=0, line_color="red")
+            fig.update_layout(title=f"Distribución del margen neto ({res['n_sorteos']:,} sorteos)", xaxis_title="Margen neto (USD)", yaxis_title="Probabilidad", bargap=0)
+        mostrar_figura(fig, "distribución del margen", perfil)
+        with st.expander("Exportar resumen de la simulación"):
+            panel_exportacion("riesgo", "riesgo_margen", lambda: resumen_riesgo(res))
+    else:
+        with perfil.seccion("KPIs: calcular_kpis"):
+            kpis = calcular_kpis(
+                peso_final=peso_final, consumo_total=consumo, aves_ini=aves_ini,
+                mortalidad=mortalidad, precio_alimento_kg=precio_alimento,
+                precio_venta_kg=precio_venta, otros_costos=otros_costos
+            )
+        aves_finales = float(kpis["aves_finales"])
+        prod_total = float(kpis["prod_total"])
+        costo_alim = float(kpis["costo_alim"])
+        costo_total = float(kpis["costo_total"])
+        ingreso_bruto = float(kpis["ingreso_bruto"])
+        margen_neto = float(kpis["margen_neto"])
+        margen_ave = float(kpis["margen_ave"])
+        rentabilidad = float(kpis["rentabilidad"])
+
+        st.markdown("### KPIs económicos")
+        k1, k2, k3, k4 = st.columns(4)
+        k1.metric("Margen neto total (USD)", f"{margen_neto:,.2f}")
+        k2.metric("Margen neto por ave (USD)", f"{margen_ave:.2f}")
+        k3.metric("Rentabilidad (%)", f"{rentabilidad:.2f}")
+        k4.metric("Producción total carne (kg)", f"{prod_total:,.0f}")
+
+        k5, k6, k7 = st.columns(3)
+        k5.metric("Costo total alimento (USD)", f"{costo_alim:,.2f}")
+        k6.metric("Costo total (USD)", f"{costo_total:,.2f}")
+        k7.metric("Ingreso bruto (USD)", f"{ingreso_bruto:,.2f}")
+
+        st.markdown("---")
+        tabs_e = st.tabs(["Margen vs Precio Venta", "Margen vs Precio Alimento", "Margen vs Consumo", "Mapa de sensibilidad", "Tornado", "Gráfico Combinado"])
+        base_eco = {
+            "precio_venta_kg": precio_venta, "precio_alimento_kg": precio_alimento,
+            "peso_final": peso_final, "consumo_total": consumo, "mortalidad": mortalidad,
+            "aves_ini": aves_ini, "otros_costos": otros_costos
+        }
+        rangos_eco = {
+            "precio_venta_kg": (0.5, 4.0), "precio_alimento_kg": (0.2, 1.5),
+            "peso_final": (1.0, 4.0), "consumo_total": (2.0, 7.0), "mortalidad": (0.0, 20.0)
+        }
+        with perfil.seccion("Sensibilidad: barridos"):
+            precios_venta = np.linspace(0.5, 4.0, 60)
+            margenes_venta = barrido(base_eco, "precio_venta_kg", precios_venta)
+            precios_alim = np.linspace(0.2, 1.5, 60)
+            margenes_alim = barrido(base_eco, "precio_alimento_kg", precios_alim)
+            consumos = np.linspace(2.0, 7.0, 60)
+            margenes_consumo = barrido(base_eco, "consumo_total", consumos)
+        with tabs_e[0]:
+            with perfil.seccion("Figura: margen vs precio venta"):
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=precios_venta, y=margenes_venta, mode="lines", name="Margen neto"))
+                fig.add_trace(go.Scatter(x=[precio_venta], y=[margen_neto], mode="markers", marker=dict(size=14, color="red"), name="Simulación actual"))
+                fig.update_layout(title="Margen vs Precio Venta", xaxis_title="Precio venta (USD/kg)", yaxis_title="Margen neto (USD)")
+            mostrar_figura(fig, "margen vs precio venta", perfil)
+        with tabs_e[1]:
+            with perfil.seccion("Figura: margen vs precio alimento"):
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=precios_alim, y=margenes_alim, mode="lines", name="Margen neto"))
+                fig.add_trace(go.Scatter(x=[precio_alimento], y=[margen_neto], mode="markers", marker=dict(size=14, color="red"), name="Simulación actual"))
+                fig.update_layout(title="Margen vs Precio Alimento", xaxis_title="Precio alimento (USD/kg)", yaxis_title="Margen neto (USD)")
+            mostrar_figura(fig, "margen vs precio alimento", perfil)
+        with tabs_e[2]:
+            with perfil.seccion("Figura: margen vs consumo"):
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=consumos, y=margenes_consumo, mode="lines", name="Margen neto"))
+                fig.add_trace(go.Scatter(x=[consumo], y=[margen_neto], mode="markers", marker=dict(size=14, color="red"), name="Simulación actual"))
+                fig.update_layout(title="Margen vs Consumo", xaxis_title="Consumo acumulado (kg/ave)", yaxis_title="Margen neto (USD)")
+            mostrar_figura(fig, "margen vs consumo", perfil)
+        with tabs_e[3]:
+            pares = {
+                "Precio venta × Precio alimento": ("precio_venta_kg", "precio_alimento_kg"),
+                "Peso final × Consumo": ("peso_final", "consumo_total"),
+            }
+            c1, c2, c3 = st.columns(3)
+            par = pares[c1.selectbox("Variables de la grilla", list(pares))]
+            resolucion = c2.slider("Puntos por eje", 20, 500, 100, 10)
+            con_mortalidad = c3.checkbox("Añadir mortalidad (grilla 3D)")
+            ejes = [(v, *rangos_eco[v], resolucion) for v in par]
+            if con_mortalidad:
+                n_mort = c3.slider("Puntos de mortalidad", 2, 50, 21)
+                ejes.append(("mortalidad", *rangos_eco["mortalidad"], n_mort))
+            with perfil.seccion("Sensibilidad: grilla"):
+                coords, grilla = grilla_margen(base_eco, ejes)
+            margen_grilla = grilla
+            if con_mortalidad:
+                mort_corte = st.slider("Mortalidad del corte (%)", *rangos_eco["mortalidad"], float(mortalidad), 0.1, key="mort_corte")
+                i_mort = int(np.abs(coords["mortalidad"] - mort_corte).argmin())
+                grilla = grilla[:, :, i_mort]
+                titulo = f"Margen neto con mortalidad {coords['mortalidad'][i_mort]:.1f} %"
+            else:
+                titulo = "Margen neto"
+            with perfil.seccion("Figura: mapa de sensibilidad"):
+                fig = go.Figure(go.Heatmap(
+                    x=coords[par[0]], y=coords[par[1]], z=grilla.T,
+                    colorscale="RdYlGn", zmid=0, colorbar=dict(title="USD")
+                ))
+                fig.add_trace(go.Scatter(x=[base_eco[par[0]]], y=[base_eco[par[1]]], mode="markers", marker=dict(size=14, color="black", symbol="x"), name="Simulación actual"))
+                fig.update_layout(title=titulo, xaxis_title=VARIABLES_SENSIBILIDAD[par[0]], yaxis_title=VARIABLES_SENSIBILIDAD[par[1]])
+            mostrar_figura(fig, "mapa de sensibilidad", perfil)
+            with st.expander(f"Exportar la grilla completa ({margen_grilla.size:,} puntos)"):
+                panel_exportacion(
+                    "grilla", "grilla_sensibilidad", lambda: {"Grilla": bloques_grilla(coords, margen_grilla)},
+                    total=margen_grilla.size
+                )
+        with tabs_e[4]:
+            variacion_pct = st.slider("Variación de cada variable (±%)", 1, 50, 10)
+            with perfil.seccion("Sensibilidad: tornado"):
+                df_tornado = tornado(base_eco, variacion_pct).iloc[::-1]
+            with perfil.seccion("Figura: tornado"):
+                fig = go.Figure()
+                fig.add_trace(go.Bar(y=df_tornado["etiqueta"], x=df_tornado["delta_bajo"], orientation="h", name=f"-{variacion_pct} %"))
+                fig.add_trace(go.Bar(y=df_tornado["etiqueta"], x=df_tornado["delta_alto"], orientation="h", name=f"+{variacion_pct} %"))
+                fig.update_layout(title=f"Tornado: cambio del margen neto (base {margen_neto:,.2f} USD)", xaxis_title="Cambio en margen neto (USD)", barmode="overlay")
+            mostrar_figura(fig, "tornado", perfil)
+        with tabs_e[5]:
+            opciones_e = st.multiselect(
+                "Elige las variables económicas a visualizar",
+                ["Margen neto", "Producción total", "Costo total", "Ingreso bruto", "Rentabilidad"],
+                default=["Margen neto", "Producción total"]
+            )
+            with perfil.seccion("Figura: combinado económico"):
+                fig = go.Figure()
+                if "Margen neto" in opciones_e:
+                    fig.add_trace(go.Scatter(x=[0,1], y=[margen_neto, margen_neto], mode="lines", name="Margen neto"))
+                if "Producción total" in opciones_e:
+                    fig.add_trace(go.Scatter(x=[0,1], y=[prod_total, prod_total], mode="lines", name="Producción total"))
+                if "Costo total" in opciones_e:
+                    fig.add_trace(go.Scatter(x=[0,1], y=[costo_total, costo_total], mode="lines", name="Costo total"))
+                if "Ingreso bruto" in opciones_e:
+                    fig.add_trace(go.Scatter(x=[0,1], y=[ingreso_bruto, ingreso_bruto], mode="lines", name="Ingreso bruto"))
+                if "Rentabilidad" in opciones_e:
+                    fig.add_trace(go.Scatter(x=[0,1], y=[rentabilidad, rentabilidad], mode="lines", name="Rentabilidad (%)"))
+                fig.update_layout(title="Variables seleccionadas (escala dummy)", showlegend=True)
+            mostrar_figura(fig, "combinado económico", perfil)
+
+        nombre_eco = st.text_input("Nombre del escenario económico", f"Económico {almacen.contar('economico')+1}")
+        if st.button("Guardar este escenario económico"):
+            almacen.guardar("economico", {
+                "nombre": nombre_eco,
+                "precio_venta": precio_venta,
+                "precio_alimento": precio_alimento,
+                "peso_final": peso_final,
+                "consumo": consumo,
+                "aves_ini": aves_ini,
+                "aves_finales": aves_finales,
+                "mortalidad": mortalidad,
+                "prod_total": prod_total,
+                "costo_alim": costo_alim,
+                "costo_total": costo_total,
+                "ingreso_bruto": ingreso_bruto,
+                "margen_neto": margen_neto,
+                "margen_ave": margen_ave,
+                "rentabilidad": rentabilidad,
+                "otros_costos": otros_costos
+            })
+            st.success("¡Escenario económico guardado!")
+
+        if almacen.contar("economico") > 0:
+            st.markdown("### Comparador de escenarios económicos guardados")
+            mostrar_comparador("economico", "eco_sim")
+
+# ---------------------- FORMULACION DE DIETAS ----------------------
+elif menu == "Formulación de Dietas":
+    st.header("Formulación de Dietas a Mínimo Costo")
+    with st.expander("Ingredientes: precio (USD/kg), inclusión (fracción) y composición", expanded=True):
+        ingredientes = st.data_editor(ingredientes_base(), num_rows="dynamic", use_container_width=True, key="edit_ingredientes")
+    with st.expander("Requisitos nutricionales por fase"):
+        requisitos = st.data_editor(
+            requisitos_base(), num_rows="dynamic", use_container_width=True, key="edit_requisitos",
+            column_config={
+                "fase": st.column_config.SelectboxColumn("fase", options=list(FASES)),
+                "nutriente": st.column_config.SelectboxColumn("nutriente", options=list(NUTRIENTES)),
+            }
         )
-        fig = go.Figure()
-        if "Margen neto" in opciones_e:
-            fig.add_trace(go.Scatter(x=[0,1], y=[margen_neto, margen_neto], mode="lines", name="Margen neto"))
-        if "Producción total" in opciones_e:
-            fig.add_trace(go.Scatter(x=[0,1], y=[prod_total, prod_total], mode="lines", name="Producción total"))
-        if "Costo total" in opciones_e:
-            fig.add_trace(go.Scatter(x=[0,1], y=[costo_total, costo_total], mode="lines", name="Costo total"))
-        if "Ingreso bruto" in opciones_e:
-            fig.add_trace(go.Scatter(x=[0,1], y=[ingreso_bruto, ingreso_bruto], mode="lines", name="Ingreso bruto"))
-        if "Rentabilidad" in opciones_e:
-            fig.add_trace(go.Scatter(x=[0,1], y=[rentabilidad, rentabilidad], mode="lines", name="Rentabilidad (%)"))
-        fig.update_layout(title="Variables seleccionadas (escala dummy)", showlegend=True)
-        st.plotly_chart(fig, use_container_width=True)
+    try:
+        ingredientes = preparar_ingredientes(ingredientes)
+        with perfil.seccion("Dietas: formulación"):
+            mezclas, precios_fase = formular(ingredientes, requisitos)
+    except ValueError as e:
+        st.error(f"No se pudo formular la dieta: {e}")
+    else:
+        for col, (fase, precio) in zip(st.columns(len(FASES)), precios_fase.items()):
+            desde, hasta = FASES[fase]
+            col.metric(f"Costo {fase} ({desde}–{hasta} d)", f"{precio:.4f} USD/kg")
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown("#### Inclusión por fase (%)")
+            st.dataframe((mezclas[mezclas.sum(axis=1) > 1e-9] * 100).round(2), use_container_width=True)
+        with c2:
+            st.markdown("#### Nutrientes alcanzados")
+            st.dataframe(aporte_nutrientes(ingredientes, mezclas).rename(index=NUTRIENTES).round(3), use_container_width=True)
 
-    nombre_eco = st.text_input("Nombre del escenario económico", f"Económico {len(st.session_state['escenarios_eco'])+1}")
-    if st.button("Guardar este escenario económico"):
-        st.session_state['escenarios_eco'].append({
-            "nombre": nombre_eco,
-            "precio_venta": precio_venta,
-            "precio_alimento": precio_alimento,
-            "peso_final": peso_final,
-            "consumo": consumo,
-            "aves_ini": aves_ini,
-            "aves_finales": aves_finales,
-            "mortalidad": mortalidad,
-            "prod_total": prod_total,
-            "costo_alim": costo_alim,
-            "costo_total": costo_total,
-            "ingreso_bruto": ingreso_bruto,
-            "margen_neto": margen_neto,
-            "margen_ave": margen_ave,
-            "rentabilidad": rentabilidad,
-            "otros_costos": otros_costos
+        curvas = tabla_curvas(st.session_state["genetica_edit"], st.session_state["genetica_hash"])
+        c1, c2, c3 = st.columns(3)
+        linea_dieta = c1.selectbox("Línea para ponderar las fases", list(curvas), key="linea_dieta")
+        df_linea = curvas[linea_dieta]
+        edad_dieta = c2.slider("Edad de salida (días)", 1, int(df_linea["edad"].iloc[-1]), min(42, int(df_linea["edad"].iloc[-1])), key="edad_dieta")
+        medio = precio_medio(precios_fase, df_linea["consumo"], 0, edad_dieta)
+        c3.metric("Precio medio ponderado por consumo", f"{medio:.4f} USD/kg")
+        if st.button("Usar esta dieta en los simuladores"):
+            st.session_state["dieta"] = {"fases": precios_fase, "medio": medio}
+            st.success("Dieta disponible en los simuladores productivo y económico.")
+
+        st.markdown("### Barrido de precios de un ingrediente")
+        c1, c2, c3 = st.columns(3)
+        ingrediente = c1.selectbox("Ingrediente", list(ingredientes["ingrediente"]), key="ingrediente_barrido")
+        rango = c2.slider("Variación del precio (±%)", 5, 100, 50, 5, key="rango_barrido")
+        n_escenarios = c3.select_slider("Escenarios", [100, 1_000, 10_000], value=1_000, key="n_barrido")
+        i = int(ingredientes.index[ingredientes["ingrediente"] == ingrediente][0])
+        precios = np.tile(ingredientes["precio_kg"].to_numpy(dtype=float), (n_escenarios, 1))
+        base_i = precios[0, i]
+        precios[:, i] = np.linspace(base_i * (1 - rango / 100), base_i * (1 + rango / 100), n_escenarios)
+        with perfil.seccion("Dietas: barrido de precios"):
+            costos = {fase: problema_fase(ingredientes, requisitos, fase).resolver_lote(precios)[0] for fase in FASES}
+        with perfil.seccion("Figura: barrido de dieta"):
+            fig = go.Figure()
+            for fase, costos_fase in costos.items():
+                fig.add_trace(go.Scatter(x=precios[:, i], y=costos_fase, mode="lines", name=fase))
+            fig.add_vline(x=base_i, line_dash="dot", annotation_text="Precio actual")
+            fig.update_layout(title=f"Costo de la dieta vs precio de {ingrediente}",
+                              xaxis_title=f"Precio {ingrediente} (USD/kg)", yaxis_title="Costo dieta (USD/kg)")
+        mostrar_figura(fig, "barrido de dieta", perfil)
+
+# ---------------------- PORTAFOLIO DE GRANJA ----------------------
+elif menu == "Portafolio de Granja":
+    st.header("Portafolio de Galpones y Flujo de Caja")
+    curvas = tabla_curvas(st.session_state["genetica_edit"], st.session_state["genetica_hash"])
+    col1, col2, col3, col4 = st.columns(4)
+    inicio = pd.Timestamp(col1.date_input("Inicio del calendario", pd.Timestamp.today().normalize().replace(day=1), key="inicio_granja"))
+    anios = col2.selectbox("Horizonte (años)", [1, 2, 3], index=1, key="anios_granja")
+    n_galpones = col3.number_input("Galpones", min_value=1, max_value=1000, value=24, key="n_galpones")
+    escalonamiento = col4.number_input("Escalonamiento entre galpones (días)", min_value=0, max_value=60, value=7, key="escalonamiento")
+    fin = inicio + pd.DateOffset(years=anios) - pd.Timedelta(days=1)
+
+    if st.button("Generar galpones") or "galpones" not in st.session_state:
+        st.session_state["galpones"] = galpones_ejemplo(n_galpones, inicio, list(curvas), escalonamiento)
+        st.session_state["precios_granja"] = pd.DataFrame({
+            "fecha": [inicio, fin], "precio_venta_kg": [2.0, 2.0], "precio_alimento_kg": [0.5, 0.5]
         })
-        st.success("¡Escenario económico guardado!")
-
-    if len(st.session_state['escenarios_eco']) > 0:
-        st.markdown("### Comparador de escenarios económicos guardados")
-        df_eco = pd.DataFrame(st.session_state['escenarios_eco'])
-        st.dataframe(df_eco)
-        var_comp_e = st.selectbox("Selecciona variable a comparar", [
-            "margen_neto","margen_ave","rentabilidad","prod_total","costo_total","ingreso_bruto"
-        ], format_func=lambda x: {
-            "margen_neto":"Margen neto total",
-            "margen_ave":"Margen neto por ave",
-            "rentabilidad":"Rentabilidad (%)",
-            "prod_total":"Producción total",
-            "costo_total":"Costo total",
-            "ingreso_bruto":"Ingreso bruto"
-        }[x])
-        fig = go.Figure()
-        for idx, row in df_eco.iterrows():
-            fig.add_trace(go.Bar(
-                name=row["nombre"],
-                x=[row["nombre"]], y=[row[var_comp_e]]
-            ))
-        fig.update_layout(title=f"Comparativa de {var_comp_e}", barmode="group")
-        st.plotly_chart(fig)
+
+    with st.expander("Galpones y calendario de colocaciones"):
+        configuracion = dict(COLUMNAS_GALPONES)
+        configuracion["linea"] = st.column_config.SelectboxColumn(COLUMNAS_GALPONES["linea"], options=list(curvas))
+        galpones = st.data_editor(
+            st.session_state["galpones"], num_rows="dynamic", use_container_width=True,
+            column_config=configuracion, key="edit_galpones"
+        ).dropna()
+    with st.expander("Trayectoria de precios"):
+        st.caption("Los precios se interpolan día a día entre las fechas de la tabla.")
+        anclas = st.data_editor(st.session_state["precios_granja"], num_rows="dynamic", key="edit_precios_granja")
+    mort_semana = st.slider("Mortalidad en la primera semana (% del total)", 0, 100, int(FRACCION_PRIMERA_SEMANA * 100), 5, key="mort_semana_granja")
+
+    try:
+        with perfil.seccion("Portafolio: simulación"):
+            ciclos, diario = simular_granja(
+                galpones, st.session_state["genetica_edit"], st.session_state["genetica_hash"],
+                anclas, inicio, fin, mort_semana / 100
+            )
+    except ValueError as e:
+        st.error(f"No se puede simular el portafolio: {e}")
+    else:
+        completos = ciclos[ciclos["completo"]]
+        kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+        kpi1.metric("Ciclos completos", f"{len(completos):,}")
+        kpi2.metric("Carne producida (kg)", f"{completos['prod_total'].sum():,.0f}")
+        kpi3.metric("Margen neto de los ciclos (USD)", f"{completos['margen_neto'].sum():,.2f}")
+        kpi4.metric("Flujo de caja acumulado (USD)", f"{diario['flujo_acumulado'].iloc[-1]:,.2f}")
+        kpi5, kpi6, kpi7, kpi8 = st.columns(4)
+        kpi5.metric("Inventario máximo (aves)", f"{diario['aves'].max():,.0f}")
+        kpi6.metric("Alimento total (t)", f"{diario['alimento_kg'].sum() / 1000:,.1f}")
+        kpi7.metric("Demanda máxima de alimento (kg/día)", f"{diario['alimento_kg'].max():,.0f}")
+        kpi8.metric("Caja mínima acumulada (USD)", f"{diario['flujo_acumulado'].min():,.2f}")
+
+        st.markdown("### Línea de tiempo del portafolio")
+        c1, c2 = st.columns([1, 3])
+        frecuencia = c1.selectbox("Resolución", list(FRECUENCIAS), index=1, key="frecuencia_granja")
+        variable = c2.selectbox("Variable", list(VARIABLES_DIARIAS), format_func=VARIABLES_DIARIAS.get, key="variable_granja")
+        with perfil.seccion("Portafolio: remuestreo"):
+            serie = resumir_calendario(diario, FRECUENCIAS[frecuencia])
+        with perfil.seccion("Figura: línea de tiempo del portafolio"):
+            fig = go.Figure()
+            if variable in ("aves", "galpones_ocupados", "flujo_acumulado"):
+                fig.add_trace(go.Scatter(x=serie.index, y=serie[variable], mode="lines", name=VARIABLES_DIARIAS[variable]))
+            else:
+                fig.add_trace(go.Bar(x=serie.index, y=serie[variable], name=VARIABLES_DIARIAS[variable]))
+            fig.update_layout(title=f"{VARIABLES_DIARIAS[variable]} ({frecuencia.lower()})", xaxis_title="Fecha",
+                              yaxis_title=VARIABLES_DIARIAS[variable])
+        mostrar_figura(fig, "línea de tiempo del portafolio", perfil)
+        st.dataframe(serie.rename(columns=VARIABLES_DIARIAS), use_container_width=True)
+
+        st.markdown("### Resultados por galpón o línea")
+        clave = st.selectbox("Agrupar por", ["galpon", "linea"], format_func=COLUMNAS_GALPONES.get, key="clave_granja")
+        st.dataframe(resumen_por(ciclos, clave), use_container_width=True)
+
+        with st.expander("Exportar ciclos y flujo diario"):
+            panel_exportacion("granja", "portafolio", lambda: {"Ciclos": ciclos, "Diario": diario.reset_index()})
 
 # ---------------------- COMPARADOR DE ESCENARIOS ----------------------
 elif menu == "Comparador de Escenarios":
     st.header("Comparador de Escenarios Productivos y Económicos")
-    if len(st.session_state['escenarios_guardados']) > 0:
+    if almacen.contar("productivo") > 0:
         st.markdown("#### Productivos")
-        df_hist = pd.DataFrame(st.session_state['escenarios_guardados'])
-        st.dataframe(df_hist)
-        var_comp = st.selectbox("Variable a comparar (productivo)", [
-            "peso_fin","consumo","fcr","gdp","iep","prod_total","costo_alim","ingreso_bruto","margen_neto","consumo_diario"
-        ], format_func=lambda x: {
-            "peso_fin":"Peso final",
-            "consumo":"Consumo acumulado",
-            "fcr":"FCR",
-            "gdp":"GDP",
-            "iep":"IEP",
-            "prod_total":"Producción total",
-            "costo_alim":"Costo alimento",
-            "ingreso_bruto":"Ingreso bruto",
-            "margen_neto":"Rentabilidad",
-            "consumo_diario":"Consumo diario"
-        }[x], key="var_comp_prod")
-        fig = go.Figure()
-        for idx, row in df_hist.iterrows():
-            fig.add_trace(go.Bar(
-                name=row["nombre"], x=[row["nombre"]], y=[row[var_comp]]
-            ))
-        fig.update_layout(title=f"Comparativa de {var_comp}", barmode="group")
-        st.plotly_chart(fig)
+        f1, f2 = st.columns(2)
+        lineas_filtro = f1.multiselect("Filtrar por línea", almacen.valores_distintos("productivo", "linea"), key="filtro_linea_prod")
+        nombre_filtro = f2.text_input("Buscar por nombre", key="filtro_nombre_prod")
+        filtros_prod = dict(linea=lineas_filtro or None, nombre=nombre_filtro or None)
+        mostrar_comparador("productivo", "prod", filtros_prod)
     else:
         st.info("No hay escenarios productivos guardados aún. Guarda escenarios desde el Simulador Productivo para comparar.")
-    if len(st.session_state['escenarios_eco']) > 0:
+    if almacen.contar("economico") > 0:
         st.markdown("#### Económicos")
-        df_eco = pd.DataFrame(st.session_state['escenarios_eco'])
-        st.dataframe(df_eco)
-        var_comp_e = st.selectbox("Variable a comparar (económico)", [
-            "margen_neto","margen_ave","rentabilidad","prod_total","costo_total","ingreso_bruto"
-        ], format_func=lambda x: {
-            "margen_neto":"Margen neto total",
-            "margen_ave":"Margen neto por ave",
-            "rentabilidad":"Rentabilidad (%)",
-            "prod_total":"Producción total",
-            "costo_total":"Costo total",
-            "ingreso_bruto":"Ingreso bruto"
-        }[x], key="var_comp_eco")
-        fig = go.Figure()
-        for idx, row in df_eco.iterrows():
-            fig.add_trace(go.Bar(
-                name=row["nombre"], x=[row["nombre"]], y=[row[var_comp_e]]
-            ))
-        fig.update_layout(title=f"Comparativa de {var_comp_e}", barmode="group")
-        st.plotly_chart(fig)
+        nombre_filtro_e = st.text_input("Buscar por nombre", key="filtro_nombre_eco")
+        filtros_eco = dict(nombre=nombre_filtro_e or None)
+        mostrar_comparador("economico", "eco", filtros_eco)
     else:
         st.info("No hay escenarios económicos guardados aún. Guarda escenarios desde el Simulador Económico para comparar.") 
+
+mostrar_perfil(perfil)
@@ -0,0 +1 @@
+"""Benchmarks de UYWA-NUTRITION: `python -m benchmarks --help`."""
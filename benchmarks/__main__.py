@@ -0,0 +1,164 @@
+"""Ejecuta los benchmarks y los compara con la línea base guardada.
+
+Uso:
+    python -m benchmarks [--filtro kpis] [--sin-app] [--estricto]
+    python -m benchmarks --actualizar-base
+
+Cada caso se ejecuta una vez para calentar, luego `repeticiones` veces
+midiendo el tiempo, y una última vez con `tracemalloc` para el pico de
+memoria (por separado, porque el rastreo encarece la ejecución).
+
+La comparación usa el mínimo de la corrida actual contra la mediana de la
+línea base, con un margen que crece con la dispersión (MAD) de ambas: el
+ruido del sistema solo suma tiempo, así que el mínimo es la medida más
+estable. La línea base guarda la máquina y las versiones con las que se
+tomó; si no coinciden con las actuales se avisa, porque los tiempos no
+son comparables entre máquinas.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+BASE_DEFECTO = os.path.join(DIRECTORIO, "baseline.json")
+# Por debajo de este tiempo las diferencias son ruido de medición.
+PISO_MS = 1.0
+# Desviaciones absolutas medianas (de la base más la actual) toleradas.
+K_DISPERSION = 3.0
+# Campos del entorno que deben coincidir para comparar tiempos.
+CAMPOS_MAQUINA = ("python", "plataforma", "procesador", "nucleos", "numpy", "pandas", "streamlit")
+
+
+def entorno():
+    import numpy
+    import pandas
+    import streamlit
+
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "nucleos": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "streamlit": streamlit.__version__,
+    }
+
+
+def medir(fn, repeticiones):
+    """Tiempos (ms), su dispersión y pico de memoria (MB) de `fn`."""
+    fn()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tracemalloc.start()
+    try:
+        fn()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    mediana = statistics.median(tiempos)
+    return {
+        "mediana_ms": mediana,
+        "mad_ms": statistics.median(abs(t - mediana) for t in tiempos),
+        "min_ms": min(tiempos),
+        "max_ms": max(tiempos),
+        "repeticiones": repeticiones,
+        "memoria_pico_mb": pico / 2**20,
+    }
+
+
+def limite_ms(r, b, umbral):
+    """Tiempo mínimo por encima del cual `r` es más lento que la base `b`."""
+    ruido = K_DISPERSION * (b.get("mad_ms", 0.0) + r.get("mad_ms", 0.0))
+    return b["mediana_ms"] + max(umbral * b["mediana_ms"], ruido, PISO_MS)
+
+
+def comparar(resultados, base, umbral):
+    """Imprime la tabla contra la línea base; devuelve los casos que empeoraron."""
+    regresiones = []
+    print(f"{'caso':34} {'min ms':>9} {'mediana ms':>11} {'base ms':>9} {'límite':>9} {'x':>6} "
+          f"{'pico MB':>9} {'base MB':>9}")
+    for nombre, r in resultados.items():
+        b = base.get(nombre)
+        marca = ""
+        if b:
+            ratio = r["mediana_ms"] / b["mediana_ms"] if b["mediana_ms"] else float("inf")
+            limite = limite_ms(r, b, umbral)
+            mas_lento = r["min_ms"] > limite
+            mas_memoria = r["memoria_pico_mb"] > b["memoria_pico_mb"] * (1 + umbral) + 0.5
+            if mas_lento or mas_memoria:
+                regresiones.append(nombre)
+                marca = "  <-- regresión"
+            print(f"{nombre:34} {r['min_ms']:9.2f} {r['mediana_ms']:11.2f} {b['mediana_ms']:9.2f} {limite:9.2f} "
+                  f"{ratio:6.2f} {r['memoria_pico_mb']:9.2f} {b['memoria_pico_mb']:9.2f}{marca}")
+        else:
+            print(f"{nombre:34} {r['min_ms']:9.2f} {r['mediana_ms']:11.2f} {'-':>9} {'-':>9} {'-':>6} "
+                  f"{r['memoria_pico_mb']:9.2f} {'-':>9}")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks de UYWA-NUTRITION.")
+    parser.add_argument("--salida", default=os.path.join(DIRECTORIO, "resultado.json"), help="JSON con los resultados")
+    parser.add_argument("--base", default=BASE_DEFECTO, help="JSON de la línea base con la que comparar")
+    parser.add_argument("--filtro", help="Solo los casos cuyo nombre contenga este texto")
+    parser.add_argument("--sin-app", action="store_true", help="Omite las páginas de la app (AppTest)")
+    parser.add_argument("--umbral", type=float, default=0.25,
+                        help="Empeoramiento relativo mínimo tolerado (0.25 = 25 %%); se amplía con la dispersión")
+    parser.add_argument("--repeticiones", type=int, help="Repeticiones de cada caso (por defecto, las del caso)")
+    parser.add_argument("--actualizar-base", action="store_true", help="Guarda los resultados como nueva línea base")
+    parser.add_argument("--estricto", action="store_true", help="Termina con código 1 si hay regresiones")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        # El almacén lee UYWA_DB al importarse: la app medida no toca la base real.
+        os.environ["UYWA_DB"] = os.path.join(directorio, "app.sqlite")
+        from benchmarks.casos import casos
+
+        # Los avisos de Streamlit fuera de un servidor solo ensucian la salida.
+        logging.disable(logging.WARNING)
+        resultados = {}
+        for nombre, preparar, repeticiones in casos(directorio, con_app=not args.sin_app):
+            if args.filtro and args.filtro not in nombre:
+                continue
+            resultados[nombre] = medir(preparar(), args.repeticiones or repeticiones)
+            print(f"{nombre}: {resultados[nombre]['mediana_ms']:.2f} ms", file=sys.stderr)
+
+    maquina = entorno()
+    informe = {"fecha": datetime.now().isoformat(timespec="seconds"), **maquina, "casos": resultados}
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    if args.actualizar_base:
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+
+    base = {}
+    if os.path.exists(args.base):
+        with open(args.base, encoding="utf-8") as f:
+            informe_base = json.load(f)
+        base = informe_base["casos"]
+        distintos = [c for c in CAMPOS_MAQUINA if informe_base.get(c) != maquina[c]]
+        if distintos:
+            print("Aviso: la línea base se tomó en otro entorno (" + ", ".join(
+                f"{c}: {informe_base.get(c)} -> {maquina[c]}" for c in distintos
+            ) + "); regenérela con --actualizar-base antes de usar --estricto.", file=sys.stderr)
+    regresiones = comparar(resultados, base, args.umbral)
+    if regresiones:
+        print(f"{len(regresiones)} regresiones: {', '.join(regresiones)}", file=sys.stderr)
+        if args.estricto:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
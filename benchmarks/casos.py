@@ -0,0 +1,148 @@
+"""Casos de benchmark.
+
+Cada caso es `(nombre, preparar, repeticiones)`: `preparar()` hace el
+trabajo que no se mide (datos, base de escenarios, primera ejecución de la
+app) y devuelve la función sin argumentos que sí se mide.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from uywa import curvas as modulo_curvas
+from uywa.almacen import ESQUEMAS, AlmacenEscenarios
+from uywa.comparador import TOP_N, UMBRAL_NOMBRES, VARIABLES_COMPARADOR, figura_distribucion, figura_ranking
+from uywa.curvas import genetica_base, tabla_curvas
+from uywa.kpis import calcular_kpis
+
+RUTA_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+TAMANOS_KPI = {"1": 1, "1k": 1_000, "1M": 1_000_000}
+TAMANOS_COMPARADOR = {"10": 10, "1k": 1_000, "10k": 10_000}
+# Líneas de la genética "completa": un catálogo de casa genética con
+# machos, hembras y mixtos de varias estirpes, día a día.
+LINEAS_COMPLETA = 60
+ESCENARIOS_APP = 1_000
+
+
+def _escenarios(n, semilla=0):
+    """`n` escenarios productivos y económicos sintéticos con el esquema del almacén."""
+    rng = np.random.default_rng(semilla)
+    productivos = pd.DataFrame({
+        c: rng.uniform(0.5, 50_000, n) if t == "REAL" else rng.integers(0, 100_000, n)
+        for c, t in ESQUEMAS["productivo"].items() if t != "TEXT"
+    })
+    productivos["nombre"] = [f"Escenario {i + 1}" for i in range(n)]
+    productivos["linea"] = rng.choice(["Cobb", "Ross"], n)
+    economicos = pd.DataFrame({
+        c: rng.uniform(0.5, 50_000, n) if t == "REAL" else rng.integers(0, 100_000, n)
+        for c, t in ESQUEMAS["economico"].items() if t != "TEXT"
+    })
+    economicos["nombre"] = productivos["nombre"]
+    return productivos, economicos
+
+
+def _poblar(almacen, n):
+    productivos, economicos = _escenarios(n)
+    almacen.guardar_muchos("productivo", productivos)
+    almacen.guardar_muchos("economico", economicos)
+
+
+def _kpis(n):
+    def preparar():
+        rng = np.random.default_rng(0)
+        args = dict(
+            peso_final=rng.uniform(1.5, 3.5, n), consumo_total=rng.uniform(2.5, 6.0, n),
+            aves_ini=rng.integers(1_000, 100_000, n), mortalidad=rng.uniform(0, 15, n),
+            precio_alimento_kg=rng.uniform(0.2, 1.5, n), precio_venta_kg=rng.uniform(0.5, 4.0, n),
+            edad_salida=rng.integers(28, 56, n), edad_inicial=0, peso_inicial=0.04,
+        )
+        return lambda: calcular_kpis(**args)
+    return preparar
+
+
+def genetica_completa(n_lineas=LINEAS_COMPLETA):
+    """Tabla de genética con `n_lineas` líneas y todas las edades de la curva diaria."""
+    base = tabla_curvas(genetica_base())["Cobb"]
+    escala = np.linspace(0.85, 1.15, n_lineas)
+    edades = base["edad"].to_numpy()
+    return pd.DataFrame({
+        "linea": np.repeat([f"Línea {i + 1:02d}" for i in range(n_lineas)], len(edades)),
+        "edad": np.tile(edades, n_lineas),
+        "peso": np.outer(escala, base["peso"]).ravel(),
+        "consumo": np.outer(escala, base["consumo"]).ravel(),
+        "fcr": np.tile(base["fcr"].fillna(0).to_numpy(), n_lineas),
+    })
+
+
+def _curvas(df_genetica):
+    def preparar():
+        def construir():
+            # Sin la memoización por hash: se mide la construcción completa.
+            modulo_curvas._tablas.invalidar()
+            return tabla_curvas(df_genetica)
+        return construir
+    return preparar
+
+
+def _comparador(n, ruta):
+    def preparar():
+        if os.path.exists(ruta):
+            os.remove(ruta)
+        almacen = AlmacenEscenarios(ruta)
+        _poblar(almacen, n)
+        variable = "margen_neto"
+        etiqueta = VARIABLES_COMPARADOR["productivo"][variable]
+
+        def comparar():
+            tabla = almacen.leer("productivo", orden=variable, descendente=True, limite=50)
+            ranking = almacen.leer("productivo", columnas=["id", "nombre", variable], orden=variable,
+                                   descendente=True, limite=TOP_N)
+            todos = almacen.leer("productivo", columnas=[variable] + (["nombre"] if n <= UMBRAL_NOMBRES else []))
+            figuras = (figura_ranking(ranking, variable, etiqueta),
+                       figura_distribucion(todos[variable], etiqueta, todos.get("nombre")))
+            return tabla, [fig.to_json() for fig in figuras]
+        return comparar
+    return preparar
+
+
+def _pagina(pagina):
+    def preparar():
+        from streamlit.testing.v1 import AppTest
+
+        app = AppTest.from_file(RUTA_APP, default_timeout=120)
+        app.run()
+        app.sidebar.radio(key="menu_radio").set_value(pagina).run()
+        if app.exception:
+            raise RuntimeError(f"{pagina}: {app.exception[0].value}")
+        return app.run
+    return preparar
+
+
+def paginas_menu():
+    """Opciones del menú lateral, leídas de la propia app."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(RUTA_APP, default_timeout=120)
+    app.run()
+    return list(app.sidebar.radio(key="menu_radio").options)
+
+
+def casos(directorio, con_app=True):
+    """Todos los casos; las bases de escenarios se crean en `directorio`.
+
+    La app usa la base de `UYWA_DB`, que debe apuntar dentro de `directorio`
+    antes de importar `uywa` (ver `benchmarks/__main__.py`).
+    """
+    lista = [(f"kpis/{etiqueta}", _kpis(n), 50 if n < 1_000_000 else 15) for etiqueta, n in TAMANOS_KPI.items()]
+    lista += [
+        ("curvas/pequena", _curvas(genetica_base()), 50),
+        ("curvas/completa", _curvas(genetica_completa()), 15),
+    ]
+    lista += [
+        (f"comparador/{etiqueta}", _comparador(n, os.path.join(directorio, f"comparador_{etiqueta}.sqlite")), 20)
+        for etiqueta, n in TAMANOS_COMPARADOR.items()
+    ]
+    if con_app:
+        _poblar(AlmacenEscenarios(), ESCENARIOS_APP)
+        lista += [(f"app/{pagina}", _pagina(pagina), 20) for pagina in paginas_menu()]
+    return lista
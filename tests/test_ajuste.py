@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from uywa.ajuste import MIN_EDADES, a_genetica, ajustar, evaluar_modelo, preparar_registros
+
+EDADES = np.arange(0, 50, 7)
+
+
+def _registros(n_lotes, ruido=0.0, semilla=0):
+    rng = np.random.default_rng(semilla)
+    filas = []
+    for i in range(n_lotes):
+        peso = [[rng.uniform(5, 8), rng.uniform(0.04, 0.06), rng.uniform(33, 40)]]
+        consumo = [[rng.uniform(15, 25), rng.uniform(0.04, 0.06), rng.uniform(40, 48)]]
+        filas.append(pd.DataFrame({
+            "linea": "Ross", "lote": str(i), "edad": EDADES,
+            "peso": evaluar_modelo("gompertz", peso, EDADES)[0] * rng.normal(1, ruido, len(EDADES)),
+            "consumo": evaluar_modelo("gompertz", consumo, EDADES)[0] * rng.normal(1, ruido, len(EDADES)),
+        }))
+    return pd.concat(filas, ignore_index=True)
+
+
+def test_ajustes_exactos_convergen():
+    ajustes = ajustar(_registros(300), ("lote",), "gompertz")
+    assert ajustes["convergio"].all()
+    assert (ajustes["estado"] == "convergio").all()
+    assert ajustes["rmse"].max() < 1e-6
+    assert a_genetica(ajustes)["linea"].nunique() == 300
+
+
+@pytest.mark.parametrize("modelo", ["gompertz", "richards"])
+def test_recupera_parametros_con_ruido(modelo):
+    ajustes = ajustar(_registros(50, ruido=0.02, semilla=1), ("lote",), modelo)
+    assert ajustes["convergio"].mean() > 0.5
+    assert ajustes.loc[ajustes["convergio"], "rmse"].median() < 0.1
+
+
+def test_grupos_con_pocos_datos_no_se_ajustan():
+    registros = _registros(3)
+    pocas_edades = registros["edad"].isin(EDADES[:MIN_EDADES - 1]) | (registros["lote"] != "1")
+    ajustes = ajustar(registros[pocas_edades], ("lote",), "gompertz")
+    escasos = ajustes[ajustes["lote"] == "1"]
+    assert (escasos["estado"] == "pocos_datos").all()
+    assert not escasos["convergio"].any() and escasos["A"].isna().all()
+    assert (ajustes.loc[ajustes["lote"] != "1", "estado"] == "convergio").all()
+    assert set(a_genetica(ajustes)["linea"]) == {"Ross · 0 (ajuste)", "Ross · 2 (ajuste)"}
+
+
+def test_a_genetica_sin_grupos_convergidos():
+    ajustes = ajustar(_registros(2), ("lote",), "gompertz").assign(convergio=False)
+    with pytest.raises(ValueError):
+        a_genetica(ajustes)
+
+
+def test_fechas_ilegibles_quedan_sin_fecha():
+    registros = _registros(2).rename(columns={"linea": "Line", "edad": "Age"})
+    registros["Date"] = np.where(registros["lote"] == "0", "2024-05-02", "sin dato")
+    temporadas = preparar_registros(registros)["temporada"]
+    assert set(temporadas) == {"T2", "Sin fecha"}
@@ -0,0 +1,75 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from uywa.almacen import AlmacenEscenarios
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    return str(tmp_path / "escenarios.sqlite")
+
+
+def _escenarios(n, prefijo="e"):
+    return pd.DataFrame({
+        "nombre": [f"{prefijo}{i}" for i in range(n)],
+        "linea": ["Cobb", "Ross"] * (n // 2) + ["Cobb"] * (n % 2),
+        "margen_neto": [float(i) for i in range(n)],
+    })
+
+
+def test_ids_de_guardar_muchos(ruta):
+    almacen = AlmacenEscenarios(ruta)
+    ids = almacen.guardar_muchos("productivo", _escenarios(5))
+    guardados = almacen.leer("productivo", columnas=["id", "nombre"])
+    assert dict(zip(guardados["id"], guardados["nombre"])) == dict(zip(ids, _escenarios(5)["nombre"]))
+    assert almacen.guardar_muchos("productivo", _escenarios(0)) == []
+
+
+def test_ids_tras_borrar_los_ultimos(ruta):
+    # AUTOINCREMENT no reutiliza ids borrados: MAX(id) + 1 daría un id equivocado.
+    almacen = AlmacenEscenarios(ruta)
+    ids = almacen.guardar_muchos("productivo", _escenarios(3))
+    almacen.borrar("productivo", ids[-2:])
+    nuevo = almacen.guardar("productivo", {"nombre": "nuevo"})
+    assert nuevo == ids[-1] + 1
+    assert almacen.leer("productivo", columnas=["nombre"], orden="id")["nombre"].tolist() == ["e0", "nuevo"]
+
+
+def test_ids_con_escritores_concurrentes(ruta):
+    # Cada hilo usa su propia conexión, como otro proceso sobre el mismo archivo.
+    AlmacenEscenarios(ruta).cerrar()
+    resultados = []
+
+    def escribir(k):
+        almacen = AlmacenEscenarios(ruta)
+        for i in range(20):
+            lote = _escenarios(15, prefijo=f"h{k}-{i}-")
+            resultados.append((lote["nombre"].tolist(), almacen.guardar_muchos("productivo", lote)))
+        almacen.cerrar()
+
+    hilos = [threading.Thread(target=escribir, args=(k,)) for k in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    guardados = AlmacenEscenarios(ruta).leer("productivo", columnas=["id", "nombre"]).set_index("id")["nombre"]
+    assert len(guardados) == 4 * 20 * 15
+    for nombres, ids in resultados:
+        assert guardados.loc[ids].tolist() == nombres
+
+
+def test_filtros_orden_y_paginas(ruta):
+    almacen = AlmacenEscenarios(ruta)
+    almacen.guardar_muchos("productivo", _escenarios(10))
+    assert almacen.contar("productivo", linea="Ross") == 5
+    assert almacen.contar("productivo", margen_min=3, margen_max=6) == 4
+    pagina = almacen.leer("productivo", columnas=["nombre"], orden="margen_neto", descendente=True,
+                          limite=3, desplazamiento=3)
+    assert pagina["nombre"].tolist() == ["e6", "e5", "e4"]
+    assert almacen.valores_distintos("productivo", "linea") == ["Cobb", "Ross"]
+    with pytest.raises(ValueError):
+        almacen.leer("productivo", columnas=["nombre; DROP TABLE x"])
+    with pytest.raises(ValueError):
+        almacen.contar("economico", linea="Cobb")
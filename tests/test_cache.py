@@ -0,0 +1,44 @@
+import threading
+import time
+
+import numpy as np
+
+from uywa.cache import CacheLRU, cache, estadisticas
+
+
+def test_lru_por_entradas_y_bytes():
+    lru = CacheLRU("prueba", max_entradas=2, max_bytes=3 * 8_000)
+    for clave in "abc":
+        lru.obtener(clave, lambda: np.zeros(1_000))
+    assert "a" not in lru and len(lru) == 2
+    lru.obtener("b", lambda: None)
+    lru.obtener("d", lambda: np.zeros(2_000))
+    assert "b" in lru and "c" not in lru
+    lru.obtener("grande", lambda: np.zeros(10_000))
+    assert "grande" not in lru and lru.bytes <= lru.max_bytes
+    lru.invalidar()
+    assert len(lru) == 0 and lru.bytes == 0
+
+
+def test_una_sola_construccion_por_clave():
+    lru = CacheLRU("prueba", max_entradas=4)
+    llamadas = []
+
+    def construir():
+        llamadas.append(1)
+        time.sleep(0.05)
+        return object()
+
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(lru.obtener("k", construir))) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert len(llamadas) == 1 and len({id(r) for r in resultados}) == 1
+    assert lru.fallos == 1 and lru.aciertos == 7
+
+
+def test_registro_compartido():
+    assert cache("prueba_registro", 3) is cache("prueba_registro", 99)
+    assert "prueba_registro" in estadisticas()["cache"].tolist()
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from uywa.catalogo import a_genetica, cargar_catalogo, validar_catalogo
+
+
+def _guia(**columnas):
+    base = {"Line": ["Ross"] * 3, "Age": [0, 7, 14], "Weight": [42, 190, 480], "Cum feed": [0, 160, 560]}
+    return pd.DataFrame({**base, **columnas})
+
+
+def test_sexo_en_el_nombre_de_linea():
+    df = validar_catalogo(_guia(Sex=["male", "F", "As-hatched"]).assign(Age=0))
+    assert df["linea"].tolist() == ["Ross Macho", "Ross Hembra", "Ross Mixto"]
+
+
+def test_sexo_vacio_no_agrega_sufijo():
+    df = validar_catalogo(_guia(Sex=["male", np.nan, "  "], Age=[0, 0, 7]))
+    assert df["linea"].tolist() == ["Ross Macho", "Ross", "Ross"]
+    assert not df["linea"].str.contains("nan").any()
+
+
+def test_unidades_y_fcr():
+    df = validar_catalogo(_guia())
+    assert df["peso"].tolist() == pytest.approx([0.042, 0.19, 0.48])
+    assert df["fcr"].iloc[2] == pytest.approx(560 / 480)
+
+
+@pytest.mark.parametrize("cambio, mensaje", [
+    (lambda d: d.drop(columns="Weight"), "peso"),
+    (lambda d: d.assign(Age=[0, 7, 7]), "repetidas"),
+    (lambda d: d.assign(Age=[0, 7.5, 14]), "entero"),
+    (lambda d: d.assign(Weight=[42, "n/d", 480]), "no numéricos"),
+])
+def test_catalogos_invalidos(cambio, mensaje):
+    with pytest.raises(ValueError, match=mensaje):
+        validar_catalogo(cambio(_guia()))
+
+
+def test_carga_memoizada(tmp_path, monkeypatch):
+    monkeypatch.setattr("uywa.catalogo.DIR_CACHE", str(tmp_path))
+    contenido = _guia(Sex=["male", "male", "male"]).to_csv(index=False).encode()
+    catalogo = cargar_catalogo(contenido, "guia.csv")
+    assert cargar_catalogo(contenido, "guia.csv") is catalogo
+    assert catalogo.index.names == ["linea", "edad"]
+    assert a_genetica(catalogo)["linea"].unique().tolist() == ["Ross Macho"]
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from uywa.comparador import MAX_BARRAS, UMBRAL_AGREGADO, UMBRAL_NOMBRES, figura_distribucion, figura_ranking
+
+
+def test_ranking_no_funde_nombres_repetidos():
+    df = pd.DataFrame({"id": [3, 9, 4], "nombre": ["Lote A", "Lote A", "Lote B"], "margen_neto": [5.0, 3.0, -1.0]})
+    barra = figura_ranking(df, "margen_neto", "Margen").data[0]
+    assert list(barra.x) == [1, 2, 3]
+    assert list(barra.y) == [5.0, 3.0, -1.0]
+    assert len(set(barra.hovertext)) == 3
+    assert list(figura_ranking(df, "margen_neto", "Margen").layout.xaxis.ticktext) == ["Lote A", "Lote A", "Lote B"]
+    assert list(barra.marker.color) == ["#19345c", "#19345c", "#c0392b"]
+
+
+def test_ranking_acotado():
+    n = MAX_BARRAS + 50
+    df = pd.DataFrame({"nombre": [f"e{i}" for i in range(n)], "margen_neto": np.arange(n, 0, -1.0)})
+    assert len(figura_ranking(df, "margen_neto", "Margen").data[0].x) == MAX_BARRAS
+
+
+def test_distribucion_se_agrega_sobre_el_umbral():
+    valores = np.random.default_rng(0).normal(size=UMBRAL_AGREGADO + 1)
+    traza = figura_distribucion(valores, "Margen").data[0]
+    assert traza.type == "bar" and len(traza.x) < 1_000
+    nombres = [f"e{i}" for i in range(100)]
+    traza = figura_distribucion(np.r_[np.arange(99.0), np.nan], "Margen", nombres).data[0]
+    assert traza.type == "scattergl" and len(traza.y) == 99
+    assert traza.y[0] == 98.0 and traza.hovertext[0] == "e98"
+    assert UMBRAL_NOMBRES <= UMBRAL_AGREGADO
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from uywa.curvas import (
+    DIA_MAX, PESO_NACIMIENTO, genetica_base, hash_genetica, interpolar_pchip, tabla_curvas, valores_en_edad
+)
+
+
+def _genetica_azar(n_lineas, semilla=0):
+    rng = np.random.default_rng(semilla)
+    filas = []
+    for i in range(n_lineas):
+        n = rng.integers(1, 9)
+        edades = np.sort(rng.choice(np.arange(1, DIA_MAX + 1), n, replace=False)).astype(float)
+        filas.append(pd.DataFrame({
+            "linea": f"L{i:03d}", "edad": edades, "peso": np.sort(rng.uniform(0.1, 4, n)),
+            "consumo": np.sort(rng.uniform(0.1, 7, n)), "fcr": 1.0,
+        }))
+    return pd.concat(filas, ignore_index=True)
+
+
+def test_coincide_con_el_pchip_por_linea():
+    genetica = _genetica_azar(200)
+    tabla = tabla_curvas(genetica)
+    assert list(tabla) == sorted(genetica["linea"].unique())
+    for linea, puntos in genetica.groupby("linea"):
+        edades = np.concatenate([[0.0], puntos["edad"]])
+        dias = np.arange(int(edades[-1]) + 1)
+        for variable, inicial in (("peso", PESO_NACIMIENTO), ("consumo", 0.0)):
+            esperado = interpolar_pchip(edades, np.concatenate([[inicial], puntos[variable]]), dias)
+            np.testing.assert_allclose(tabla[linea][variable].to_numpy(), esperado, rtol=1e-12)
+
+
+def test_casos_borde():
+    genetica = pd.DataFrame({
+        "linea": ["A", "A", "A", "B", "C", "C"],
+        "edad": [7, 7, 14, 0, 28, 90],
+        "peso": [0.2, 0.4, 0.5, 0.05, 1.4, 6.0],
+        "consumo": [0.2, 0.2, 0.6, 0.0, 2.0, 9.0],
+        "fcr": 1.0,
+    })
+    tabla = tabla_curvas(genetica)
+    # Edades repetidas se promedian y la edad 0 se completa con el nacimiento.
+    assert tabla["A"].at[7, "peso"] == pytest.approx(0.3)
+    assert tabla["A"].at[0, "peso"] == PESO_NACIMIENTO
+    assert tabla["A"].index.tolist() == list(range(15))
+    # Una línea con un solo punto en la edad 0 tiene un solo día.
+    assert tabla["B"]["edad"].tolist() == [0]
+    # Las edades posteriores a DIA_MAX no cuentan.
+    assert tabla["C"].index[-1] == 28
+
+
+def test_curvas_monotonas_y_derivadas():
+    tabla = tabla_curvas(genetica_base())
+    for curva in tabla.values():
+        assert (np.diff(curva["peso"]) > 0).all() and (np.diff(curva["consumo"]) >= 0).all()
+        np.testing.assert_allclose(curva["fcr"].iloc[1:], (curva["consumo"] / curva["peso"]).iloc[1:])
+    assert valores_en_edad(tabla, "peso", ["Cobb", "Hubbard", "Ross"], [42, 42, 80]).tolist()[0] == pytest.approx(2.5)
+    assert np.isnan(valores_en_edad(tabla, "peso", ["Hubbard", "Ross"], [42, 80])).all()
+
+
+def test_hash_ignora_el_indice():
+    genetica = genetica_base()
+    assert hash_genetica(genetica) == hash_genetica(genetica.set_axis(range(10, 10 + len(genetica))))
+    assert hash_genetica(genetica) != hash_genetica(genetica.assign(peso=genetica["peso"] * 1.01))
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from uywa.dietas import (
+    FASES, NUTRIENTES, ProblemaDieta, formular, ingredientes_base, preparar_ingredientes, problema_fase,
+    requisitos_base
+)
+
+
+def _problema(ingredientes, requisitos, fase):
+    # Sin la caché compartida: cada prueba arranca de una base fría.
+    ingredientes = preparar_ingredientes(ingredientes)
+    req = requisitos[requisitos["fase"] == fase].reset_index(drop=True)
+    return ProblemaDieta(
+        ingredientes[list(NUTRIENTES)].to_numpy(dtype=float).T,
+        ingredientes["min_inclusion"].to_numpy(dtype=float),
+        ingredientes["max_inclusion"].to_numpy(dtype=float), req
+    )
+
+
+def _precios(ingredientes, n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return ingredientes["precio_kg"].to_numpy(dtype=float) * rng.uniform(0.5, 1.5, (n, len(ingredientes)))
+
+
+def _factible(ingredientes, requisitos, fase, mezcla, tol=1e-7):
+    req = requisitos[requisitos["fase"] == fase]
+    nivel = ingredientes.set_index("ingrediente")[list(NUTRIENTES)].T.to_numpy() @ mezcla
+    nivel = dict(zip(NUTRIENTES, nivel))
+    assert mezcla.sum() == pytest.approx(1.0, abs=tol)
+    assert (mezcla >= ingredientes["min_inclusion"].to_numpy() - tol).all()
+    assert (mezcla <= ingredientes["max_inclusion"].to_numpy() + tol).all()
+    for _, r in req.iterrows():
+        if pd.notna(r["minimo"]):
+            assert nivel[r["nutriente"]] >= r["minimo"] - tol * max(1.0, abs(r["minimo"]))
+        if pd.notna(r["maximo"]):
+            assert nivel[r["nutriente"]] <= r["maximo"] + tol * max(1.0, abs(r["maximo"]))
+
+
+@pytest.mark.parametrize("fase", list(FASES))
+def test_lote_coincide_con_resolver(fase):
+    ingredientes, requisitos = ingredientes_base(), requisitos_base()
+    precios = _precios(ingredientes, 300)
+    costos, mezclas = _problema(ingredientes, requisitos, fase).resolver_lote(precios)
+    individual = _problema(ingredientes, requisitos, fase)
+    esperados = np.array([individual.resolver(p) @ p for p in precios])
+    np.testing.assert_allclose(costos, esperados, rtol=1e-9, atol=1e-12)
+    for mezcla in mezclas[::25]:
+        _factible(ingredientes, requisitos, fase, mezcla)
+
+
+@pytest.mark.parametrize("fase", list(FASES))
+def test_lote_coincide_con_linprog(fase):
+    optimize = pytest.importorskip("scipy.optimize")
+    ingredientes, requisitos = ingredientes_base(), requisitos_base()
+    problema = _problema(ingredientes, requisitos, fase)
+    precios = _precios(ingredientes, 50, semilla=1)
+    costos, _ = problema.resolver_lote(precios)
+    n = len(ingredientes)
+    for p, costo in zip(precios, costos):
+        res = optimize.linprog(
+            np.concatenate([p, np.zeros(problema.A.shape[1] - n)]), A_eq=problema.A, b_eq=problema.b,
+            bounds=(0, None), method="highs"
+        )
+        assert res.status == 0
+        assert costo == pytest.approx(res.fun, rel=1e-7)
+
+
+def test_fase_infactible():
+    requisitos = requisitos_base()
+    requisitos.loc[(requisitos["fase"] == "inicio") & (requisitos["nutriente"] == "proteina"), "minimo"] = 80.0
+    with pytest.raises(ValueError):
+        formular(ingredientes_base(), requisitos)
+    with pytest.raises(ValueError):
+        _problema(ingredientes_base(), requisitos, "inicio")
+
+
+def test_fase_degenerada():
+    # Un ingrediente repetido y un calcio fijo (mínimo = máximo) dejan bases degeneradas.
+    ingredientes = pd.concat([ingredientes_base(), ingredientes_base().iloc[[0]]], ignore_index=True)
+    ingredientes.loc[len(ingredientes) - 1, "ingrediente"] = "Maíz (lote 2)"
+    requisitos = requisitos_base()
+    calcio = (requisitos["fase"] == "crecimiento") & (requisitos["nutriente"] == "calcio")
+    requisitos.loc[calcio, "maximo"] = requisitos.loc[calcio, "minimo"]
+    precios = _precios(ingredientes, 200, semilla=2)
+    precios[:, -1] = precios[:, 0]
+    costos, mezclas = _problema(ingredientes, requisitos, "crecimiento").resolver_lote(precios)
+    individual = _problema(ingredientes, requisitos, "crecimiento")
+    esperados = np.array([individual.resolver(p) @ p for p in precios])
+    np.testing.assert_allclose(costos, esperados, rtol=1e-9, atol=1e-12)
+    for mezcla in mezclas[::20]:
+        _factible(ingredientes, requisitos, "crecimiento", mezcla)
+
+
+def test_celdas_vacias_no_cuelgan_el_barrido():
+    ingredientes = ingredientes_base()
+    fila = ingredientes.iloc[[3]].copy()
+    fila["ingrediente"] = "Nuevo"
+    fila[["max_inclusion", "lisina", "calcio"]] = np.nan
+    ingredientes = pd.concat([ingredientes, fila], ignore_index=True)
+    preparados = preparar_ingredientes(ingredientes)
+    assert np.isfinite(preparados.drop(columns="ingrediente").to_numpy(dtype=float)).all()
+    precios = _precios(preparados, 100, semilla=3)
+    costos, _ = problema_fase(ingredientes, requisitos_base(), "finalizador").resolver_lote(precios)
+    assert np.isfinite(costos).all()
+
+
+def test_precios_no_finitos_quedan_en_nan():
+    ingredientes = ingredientes_base()
+    precios = _precios(ingredientes, 10, semilla=4)
+    precios[3, 0] = np.nan
+    precios[7, 2] = np.inf
+    costos, mezclas = _problema(ingredientes, requisitos_base(), "inicio").resolver_lote(precios)
+    assert np.isnan(costos[[3, 7]]).all() and np.isnan(mezclas[[3, 7]]).all()
+    assert np.isfinite(np.delete(costos, [3, 7])).all()
+
+
+def test_coeficientes_no_numericos():
+    ingredientes = ingredientes_base().astype({"proteina": object})
+    ingredientes.loc[1, "proteina"] = "alto"
+    with pytest.raises(ValueError, match="Torta de soya"):
+        preparar_ingredientes(ingredientes)
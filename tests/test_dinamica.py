@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from uywa.curvas import DIA_MAX, genetica_base, tabla_curvas
+from uywa.dinamica import alimento_por_edad_salida, pesos_mortalidad, simular_dinamica, simular_por_linea
+
+
+def _curvas_base():
+    cobb = tabla_curvas(genetica_base())["Cobb"]
+    return cobb["peso"].to_numpy(), cobb["consumo"].to_numpy()
+
+
+@pytest.mark.parametrize("edad_salida", [3, 7, 8, 42, 49])
+def test_pesos_mortalidad_suman_uno(edad_salida):
+    w = pesos_mortalidad(0, edad_salida)
+    assert w.sum() == pytest.approx(1.0)
+    assert w[0, 0] == 0.0 and (w[0, edad_salida + 1:] == 0).all()
+
+
+def test_pesos_mortalidad_con_argumentos_escalares_y_vectores():
+    w = pesos_mortalidad(0, np.array([5, 7, 8, 42]), 0.4)
+    assert w.shape == (4, DIA_MAX + 1)
+    np.testing.assert_allclose(w.sum(axis=1), 1.0)
+    # Más de 7 días: la primera semana se lleva la fracción indicada.
+    assert w[3, 1:8].sum() == pytest.approx(0.4)
+    w = pesos_mortalidad(np.array([0, 2]), 42, np.array([0.3, 0.5]))
+    assert w[0, 1:8].sum() == pytest.approx(0.3) and w[1, 3:10].sum() == pytest.approx(0.5)
+
+
+def test_balance_de_aves_y_alimento():
+    peso, consumo = _curvas_base()
+    r = simular_dinamica(peso, consumo, [10_000, 20_000], [5.0, 8.0], 0, [42, 35], 0.5)
+    aves = np.array([10_000, 20_000])
+    bajas = aves * np.array([0.05, 0.08])
+    np.testing.assert_allclose(r["muertes"].sum(axis=1), bajas)
+    np.testing.assert_allclose(r["aves_finales"], aves - bajas)
+    np.testing.assert_allclose(r["alimento_dia"].sum(axis=1), r["alimento_total"])
+    np.testing.assert_allclose(r["costo_alim"], 0.5 * r["alimento_total"])
+    # Las aves vivas comen menos que el lote completo y más que las finales.
+    fin = np.array([42, 35])
+    assert (r["alimento_total"] < consumo[fin] * aves).all()
+    assert (r["alimento_total"] > consumo[fin] * (aves - bajas)).all()
+    assert (r["vivos"][0, 43:] == 0).all() and (r["alimento_dia"][1, 36:] == 0).all()
+
+
+def test_tamanos_de_lote_salen_de_todos_los_argumentos():
+    peso, consumo = _curvas_base()
+    r = simular_dinamica(peso, consumo, 1_000, 5.0, np.array([0, 1, 2]), 42, 0.5,
+                         peso_final=np.array([2.5, 2.6, 2.7]))
+    assert r["biomasa_final"] == pytest.approx(950 * np.array([2.5, 2.6, 2.7]))
+    r = simular_dinamica(peso, consumo, 1_000, 5.0, 0, 42, 0.5, fraccion_primera_semana=np.array([0.2, 0.6]))
+    assert r["vivos"].shape[0] == 2
+    with pytest.raises(ValueError):
+        simular_dinamica(peso, consumo, np.ones(3), 5.0, 0, np.array([40, 42]), 0.5)
+
+
+def test_lineas_desconocidas_quedan_en_nan():
+    r = simular_por_linea(tabla_curvas(genetica_base()), ["Cobb", "Hubbard"], 1_000, 5.0, 0, 42, 0.5)
+    assert np.isfinite(r["alimento_total"][0]) and np.isnan(r["alimento_total"][1])
+
+
+def test_alimento_por_edad_salida_crece_con_la_edad():
+    cobb = tabla_curvas(genetica_base())["Cobb"]
+    alimento = alimento_por_edad_salida(cobb, 10_000, 5.0, edad_inicial=10)
+    assert np.isnan(alimento[:11]).all()
+    assert (np.diff(alimento[11:]) > 0).all()
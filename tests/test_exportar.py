@@ -0,0 +1,79 @@
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from uywa import exportar as modulo_exportar
+from uywa.exportar import Exportacion, bloques, bloques_grilla, exportar
+
+
+def _tabla(n=120):
+    return pd.DataFrame({
+        "nombre": [f"e{i}" for i in range(n)],
+        "margen": np.linspace(-1, 1, n),
+        "nota": [None if i % 7 == 0 else "ok" for i in range(n)],
+    })
+
+
+def _leer(ruta, **kwargs):
+    if ruta.endswith(".csv"):
+        return pd.read_csv(ruta)
+    if ruta.endswith(".parquet"):
+        return pd.read_parquet(ruta)
+    return pd.read_excel(ruta, **kwargs)
+
+
+@pytest.mark.parametrize("formato", ["csv", "parquet", "xlsx"])
+def test_ida_y_vuelta_por_bloques(tmp_path, formato):
+    ruta = str(tmp_path / f"datos.{formato}")
+    filas = exportar({"Datos": bloques(_tabla(), 25)}, ruta)
+    assert filas == 120
+    leida = _leer(ruta)
+    assert leida["nombre"].tolist() == _tabla()["nombre"].tolist()
+    np.testing.assert_allclose(leida["margen"], _tabla()["margen"])
+    assert leida["nota"].isna().sum() == _tabla()["nota"].isna().sum()
+
+
+def test_varias_tablas(tmp_path):
+    tablas = {"Resumen": _tabla(3), "Detalle": _tabla(50)}
+    ruta = str(tmp_path / "libro.xlsx")
+    exportar(tablas, ruta)
+    assert list(pd.read_excel(ruta, sheet_name=None)) == ["Resumen", "Detalle"]
+    with pytest.raises(ValueError, match="zip"):
+        exportar(tablas, str(tmp_path / "datos.csv"))
+    ruta = str(tmp_path / "datos.csv.zip")
+    assert exportar(tablas, ruta) == 53
+    with zipfile.ZipFile(ruta) as zf:
+        assert sorted(zf.namelist()) == ["Detalle.csv", "Resumen.csv"]
+
+
+def test_hojas_de_excel_se_parten(tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo_exportar, "MAX_FILAS_HOJA", 40)
+    ruta = str(tmp_path / "largo.xlsx")
+    exportar({"Escenarios": bloques(_tabla(), 30)}, ruta)
+    hojas = pd.read_excel(ruta, sheet_name=None)
+    assert list(hojas) == ["Escenarios", "Escenarios (2)", "Escenarios (3)"]
+    assert pd.concat(hojas.values())["nombre"].tolist() == _tabla()["nombre"].tolist()
+
+
+def test_grilla_en_formato_largo():
+    coordenadas = {"precio_venta_kg": np.array([1.8, 2.0]), "mortalidad": np.array([3.0, 5.0, 8.0])}
+    margen = np.arange(6, dtype=float).reshape(2, 3)
+    tabla = pd.concat(bloques_grilla(coordenadas, margen, tam_bloque=4), ignore_index=True)
+    assert tabla.shape == (6, 3)
+    fila = tabla.iloc[4]
+    assert (fila["precio_venta_kg"], fila["mortalidad"], fila["margen_neto"]) == (2.0, 5.0, 4.0)
+
+
+def test_exportacion_en_segundo_plano(tmp_path):
+    exportacion = Exportacion({"Datos": _tabla()}, "datos", "csv", total=120, directorio=str(tmp_path))
+    limite = time.time() + 30
+    while not exportacion.listo() and time.time() < limite:
+        time.sleep(0.05)
+    assert exportacion.error() is None and exportacion.progreso() == 1.0
+    assert exportacion.nombre_archivo == "datos.csv"
+    assert exportacion.contenido().decode().startswith("nombre,margen,nota")
+    exportacion.descartar()
+    assert exportacion.tamano_mb() == 0.0
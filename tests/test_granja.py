@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from uywa.curvas import genetica_base, tabla_curvas
+from uywa.granja import ciclos_portafolio, galpones_ejemplo, simular_portafolio, trayectoria_precios
+
+INICIO, FIN = "2024-01-01", "2024-06-30"
+
+
+def _precios():
+    anclas = pd.DataFrame({"fecha": [INICIO], "precio_venta_kg": [2.0], "precio_alimento_kg": [0.5]})
+    return trayectoria_precios(anclas, pd.date_range(INICIO, FIN, freq="D"))
+
+
+@pytest.mark.parametrize("dias_antes", [1, 42, 50, 55, 56, 120])
+def test_colocacion_anterior_al_inicio(dias_antes):
+    galpones = galpones_ejemplo(3, INICIO, ["Cobb", "Ross"])
+    galpones.loc[0, "primera_colocacion"] = pd.Timestamp(INICIO) - pd.Timedelta(days=dias_antes)
+    ciclos, diario = simular_portafolio(galpones, tabla_curvas(genetica_base()), _precios(), INICIO, FIN)
+    assert (ciclos["dia_salida"] >= 0).all()
+    vendidos = ciclos[ciclos["dia_salida"] < len(diario)]
+    assert diario["ingresos"].sum() == pytest.approx(vendidos["ingreso_bruto"].sum())
+    assert diario["carne_kg"].sum() == pytest.approx(vendidos["prod_total"].sum())
+    colocados = ciclos[ciclos["dia_colocacion"] >= 0]
+    esperado = (colocados["aves_ini"] * colocados["otros_costos"]).sum()
+    assert diario["otros_costos"].sum() == pytest.approx(esperado)
+
+
+def test_ciclo_en_curso_al_inicio_se_conserva():
+    galpones = galpones_ejemplo(1, INICIO, ["Cobb"])
+    galpones.loc[0, "primera_colocacion"] = pd.Timestamp(INICIO) - pd.Timedelta(days=20)
+    ciclos = ciclos_portafolio(galpones, INICIO, FIN)
+    assert ciclos["dia_colocacion"].iloc[0] == -20
+    assert ciclos["dia_salida"].iloc[0] == 22
+    assert np.diff(ciclos["dia_colocacion"]).tolist() == [56] * (len(ciclos) - 1)
+
+
+def test_edad_de_salida_fuera_de_la_curva():
+    galpones = galpones_ejemplo(2, INICIO, ["Cobb", "Ross"])
+    galpones.loc[1, "edad_salida"] = 56
+    with pytest.raises(ValueError, match="G002"):
+        simular_portafolio(galpones, tabla_curvas(genetica_base()), _precios(), INICIO, FIN)
+    galpones.loc[1, "edad_salida"] = 49
+    ciclos, _ = simular_portafolio(galpones, tabla_curvas(genetica_base()), _precios(), INICIO, FIN)
+    assert ciclos[["prod_total", "margen_neto"]].notna().all().all()
+
+
+def test_linea_desconocida():
+    galpones = galpones_ejemplo(1, INICIO, ["Hubbard"])
+    with pytest.raises(ValueError, match="Hubbard"):
+        simular_portafolio(galpones, tabla_curvas(genetica_base()), _precios(), INICIO, FIN)
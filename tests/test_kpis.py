@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from uywa.kpis import calcular_kpis, kpis_dataframe, margen_neto
+
+BASE = dict(peso_final=2.5, consumo_total=4.3, aves_ini=10_000, mortalidad=5.0,
+            precio_alimento_kg=0.5, precio_venta_kg=2.0)
+
+
+def test_valores_de_un_lote():
+    kpis = calcular_kpis(**BASE, edad_salida=42, peso_inicial=0.04)
+    assert kpis["aves_finales"] == pytest.approx(9_500)
+    assert kpis["prod_total"] == pytest.approx(23_750)
+    assert kpis["costo_alim"] == pytest.approx(21_500)
+    assert kpis["margen_neto"] == pytest.approx(47_500 - 21_500)
+    assert kpis["fcr"] == pytest.approx(4.3 / 2.5)
+    assert kpis["gdp"] == pytest.approx((2.5 - 0.04) / 42)
+    assert kpis["iep"] == pytest.approx(2.5 * 0.95 * 100 / (42 * 4.3 / 2.5))
+    assert kpis["margen_neto"] == pytest.approx(margen_neto(**BASE))
+
+
+def test_guardas_de_division():
+    kpis = calcular_kpis(
+        peso_final=[0.0, 2.5, 2.5], consumo_total=[1.0, 4.3, 0.0], aves_ini=[100, 0, 100],
+        mortalidad=[0, 0, 100], precio_alimento_kg=0.0, precio_venta_kg=2.0,
+        edad_salida=[42, 0, 42], edad_inicial=[0, 0, 42], otros_costos=0.0
+    )
+    assert np.isnan(kpis["fcr"][0]) and kpis["fcr"][2] == 0.0
+    # Sin días de crianza, sin aves o sin costo, los cocientes valen 0.
+    assert kpis["gdp"][1] == 0.0 and kpis["gdp"][2] == 0.0
+    assert kpis["consumo_diario"][1] == 0.0
+    assert kpis["margen_ave"][1] == 0.0 and kpis["margen_ave"][2] == 0.0
+    assert (kpis["rentabilidad"] == 0.0).all()
+    assert kpis["iep"][0] == 0.0 and kpis["iep"][2] == 0.0
+    assert np.isfinite(np.concatenate([v for k, v in kpis.items() if k != "fcr"])).all()
+
+
+def test_alimento_integrado_reemplaza_al_consumo():
+    kpis = calcular_kpis(**BASE, alimento_total=40_000)
+    assert kpis["costo_alim"] == pytest.approx(20_000)
+    assert kpis["fcr"] == pytest.approx(4.3 / 2.5)
+
+
+def test_kpis_dataframe():
+    df = pd.DataFrame({k: [v, v] for k, v in BASE.items()}, index=[10, 11])
+    df["edad_salida"] = [35, 42]
+    resultado = kpis_dataframe(df)
+    assert resultado.index.tolist() == [10, 11]
+    assert resultado["gdp"].iloc[0] > resultado["gdp"].iloc[1]
+    assert "gdp" not in kpis_dataframe(df.drop(columns="edad_salida"))
+    with pytest.raises(KeyError, match="precio_venta_kg"):
+        kpis_dataframe(df.drop(columns="precio_venta_kg"))
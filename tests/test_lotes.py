@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from uywa.curvas import genetica_base, tabla_curvas
+from uywa.lotes import leer_bloques, main, procesar_archivo, puntuar_bloque
+
+
+def _lotes(n=250, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "lote": np.arange(n),
+        "linea": rng.choice(["Cobb", "Ross"], n),
+        "edad_salida": rng.integers(35, 50, n),
+        "aves_ini": rng.integers(5_000, 30_000, n),
+        "mortalidad": rng.uniform(2, 8, n),
+        "precio_alimento_kg": rng.uniform(0.4, 0.6, n),
+        "precio_venta_kg": rng.uniform(1.8, 2.4, n),
+    })
+
+
+@pytest.mark.parametrize("salida", ["kpis.csv", "kpis.parquet", "kpis.xlsx"])
+def test_ida_y_vuelta_por_la_linea_de_comandos(tmp_path, salida):
+    entrada = tmp_path / "lotes.csv"
+    _lotes().to_csv(entrada, index=False)
+    main([str(entrada), str(tmp_path / salida), "--tam-bloque", "60", "--procesos", "1"])
+    resultado = pd.read_csv(tmp_path / salida) if salida.endswith(".csv") else (
+        pd.read_parquet(tmp_path / salida) if salida.endswith(".parquet") else pd.read_excel(tmp_path / salida))
+    esperado = puntuar_bloque(_lotes(), tabla_curvas(genetica_base()))
+    assert resultado["lote"].tolist() == list(range(250))
+    np.testing.assert_allclose(resultado["margen_neto"], esperado["margen_neto"], rtol=1e-9)
+    np.testing.assert_allclose(resultado["fcr"], esperado["fcr"], rtol=1e-9)
+
+
+def test_pool_de_procesos_conserva_el_orden(tmp_path):
+    entrada = tmp_path / "lotes.parquet"
+    _lotes(400, semilla=1).to_parquet(entrada)
+    assert procesar_archivo(str(entrada), str(tmp_path / "uno.csv"), tam_bloque=50, procesos=1) == 400
+    assert procesar_archivo(str(entrada), str(tmp_path / "dos.csv"), tam_bloque=50, procesos=2) == 400
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "uno.csv"), pd.read_csv(tmp_path / "dos.csv"))
+
+
+def test_completa_peso_y_consumo_con_la_curva():
+    lotes = _lotes(4).assign(peso_final=[2.0, np.nan, 2.2, np.nan])
+    resultado = puntuar_bloque(lotes, tabla_curvas(genetica_base()))
+    assert resultado["peso_final"].notna().all()
+    assert resultado["peso_final"].iloc[0] == 2.0
+    with pytest.raises(KeyError, match="aves_ini"):
+        puntuar_bloque(lotes.drop(columns="aves_ini"), tabla_curvas(genetica_base()))
+
+
+def test_xlsx_por_bloques(tmp_path):
+    ruta = tmp_path / "lotes.xlsx"
+    _lotes(25).to_excel(ruta, index=False, sheet_name="Lotes")
+    bloques = list(leer_bloques(str(ruta), tam_bloque=10, hoja="Lotes"))
+    assert [len(b) for b in bloques] == [10, 10, 5]
+    assert list(bloques[0].columns) == list(_lotes(1).columns)
+
+
+def test_hoja_xlsx_vacia(tmp_path):
+    from openpyxl import Workbook
+
+    libro = Workbook()
+    libro.active.title = "Lotes"
+    libro.save(tmp_path / "vacio.xlsx")
+    with pytest.raises(ValueError, match="Lotes"):
+        list(leer_bloques(str(tmp_path / "vacio.xlsx")))
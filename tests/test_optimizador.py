@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from uywa.curvas import genetica_base, tabla_curvas
+from uywa.optimizador import EDAD_MIN_SALIDA, edad_optima, evaluar_edades, optimizar_lote
+
+COBB = tabla_curvas(genetica_base())["Cobb"]
+
+
+def test_edad_optima_coincide_con_la_tabla():
+    tabla, optimos = edad_optima(COBB, 2.0, 0.5, 10_000, 5.0, dias_vacio=14)
+    assert tabla["edad"].iloc[0] == EDAD_MIN_SALIDA and tabla["edad"].iloc[-1] == COBB.index[-1]
+    for objetivo, (edad, valor) in optimos.items():
+        assert valor == pytest.approx(tabla[objetivo].max())
+        assert tabla.loc[tabla["edad"] == edad, objetivo].iloc[0] == pytest.approx(valor)
+    np.testing.assert_allclose(tabla["margen_dia"], tabla["margen_neto"] / (tabla["edad"] + 14))
+
+
+def test_edades_factibles():
+    kpis = evaluar_edades(COBB, 2.0, 0.5, 10_000, 5.0, edad_inicial=30)
+    assert kpis["edad"][0] == 31
+    with pytest.raises(ValueError):
+        evaluar_edades(COBB, 2.0, 0.5, 10_000, 5.0, edad_min=COBB.index[-1] + 1)
+
+
+def test_lote_por_bloques_e_hilos_coincide_con_un_escenario():
+    rng = np.random.default_rng(0)
+    pv, pa = rng.uniform(1.6, 2.6, 101), rng.uniform(0.35, 0.65, 101)
+    uno = optimizar_lote(COBB, pv, pa, 10_000, 5.0, tam_bloque=1_000, n_hilos=1)
+    varios = optimizar_lote(COBB, pv, pa, 10_000, 5.0, tam_bloque=7, n_hilos=3)
+    assert uno.equals(varios)
+    _, optimos = edad_optima(COBB, pv[5], pa[5], 10_000, 5.0)
+    assert uno["edad_optima"].iat[5] == optimos["margen_neto"][0]
+    with pytest.raises(ValueError):
+        optimizar_lote(COBB, pv, pa, 10_000, 5.0, objetivo="ganancia")
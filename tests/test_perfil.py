@@ -0,0 +1,49 @@
+import json
+
+from uywa.perfil import Perfil, leer_log
+
+
+def _registrar(ruta, n, inicio=0):
+    for i in range(inicio, inicio + n):
+        perfil = Perfil(f"ejecucion {i}", activo=True)
+        with perfil.seccion("a"):
+            pass
+        with perfil.seccion("b"):
+            pass
+        perfil.guardar(str(ruta))
+
+
+def test_perfil_inactivo_no_registra():
+    perfil = Perfil("x", activo=False)
+    with perfil.seccion("a"):
+        pass
+    assert perfil.registro()["secciones"] == []
+
+
+def test_lee_solo_las_ultimas_ejecuciones(tmp_path):
+    ruta = tmp_path / "perfil.jsonl"
+    assert leer_log(str(ruta)).empty
+    _registrar(ruta, 50)
+    log = leer_log(str(ruta), max_ejecuciones=10)
+    assert len(log) == 20
+    assert log["ejecucion"].iloc[0] == "ejecucion 40" and log["ejecucion"].iloc[-1] == "ejecucion 49"
+
+
+def test_omite_lineas_ilegibles(tmp_path):
+    ruta = tmp_path / "perfil.jsonl"
+    _registrar(ruta, 2)
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write('{"fecha": "2024-01-01", "ejecuc\n')
+        f.write(json.dumps([1, 2]) + "\n")
+        f.write(json.dumps({"fecha": "x"}) + "\n")
+    _registrar(ruta, 1, inicio=2)
+    assert leer_log(str(ruta))["ejecucion"].unique().tolist() == ["ejecucion 0", "ejecucion 1", "ejecucion 2"]
+
+
+def test_se_relee_cuando_cambia_el_archivo(tmp_path):
+    ruta = tmp_path / "perfil.jsonl"
+    _registrar(ruta, 1)
+    primero = leer_log(str(ruta))
+    assert leer_log(str(ruta)) is primero
+    _registrar(ruta, 1, inicio=1)
+    assert len(leer_log(str(ruta))) == 4
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from uywa.kpis import margen_neto
+from uywa.riesgo import distribucion, reagrupar_histograma, simular_margen
+
+BASE = dict(precio_venta_kg=2.0, peso_final=2.5, precio_alimento_kg=0.5, mortalidad=5.0)
+
+
+def _distribuciones(tipo, variacion):
+    return {k: distribucion(tipo, v, variacion * v) for k, v in BASE.items()}
+
+
+def test_distribucion_fija():
+    assert distribucion("Normal", 2.0, 0.0)["tipo"] == "Fija"
+    with pytest.raises(ValueError):
+        distribucion("Lognormal", 2.0, 0.1)
+    r = simular_margen(_distribuciones("Fija", 0), 4.3, 10_000, n_sorteos=1_000)
+    esperado = float(margen_neto(consumo_total=4.3, aves_ini=10_000, **BASE))
+    assert r["min"] == pytest.approx(esperado) and r["max"] == pytest.approx(esperado)
+    assert r["desv"] == pytest.approx(0.0, abs=1e-6) and r["prob_perdida"] == 0.0
+
+
+@pytest.mark.parametrize("tipo", ["Normal", "Uniforme", "Triangular"])
+def test_bloques_reproducibles_y_percentiles_ordenados(tipo):
+    d = _distribuciones(tipo, 0.1)
+    a = simular_margen(d, 4.3, 10_000, n_sorteos=50_000, semilla=3, tam_bloque=7_000)
+    b = simular_margen(d, 4.3, 10_000, n_sorteos=50_000, semilla=3, tam_bloque=7_000)
+    assert a["p50"] == b["p50"] and (a["conteos"] == b["conteos"]).all()
+    assert a["conteos"].sum() == 50_000
+    assert a["min"] <= a["p5"] <= a["p50"] <= a["p95"] <= a["max"]
+    assert 0.0 <= a["prob_perdida"] <= 1.0
+
+
+def test_faltan_distribuciones():
+    d = _distribuciones("Normal", 0.1)
+    del d["mortalidad"]
+    with pytest.raises(KeyError, match="mortalidad"):
+        simular_margen(d, 4.3, 10_000, n_sorteos=10)
+
+
+def test_reagrupar_histograma_conserva_conteos():
+    r = simular_margen(_distribuciones("Normal", 0.1), 4.3, 10_000, n_sorteos=20_000)
+    centros, anchos, conteos = reagrupar_histograma(r["bordes"], r["conteos"], n_barras=40)
+    assert len(centros) == len(anchos) == len(conteos) <= 40
+    assert conteos.sum() == 20_000
+    assert (np.diff(centros) > 0).all()
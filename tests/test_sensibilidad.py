@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from uywa.kpis import margen_neto
+from uywa.sensibilidad import MAX_PUNTOS_GRILLA, barrido, grilla_margen, tornado
+
+BASE = dict(precio_venta_kg=2.0, precio_alimento_kg=0.5, peso_final=2.5, consumo_total=4.3,
+            mortalidad=5.0, aves_ini=10_000, otros_costos=0.3)
+
+
+def test_grilla_coincide_con_barridos():
+    ejes = [("precio_venta_kg", 1.5, 2.5, 11), ("mortalidad", 2.0, 10.0, 5)]
+    coordenadas, margen = grilla_margen(BASE, ejes)
+    assert margen.shape == (11, 5) and margen.dtype == np.float32
+    assert not margen.flags.writeable
+    for j, m in enumerate(coordenadas["mortalidad"]):
+        esperado = barrido(dict(BASE, mortalidad=m), "precio_venta_kg", coordenadas["precio_venta_kg"])
+        np.testing.assert_allclose(margen[:, j], esperado, rtol=1e-5)
+
+
+def test_grilla_ignora_la_base_de_los_ejes():
+    ejes = [("precio_venta_kg", 1.5, 2.5, 11)]
+    _, a = grilla_margen(BASE, ejes)
+    _, b = grilla_margen(dict(BASE, precio_venta_kg=9.9), ejes)
+    assert a is b
+    with pytest.raises(ValueError):
+        grilla_margen(BASE, [("precio_venta_kg", 1, 2, MAX_PUNTOS_GRILLA + 1)])
+
+
+def test_tornado():
+    df = tornado(BASE, 10.0)
+    assert (np.diff(df["impacto"]) <= 0).all()
+    fila = df.set_index("variable").loc["precio_venta_kg"]
+    assert fila["margen_alto"] == pytest.approx(margen_neto(**dict(BASE, precio_venta_kg=2.2)))
+    assert fila["delta_alto"] > 0 > fila["delta_bajo"]
@@ -0,0 +1 @@
+"""Motor de cálculo de UYWA-NUTRITION, importable sin Streamlit."""
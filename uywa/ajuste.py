@@ -0,0 +1,349 @@
+"""Ajuste de curvas de crecimiento y consumo a registros históricos de lotes.
+
+Los pesajes y el consumo acumulado de cada lote se agrupan por granja,
+línea, temporada (o las claves que se elijan, hasta un ajuste por lote) y
+a cada grupo se le ajusta un modelo de Gompertz o de Richards por mínimos
+cuadrados (Levenberg-Marquardt).
+
+Todos los grupos se ajustan a la vez: los puntos van en un solo vector con
+el índice de su grupo, los residuos y el jacobiano se calculan sobre ese
+vector y las matrices normales `JᵀJ` de cada grupo se suman con
+`np.bincount`; los pasos de todos los grupos se resuelven con un único
+`np.linalg.solve` por lotes. Los grupos se reparten en bloques entre hilos.
+Los resultados se memoizan por el hash del archivo y las opciones del ajuste.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from uywa.cache import cache
+from uywa.catalogo import ALIAS_COLUMNAS, _leer_tabla, _numerico, hash_contenido
+from uywa.curvas import DIA_MAX
+
+ALIAS_REGISTROS = {
+    **ALIAS_COLUMNAS,
+    "farm": "granja", "granja": "granja", "finca": "granja",
+    "flock": "lote", "flock id": "lote", "lote": "lote", "galpon": "lote", "galpón": "lote",
+    "date": "fecha", "fecha de colocación": "fecha", "fecha_colocacion": "fecha",
+    "season": "temporada", "estacion": "temporada", "estación": "temporada",
+}
+CLAVES = ["granja", "linea", "temporada", "lote"]
+VARIABLES = {"peso": "Peso (kg)", "consumo": "Consumo acumulado (kg/ave)"}
+MODELOS = {"gompertz": ["A", "k", "ti"], "richards": ["A", "k", "ti", "nu"]}
+# Richards tiende a Gompertz cuando ν -> 0; se acota log ν para que no diverja.
+LIMITE_LOG_NU = (-7.0, 4.0)
+MAX_ITERACIONES = 100
+TOLERANCIA = 1e-10
+# Coseno máximo entre el residuo y cada columna del jacobiano (el `gtol` de
+# MINPACK): por debajo, el gradiente es nulo y el grupo ya está en un óptimo.
+TOLERANCIA_GRADIENTE = 1e-6
+# RMSE (en las unidades de la variable) por debajo del cual el ajuste es
+# exacto: ahí el coseno es ruido numérico y ningún paso mejora la SSE.
+TOLERANCIA_RMSE = 1e-9
+# Además de más puntos que parámetros, cada grupo necesita edades distintas
+# suficientes: con dos o tres edades la sigmoide no queda determinada.
+MIN_EDADES = 4
+ESTADOS = {
+    "convergio": "Convergidos",
+    "abandono": "Sin convergencia (amortiguamiento agotado)",
+    "iteraciones": "Sin convergencia (máximo de iteraciones)",
+    "pocos_datos": "Con pocos datos",
+}
+TAM_BLOQUE = 2_000
+_ajustes = cache("ajustes", max_entradas=16, max_bytes=128 * 2**20)
+
+
+def _gompertz(t, theta):
+    """W = A·exp(-exp(-k(t - ti))) y su jacobiano respecto de (log A, log k, ti)."""
+    k = np.exp(theta[:, 1])
+    dt = t - theta[:, 2]
+    e = np.exp(np.clip(-k * dt, -50, 50))
+    f = np.exp(theta[:, 0] - e)
+    return f, np.column_stack([f, f * k * dt * e, -f * k * e])
+
+
+def _richards(t, theta):
+    """W = A·(1 + ν·exp(-k(t - ti)))^(-1/ν) y su jacobiano respecto de
+    (log A, log k, ti, log ν)."""
+    k = np.exp(theta[:, 1])
+    nu = np.exp(np.clip(theta[:, 3], *LIMITE_LOG_NU))
+    dt = t - theta[:, 2]
+    e = np.exp(np.clip(-k * dt, -50, 50))
+    u = 1 + nu * e
+    f = np.exp(theta[:, 0] - np.log(u) / nu)
+    return f, f[:, None] * np.column_stack([np.ones_like(f), k * dt * e / u, -k * e / u, np.log(u) / nu - e / u])
+
+
+_FUNCIONES = {"gompertz": _gompertz, "richards": _richards}
+
+
+def evaluar_modelo(modelo, parametros, edades):
+    """Curva del modelo para cada grupo: `parametros` `(grupos, p)` en escala
+    natural (A, k, ti, ν), `edades` `(días,)`; devuelve `(grupos, días)`."""
+    parametros = np.atleast_2d(np.asarray(parametros, dtype=float))
+    theta = parametros.copy()
+    theta[:, [0, 1]] = np.log(theta[:, [0, 1]])
+    if modelo == "richards":
+        theta[:, 3] = np.log(theta[:, 3])
+    g, d = len(theta), len(edades)
+    f, _ = _FUNCIONES[modelo](np.tile(np.asarray(edades, dtype=float), g), np.repeat(theta, d, axis=0))
+    return f.reshape(g, d)
+
+
+def _inicial(t, y, grupo, n_grupos, modelo):
+    """Punto de partida por grupo: el punto de inflexión en la última edad observada."""
+    t_max = np.full(n_grupos, -np.inf)
+    np.maximum.at(t_max, grupo, t)
+    y_max = np.zeros(n_grupos)
+    np.maximum.at(y_max, grupo, y)
+    theta = [np.log(np.maximum(y_max, 1e-3) * np.e), np.full(n_grupos, np.log(0.05)), t_max]
+    if modelo == "richards":
+        theta.append(np.zeros(n_grupos))
+    return np.column_stack(theta)
+
+
+def _levenberg_marquardt(t, y, grupo, n_grupos, modelo):
+    """Ajusta todos los grupos a la vez; devuelve `(theta, sse, convergio, abandono)`.
+
+    `convergio` marca los grupos que cumplieron la tolerancia (RMSE bajo
+    `TOLERANCIA_RMSE`, SSE estable o gradiente nulo, proyectado sobre la cota
+    de ν en Richards); `abandono`,
+    los que se rindieron porque el amortiguamiento creció sin encontrar un
+    paso que mejore. Los que no están en ninguno agotaron las iteraciones.
+    """
+    funcion = _FUNCIONES[modelo]
+    theta = _inicial(t, y, grupo, n_grupos, modelo)
+    p = theta.shape[1]
+    pares = [(a, b) for a in range(p) for b in range(a, p)]
+    lam = np.full(n_grupos, 1e-3)
+    activo = np.ones(n_grupos, dtype=bool)
+    convergio = np.zeros(n_grupos, dtype=bool)
+    abandono = np.zeros(n_grupos, dtype=bool)
+    piso_sse = TOLERANCIA_RMSE ** 2 * np.bincount(grupo, minlength=n_grupos)
+
+    f, J = funcion(t, theta[grupo])
+    r = y - f
+    sse = np.bincount(grupo, r * r, n_grupos)
+    for _ in range(MAX_ITERACIONES):
+        exacto = activo & (sse <= piso_sse)
+        convergio |= exacto
+        activo &= ~exacto
+        if not activo.any():
+            break
+        JTJ = np.empty((n_grupos, p, p))
+        for a, b in pares:
+            JTJ[:, a, b] = JTJ[:, b, a] = np.bincount(grupo, J[:, a] * J[:, b], n_grupos)
+        JTr = np.column_stack([np.bincount(grupo, J[:, a] * r, n_grupos) for a in range(p)])
+        diagonal = np.einsum("gii->gi", JTJ)
+        sistema = JTJ + (lam[:, None] * diagonal + 1e-12)[:, :, None] * np.eye(p)
+        if modelo == "richards":
+            # En la cota de ν, si el gradiente empuja hacia afuera, ν queda
+            # fijo y el paso se resuelve solo sobre los demás parámetros.
+            afuera = ((theta[:, 3] <= LIMITE_LOG_NU[0]) & (JTr[:, 3] < 0)) | (
+                (theta[:, 3] >= LIMITE_LOG_NU[1]) & (JTr[:, 3] > 0))
+            JTr[afuera, 3] = 0.0
+            sistema[afuera, 3, :] = sistema[afuera, :, 3] = 0.0
+            sistema[afuera, 3, 3] = 1.0
+        coseno = np.abs(JTr) / np.maximum(np.sqrt(diagonal * sse[:, None]), 1e-300)
+        estacionario = activo & (coseno.max(axis=1) <= TOLERANCIA_GRADIENTE)
+        convergio |= estacionario
+        activo &= ~estacionario
+        if not activo.any():
+            break
+        paso = np.linalg.solve(sistema, JTr[:, :, None])[:, :, 0]
+        paso[~activo] = 0.0
+
+        nuevo = theta + paso
+        if modelo == "richards":
+            nuevo[:, 3] = np.clip(nuevo[:, 3], *LIMITE_LOG_NU)
+        f_n, J_n = funcion(t, nuevo[grupo])
+        r_n = y - f_n
+        sse_n = np.bincount(grupo, r_n * r_n, n_grupos)
+        mejora = activo & np.isfinite(sse_n) & (sse_n < sse)
+        theta[mejora] = nuevo[mejora]
+        por_punto = mejora[grupo]
+        f = np.where(por_punto, f_n, f)
+        J = np.where(por_punto[:, None], J_n, J)
+        r = y - f
+        lam = np.where(mejora, lam / 10, lam * 10)
+        quieto = mejora & (sse - sse_n <= TOLERANCIA * np.maximum(sse, 1e-12))
+        sse = np.where(mejora, sse_n, sse)
+        quieto |= activo & (sse <= piso_sse)
+        convergio |= quieto
+        abandono |= activo & ~quieto & (lam > 1e12)
+        activo &= ~(convergio | abandono)
+        if not activo.any():
+            break
+    return theta, sse, convergio, abandono
+
+
+def _ajustar_bloque(args):
+    t, y, grupo, n_grupos, modelo = args
+    return _levenberg_marquardt(t, y, grupo, n_grupos, modelo)
+
+
+def preparar_registros(df):
+    """Normaliza encabezados, unidades y claves de los registros de lotes.
+
+    Requiere `linea`, `edad` y `peso`; `consumo`, `granja`, `lote`, `fecha` y
+    `temporada` son opcionales. Sin `temporada`, se toma el trimestre de
+    `fecha` (T1 a T4); las filas con una fecha ilegible quedan en la
+    temporada "Sin fecha". Las claves vacías quedan como "Sin dato".
+    """
+    df = df.rename(columns=lambda c: str(c).strip())
+    df = df.rename(columns=lambda c: ALIAS_REGISTROS.get(c.lower(), c.lower()))
+    faltan = [c for c in ("linea", "edad", "peso") if c not in df.columns]
+    if faltan:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltan)}")
+    for col in ("edad", "peso", "consumo"):
+        if col in df.columns:
+            df[col] = _numerico(df[col])
+    df = df.dropna(subset=["linea", "edad", "peso"])
+    df = df[(df["edad"] >= 0) & (df["edad"] <= DIA_MAX) & (df["peso"] > 0)]
+    if df.empty:
+        raise ValueError(f"No hay pesajes válidos (edad entre 0 y {DIA_MAX} días y peso positivo)")
+    # Igual que en los catálogos: los registros suelen venir en gramos.
+    if df["peso"].max() > 20:
+        df["peso"] = df["peso"] / 1000
+    if "consumo" in df.columns and df["consumo"].max() > 50:
+        df["consumo"] = df["consumo"] / 1000
+    if "temporada" not in df.columns and "fecha" in df.columns:
+        trimestre = pd.to_datetime(df["fecha"], errors="coerce").dt.quarter
+        df["temporada"] = ("T" + trimestre.astype("Int64").astype(str)).where(trimestre.notna(), "Sin fecha")
+    for clave in CLAVES:
+        if clave in df.columns:
+            df[clave] = df[clave].astype(str).str.strip().where(df[clave].notna(), "Sin dato")
+    return df.reset_index(drop=True)
+
+
+def ajustar(registros, claves=("granja", "linea", "temporada"), modelo="gompertz",
+            tam_bloque=TAM_BLOQUE, n_hilos=None):
+    """Ajusta `modelo` al peso y al consumo acumulado de cada grupo de `claves`.
+
+    Devuelve un DataFrame con una fila por grupo y variable: las claves,
+    `variable`, los parámetros en escala natural, `rmse`, `n_puntos`,
+    `n_lotes`, `edad_max` (última edad observada), `convergio` y `estado`
+    (una de las claves de `ESTADOS`).
+
+    Los grupos con menos de `MIN_EDADES` edades distintas, o con no más
+    puntos que parámetros, no se ajustan: quedan con parámetros en NaN y estado
+    "pocos_datos".
+    """
+    if modelo not in MODELOS:
+        raise ValueError(f"Modelo desconocido: {modelo}")
+    claves = [c for c in claves if c in registros.columns]
+    if "linea" not in claves:
+        claves = ["linea"] + claves
+    codigos, grupos = pd.MultiIndex.from_frame(registros[claves]).factorize()
+    n_hilos = n_hilos or os.cpu_count() or 1
+    resultados = []
+    for variable in VARIABLES:
+        if variable not in registros.columns:
+            continue
+        validos = registros[variable].notna().to_numpy() & (registros[variable].to_numpy() > 0)
+        orden = np.argsort(codigos[validos], kind="stable")
+        grupo = codigos[validos][orden]
+        t = registros["edad"].to_numpy(dtype=float)[validos][orden]
+        y = registros[variable].to_numpy(dtype=float)[validos][orden]
+        # Se descartan antes del ajuste los grupos con pocos puntos o pocas edades.
+        n_puntos = np.bincount(grupo, minlength=len(grupos))
+        n_edades = pd.Series(t).groupby(grupo).nunique().reindex(range(len(grupos)), fill_value=0).to_numpy()
+        suficientes = (n_puntos > len(MODELOS[modelo])) & (n_edades >= MIN_EDADES)
+        presentes, grupo = np.unique(grupo, return_inverse=True)
+        ajustable = suficientes[presentes]
+        n_puntos, n_edades = n_puntos[presentes], n_edades[presentes]
+        puntos = ajustable[grupo]
+        indice = np.cumsum(ajustable) - 1
+        t_a, y_a, grupo_a = t[puntos], y[puntos], indice[grupo[puntos]]
+
+        # Bloques de grupos contiguos: los puntos de cada bloque son un rango.
+        cortes = np.searchsorted(grupo_a, np.arange(0, ajustable.sum(), tam_bloque))
+        cortes = np.append(cortes, len(grupo_a))
+        bloques = [
+            (t_a[a:b], y_a[a:b], grupo_a[a:b] - grupo_a[a], grupo_a[b - 1] - grupo_a[a] + 1, modelo)
+            for a, b in zip(cortes[:-1], cortes[1:]) if b > a
+        ]
+        theta = np.full((len(presentes), len(MODELOS[modelo])), np.nan)
+        sse = np.full(len(presentes), np.nan)
+        convergio = np.zeros(len(presentes), dtype=bool)
+        abandono = np.zeros(len(presentes), dtype=bool)
+        if bloques:
+            with ThreadPoolExecutor(max_workers=min(n_hilos, len(bloques))) as pool:
+                partes = list(pool.map(_ajustar_bloque, bloques))
+            for destino, i in zip((theta, sse, convergio, abandono), range(4)):
+                destino[ajustable] = np.concatenate([p[i] for p in partes])
+
+        edad_max = np.zeros(len(presentes))
+        np.maximum.at(edad_max, grupo, t)
+        parametros = theta.copy()
+        parametros[:, [0, 1]] = np.exp(parametros[:, [0, 1]])
+        if modelo == "richards":
+            parametros[:, 3] = np.exp(parametros[:, 3])
+        tabla = grupos[presentes].to_frame(index=False, name=claves)
+        tabla["variable"] = variable
+        for i, nombre in enumerate(MODELOS[modelo]):
+            tabla[nombre] = parametros[:, i]
+        tabla["rmse"] = np.sqrt(sse / n_puntos)
+        tabla["n_puntos"] = n_puntos
+        if "lote" in registros.columns:
+            lotes = pd.Series(registros["lote"].to_numpy()[validos][orden])
+            tabla["n_lotes"] = lotes.groupby(grupo).nunique().to_numpy()
+        tabla["edad_max"] = edad_max.astype(int)
+        tabla["convergio"] = convergio
+        tabla["estado"] = np.select(
+            [~ajustable, convergio, abandono], ["pocos_datos", "convergio", "abandono"], "iteraciones"
+        )
+        resultados.append(tabla)
+    ajustes = pd.concat(resultados, ignore_index=True)
+    ajustes.attrs.update(modelo=modelo, claves=claves)
+    return ajustes
+
+
+def ajustar_archivo(contenido, nombre_archivo, claves=("granja", "linea", "temporada"),
+                    modelo="gompertz", hoja=None):
+    """`ajustar` sobre un Excel/CSV de registros, memoizado por el hash del contenido."""
+    clave = (hash_contenido(contenido), tuple(claves), modelo, hoja)
+    return _ajustes.obtener(
+        clave, lambda: ajustar(preparar_registros(_leer_tabla(contenido, nombre_archivo, hoja)), claves, modelo)
+    )
+
+
+def nombre_linea(ajustes, sufijo=" (ajuste)"):
+    """Nombre de línea de cada grupo: sus claves unidas por ' · ' más `sufijo`."""
+    claves = ajustes.attrs["claves"]
+    return ajustes[claves].astype(str).agg(" · ".join, axis=1) + sufijo
+
+
+def a_genetica(ajustes, sufijo=" (ajuste)"):
+    """Tabla de genética (`linea`, `edad`, `peso`, `consumo`, `fcr`) con las
+    curvas ajustadas día a día, desde el día 0 hasta la última edad observada
+    de cada grupo. El consumo se desplaza para que el acumulado parta de 0.
+
+    Solo entran los grupos cuyos ajustes de peso y de consumo convergieron.
+    """
+    modelo = ajustes.attrs["modelo"]
+    parametros = MODELOS[modelo]
+    ajustes = ajustes.assign(nombre=nombre_linea(ajustes, sufijo))
+    ajustes = ajustes[ajustes["convergio"]]
+    peso = ajustes[ajustes["variable"] == "peso"].set_index("nombre")
+    consumo = ajustes[ajustes["variable"] == "consumo"].set_index("nombre")
+    nombres = peso.index.intersection(consumo.index)
+    if nombres.empty:
+        raise ValueError("Ningún grupo tiene a la vez un ajuste convergido de peso y de consumo")
+    edades = np.arange(DIA_MAX + 1)
+    pesos = evaluar_modelo(modelo, peso.loc[nombres, parametros], edades)
+    consumos = evaluar_modelo(modelo, consumo.loc[nombres, parametros], edades)
+    consumos -= consumos[:, :1]
+    ultima = np.minimum(peso.loc[nombres, "edad_max"], consumo.loc[nombres, "edad_max"]).to_numpy()
+    dentro = edades[None, :] <= ultima[:, None]
+    filas = np.nonzero(dentro)
+    tabla = pd.DataFrame({
+        "linea": np.asarray(nombres)[filas[0]],
+        "edad": edades[filas[1]],
+        "peso": pesos[dentro],
+        "consumo": consumos[dentro],
+    })
+    tabla["fcr"] = tabla["consumo"] / tabla["peso"]
+    return tabla
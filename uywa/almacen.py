@@ -0,0 +1,151 @@
+"""Almacén persistente de escenarios guardados (SQLite).
+
+Cada tipo de escenario vive en su propia tabla con índices sobre nombre,
+línea, fecha y margen. Los escenarios se agregan de forma incremental y las
+lecturas seleccionan solo las columnas pedidas, con filtros y paginación en
+SQL, para que el comparador no cargue más de lo que muestra.
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+RUTA_DEFECTO = os.environ.get("UYWA_DB", "escenarios_uywa.sqlite")
+
+ESQUEMAS = {
+    "productivo": {
+        "nombre": "TEXT", "linea": "TEXT", "edad_ini": "INTEGER", "edad_fin": "INTEGER",
+        "aves_ini": "INTEGER", "aves_finales": "REAL", "peso_ini": "REAL", "peso_fin": "REAL",
+        "consumo": "REAL", "fcr": "REAL", "gdp": "REAL", "iep": "REAL", "mortalidad": "REAL",
+        "prod_total": "REAL", "costo_alim": "REAL", "precio_alimento_kg": "REAL",
+        "precio_venta_kg": "REAL", "ingreso_bruto": "REAL", "margen_neto": "REAL",
+        "consumo_diario": "REAL",
+    },
+    "economico": {
+        "nombre": "TEXT", "precio_venta": "REAL", "precio_alimento": "REAL", "peso_final": "REAL",
+        "consumo": "REAL", "aves_ini": "INTEGER", "aves_finales": "REAL", "mortalidad": "REAL",
+        "prod_total": "REAL", "costo_alim": "REAL", "costo_total": "REAL", "ingreso_bruto": "REAL",
+        "margen_neto": "REAL", "margen_ave": "REAL", "rentabilidad": "REAL", "otros_costos": "REAL",
+    },
+}
+COLUMNAS_INDEXADAS = ["nombre", "linea", "fecha", "margen_neto"]
+_CONVERSORES = {"TEXT": str, "INTEGER": int, "REAL": float}
+
+
+def _tabla(tipo):
+    if tipo not in ESQUEMAS:
+        raise ValueError(f"Tipo de escenario desconocido: {tipo}")
+    return f"escenarios_{tipo}"
+
+
+class AlmacenEscenarios:
+    """Acceso a los escenarios guardados; seguro para usar desde varios hilos."""
+
+    def __init__(self, ruta=RUTA_DEFECTO):
+        self.ruta = ruta
+        self._con = sqlite3.connect(ruta, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._con:
+            self._con.execute("PRAGMA journal_mode=WAL")
+            for tipo, esquema in ESQUEMAS.items():
+                tabla = _tabla(tipo)
+                columnas = ", ".join(f"{c} {t}" for c, t in esquema.items())
+                self._con.execute(
+                    f"CREATE TABLE IF NOT EXISTS {tabla} "
+                    f"(id INTEGER PRIMARY KEY AUTOINCREMENT, fecha TEXT NOT NULL, {columnas})"
+                )
+                for col in COLUMNAS_INDEXADAS:
+                    if col == "fecha" or col in esquema:
+                        self._con.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabla}_{col} ON {tabla} ({col})")
+
+    def columnas(self, tipo):
+        return ["id", "fecha"] + list(ESQUEMAS[tipo])
+
+    def guardar(self, tipo, escenario):
+        """Agrega un escenario (dict) y devuelve su id."""
+        return self.guardar_muchos(tipo, pd.DataFrame([escenario]))[0]
+
+    def guardar_muchos(self, tipo, df):
+        """Agrega las filas de `df` en una sola transacción; devuelve sus ids."""
+        tabla = _tabla(tipo)
+        esquema = ESQUEMAS[tipo]
+        columnas = [c for c in esquema if c in df.columns]
+        fecha = datetime.now().isoformat(timespec="seconds")
+        filas = [
+            (fecha, *(None if pd.isna(v) else _CONVERSORES[esquema[c]](v) for c, v in zip(columnas, fila)))
+            for fila in df[columnas].itertuples(index=False, name=None)
+        ]
+        sql = f"INSERT INTO {tabla} (fecha, {', '.join(columnas)}) VALUES ({', '.join('?' * (len(columnas) + 1))})"
+        if not filas:
+            return []
+        # BEGIN IMMEDIATE toma el bloqueo de escritura antes de insertar: ningún
+        # otro proceso escribe en medio, así que las filas reciben ids
+        # consecutivos que terminan en el último id insertado por esta conexión.
+        with self._lock, self._con:
+            self._con.execute("BEGIN IMMEDIATE")
+            self._con.executemany(sql, filas)
+            ultimo = self._con.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(ultimo - len(filas) + 1, ultimo + 1))
+
+    def _where(self, tipo, linea=None, nombre=None, fecha_desde=None, fecha_hasta=None,
+               margen_min=None, margen_max=None):
+        condiciones, params = [], []
+        if linea:
+            if "linea" not in ESQUEMAS[tipo]:
+                raise ValueError(f"Los escenarios '{tipo}' no tienen línea")
+            lineas = [linea] if isinstance(linea, str) else list(linea)
+            condiciones.append(f"linea IN ({', '.join('?' * len(lineas))})")
+            params += lineas
+        if nombre:
+            condiciones.append("nombre LIKE ?")
+            params.append(f"%{nombre}%")
+        for col, op, valor in (("fecha", ">=", fecha_desde), ("fecha", "<=", fecha_hasta),
+                               ("margen_neto", ">=", margen_min), ("margen_neto", "<=", margen_max)):
+            if valor is not None:
+                condiciones.append(f"{col} {op} ?")
+                params.append(str(valor) if col == "fecha" else float(valor))
+        return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), params
+
+    def contar(self, tipo, **filtros):
+        where, params = self._where(tipo, **filtros)
+        with self._lock:
+            return self._con.execute(f"SELECT COUNT(*) FROM {_tabla(tipo)}{where}", params).fetchone()[0]
+
+    def leer(self, tipo, columnas=None, orden="id", descendente=False, limite=None,
+             desplazamiento=0, **filtros):
+        """DataFrame con `columnas` (todas por defecto) de los escenarios filtrados.
+
+        Filtros: `linea` (str o lista), `nombre` (subcadena), `fecha_desde`,
+        `fecha_hasta`, `margen_min`, `margen_max`.
+        """
+        validas = self.columnas(tipo)
+        columnas = list(columnas or validas)
+        for col in columnas + [orden]:
+            if col not in validas:
+                raise ValueError(f"Columna desconocida: {col}")
+        where, params = self._where(tipo, **filtros)
+        sql = (f"SELECT {', '.join(columnas)} FROM {_tabla(tipo)}{where} "
+               f"ORDER BY {orden} {'DESC' if descendente else 'ASC'}")
+        if limite is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limite), int(desplazamiento)]
+        with self._lock:
+            return pd.read_sql_query(sql, self._con, params=params)
+
+    def valores_distintos(self, tipo, columna):
+        if columna not in self.columnas(tipo):
+            raise ValueError(f"Columna desconocida: {columna}")
+        with self._lock:
+            filas = self._con.execute(f"SELECT DISTINCT {columna} FROM {_tabla(tipo)} ORDER BY {columna}").fetchall()
+        return [f[0] for f in filas]
+
+    def borrar(self, tipo, ids):
+        ids = [int(i) for i in ids]
+        with self._lock, self._con:
+            self._con.execute(f"DELETE FROM {_tabla(tipo)} WHERE id IN ({', '.join('?' * len(ids))})", ids)
+
+    def cerrar(self):
+        with self._lock:
+            self._con.close()
@@ -0,0 +1,128 @@
+"""Cachés compartidas por todo el proceso, es decir, por todas las sesiones.
+
+Un servidor de Streamlit atiende a todo el equipo desde un solo proceso.
+Los artefactos inmutables (genética de referencia, curvas derivadas, grillas
+de sensibilidad, catálogos, ajustes) se guardan aquí una sola vez, con una
+clave derivada del contenido, en vez de repetirse por sesión. Cada caché es
+un LRU acotado en entradas y en bytes aproximados, protegido por un lock; si
+varias sesiones piden a la vez la misma clave ausente, solo una la calcula y
+las demás esperan su resultado.
+
+Los valores se comparten tal cual: quien los recibe no debe modificarlos.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+_registro = {}
+_lock_registro = threading.Lock()
+
+
+def tamano(valor):
+    """Bytes aproximados de `valor` (DataFrames, arrays y sus contenedores)."""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, dict):
+        return sum(tamano(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sum(tamano(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+class CacheLRU:
+    """LRU seguro entre hilos con límite de entradas y de bytes."""
+
+    def __init__(self, nombre, max_entradas, max_bytes=None):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self.bytes = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self._en_curso = {}
+
+    def __len__(self):
+        return len(self._datos)
+
+    def __contains__(self, clave):
+        return clave in self._datos
+
+    def obtener(self, clave, construir):
+        """Valor de `clave`; si falta, lo calcula con `construir()` y lo guarda."""
+        with self._lock:
+            if clave in self._datos:
+                self.aciertos += 1
+                self._datos.move_to_end(clave)
+                return self._datos[clave][0]
+            lock_clave = self._en_curso.setdefault(clave, threading.Lock())
+        with lock_clave:
+            with self._lock:
+                if clave in self._datos:
+                    self.aciertos += 1
+                    return self._datos[clave][0]
+                self.fallos += 1
+            try:
+                valor = construir()
+                self.guardar(clave, valor)
+            finally:
+                with self._lock:
+                    self._en_curso.pop(clave, None)
+        return valor
+
+    def guardar(self, clave, valor):
+        n_bytes = tamano(valor)
+        with self._lock:
+            if clave in self._datos:
+                self.bytes -= self._datos.pop(clave)[1]
+            if self.max_bytes is not None and n_bytes > self.max_bytes:
+                return
+            self._datos[clave] = (valor, n_bytes)
+            self.bytes += n_bytes
+            while len(self._datos) > self.max_entradas or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes):
+                self.bytes -= self._datos.popitem(last=False)[1][1]
+
+    def invalidar(self, clave=None):
+        """Descarta `clave`, o todas las entradas si no se indica."""
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+                self.bytes = 0
+            elif clave in self._datos:
+                self.bytes -= self._datos.pop(clave)[1]
+
+    def estadisticas(self):
+        return {
+            "cache": self.nombre, "entradas": len(self._datos), "max_entradas": self.max_entradas,
+            "mb": self.bytes / 2**20, "max_mb": None if self.max_bytes is None else self.max_bytes / 2**20,
+            "aciertos": self.aciertos, "fallos": self.fallos,
+        }
+
+
+def cache(nombre, max_entradas, max_bytes=None):
+    """Caché compartida `nombre`; la crea la primera vez que se pide."""
+    with _lock_registro:
+        if nombre not in _registro:
+            _registro[nombre] = CacheLRU(nombre, max_entradas, max_bytes)
+        return _registro[nombre]
+
+
+def invalidar(nombre=None, clave=None):
+    """Descarta `clave` de la caché `nombre`, o de todas las cachés si no se indica `nombre`."""
+    for c in ([_registro[nombre]] if nombre is not None else list(_registro.values())):
+        c.invalidar(clave)
+
+
+def estadisticas():
+    """Entradas, memoria y aciertos de cada caché compartida, una fila por caché."""
+    return pd.DataFrame([c.estadisticas() for c in list(_registro.values())],
+                        columns=["cache", "entradas", "max_entradas", "mb", "max_mb", "aciertos", "fallos"])
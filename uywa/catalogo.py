@@ -0,0 +1,141 @@
+"""Importación de catálogos de genética (Cobb, Ross, Hubbard...) desde Excel o CSV.
+
+Un catálogo se valida contra el esquema de genética y se guarda compacto:
+`linea` categórica, métricas en float32 e índice `(linea, edad)`. Los
+catálogos ya leídos se memorizan por el hash del contenido del archivo, en
+memoria del proceso (compartida entre sesiones) y en disco como Parquet,
+así que el mismo libro no se vuelve a parsear.
+"""
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from uywa.cache import cache
+from uywa.curvas import DIA_MAX
+
+DIR_CACHE = os.environ.get("UYWA_CACHE", ".cache_uywa")
+COLUMNAS_REQUERIDAS = ["linea", "edad", "peso", "consumo"]
+# Encabezados habituales de las guías de las casas genéticas.
+ALIAS_COLUMNAS = {
+    "line": "linea", "línea": "linea", "strain": "linea", "genetica": "linea", "genética": "linea",
+    "age": "edad", "day": "edad", "days": "edad", "dia": "edad", "día": "edad", "edad (días)": "edad",
+    "weight": "peso", "body weight": "peso", "bw": "peso", "peso vivo": "peso", "peso_vivo": "peso",
+    "cum feed": "consumo", "cumulative feed": "consumo", "cum. feed intake": "consumo",
+    "cumulative feed intake": "consumo", "consumo acumulado": "consumo", "consumo_acumulado": "consumo",
+    "conversion": "fcr", "conversión": "fcr", "feed conversion": "fcr", "ca": "fcr",
+    "sex": "sexo",
+}
+SEXOS = {
+    "male": "Macho", "macho": "Macho", "m": "Macho",
+    "female": "Hembra", "hembra": "Hembra", "h": "Hembra", "f": "Hembra",
+    "as-hatched": "Mixto", "as hatched": "Mixto", "mixed": "Mixto", "mixto": "Mixto",
+}
+_catalogos = cache("catalogos", max_entradas=8, max_bytes=256 * 2**20)
+
+
+def hash_contenido(contenido):
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def _leer_tabla(contenido, nombre_archivo, hoja=None):
+    if nombre_archivo.lower().endswith((".xlsx", ".xlsm")):
+        return pd.read_excel(io.BytesIO(contenido), sheet_name=hoja or 0, engine="openpyxl")
+    if nombre_archivo.lower().endswith((".csv", ".txt")):
+        return pd.read_csv(io.BytesIO(contenido), sep=None, engine="python")
+    raise ValueError(f"Formato no soportado: {nombre_archivo}")
+
+
+def _numerico(serie):
+    if not pd.api.types.is_numeric_dtype(serie):
+        serie = serie.astype(str).str.strip().str.replace(",", ".", regex=False)
+    return pd.to_numeric(serie, errors="coerce")
+
+
+def validar_catalogo(df):
+    """Normaliza encabezados y tipos; levanta `ValueError` con todos los problemas."""
+    df = df.rename(columns=lambda c: str(c).strip())
+    df = df.rename(columns=lambda c: ALIAS_COLUMNAS.get(c.lower(), c.lower()))
+    faltan = [c for c in COLUMNAS_REQUERIDAS if c not in df.columns]
+    if faltan:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltan)}")
+    df = df.dropna(how="all")
+    problemas = []
+    for col in ["edad", "peso", "consumo"] + (["fcr"] if "fcr" in df.columns else []):
+        df[col] = _numerico(df[col])
+        malos = int(df[col].isna().sum())
+        if malos:
+            problemas.append(f"{malos} valores no numéricos o vacíos en '{col}'")
+        if (df[col] < 0).any():
+            problemas.append(f"Valores negativos en '{col}'")
+    if df["linea"].isna().any():
+        problemas.append(f"{int(df['linea'].isna().sum())} filas sin línea")
+    if ((df["edad"] > DIA_MAX) | (df["edad"] % 1 != 0)).any():
+        problemas.append(f"'edad' debe ser un número entero de días entre 0 y {DIA_MAX}")
+    if problemas:
+        raise ValueError("; ".join(problemas))
+
+    df["linea"] = df["linea"].astype(str).str.strip()
+    if "sexo" in df.columns:
+        sexo = df["sexo"].fillna("").astype(str).str.strip()
+        sexo = sexo.str.lower().map(SEXOS).fillna(sexo)
+        # Sin sexo la línea queda sin sufijo, no como "Ross nan".
+        df["linea"] = df["linea"] + (" " + sexo).where(sexo != "", "")
+    # Las guías suelen venir en gramos; ningún pollo pesa 20 kg ni come 50 kg.
+    if df["peso"].max() > 20:
+        df["peso"] = df["peso"] / 1000
+    if df["consumo"].max() > 50:
+        df["consumo"] = df["consumo"] / 1000
+    if "fcr" not in df.columns:
+        df["fcr"] = np.where(df["peso"] > 0, df["consumo"] / df["peso"].where(df["peso"] > 0), np.nan)
+
+    duplicados = df.duplicated(["linea", "edad"])
+    if duplicados.any():
+        raise ValueError(f"{int(duplicados.sum())} filas repetidas para el mismo par (línea, edad)")
+    return df
+
+
+def compactar(df):
+    """Catálogo con `linea` categórica, `edad` int16, métricas float32 e índice (linea, edad)."""
+    return (
+        df[["linea", "edad", "peso", "consumo", "fcr"]]
+        .astype({"linea": "category", "edad": np.int16, "peso": np.float32,
+                 "consumo": np.float32, "fcr": np.float32})
+        .set_index(["linea", "edad"])
+        .sort_index()
+    )
+
+
+def _ruta_cache(clave):
+    return os.path.join(DIR_CACHE, "catalogos", f"{clave}.parquet")
+
+
+def cargar_catalogo(contenido, nombre_archivo, hoja=None):
+    """Lee, valida y compacta un catálogo; memorizado por el hash del archivo.
+
+    El catálogo devuelto se comparte entre llamadas y no debe modificarse.
+    """
+    clave = hash_contenido(contenido + str(hoja).encode())
+    return _catalogos.obtener(clave, lambda: _leer_catalogo(clave, contenido, nombre_archivo, hoja))
+
+
+def _leer_catalogo(clave, contenido, nombre_archivo, hoja):
+    ruta = _ruta_cache(clave)
+    if os.path.exists(ruta):
+        return pd.read_parquet(ruta)
+    catalogo = compactar(validar_catalogo(_leer_tabla(contenido, nombre_archivo, hoja)))
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        catalogo.to_parquet(ruta)
+    except OSError:
+        pass  # sin disco escribible se mantiene solo la caché en memoria
+    return catalogo
+
+
+def a_genetica(catalogo):
+    """Tabla plana (linea, edad, peso, consumo, fcr) editable para la app."""
+    df = catalogo.reset_index()
+    df["linea"] = df["linea"].astype(str)
+    return df
@@ -0,0 +1,92 @@
+"""Figuras del comparador de escenarios con tamaño acotado.
+
+Cada figura usa una sola traza vectorizada por variable. El ranking muestra
+como máximo `MAX_BARRAS` escenarios (el top N se resuelve antes, en el
+almacén); la distribución de todos los escenarios usa WebGL (`Scattergl`)
+y, por encima de `UMBRAL_AGREGADO`, un histograma agregado, de modo que el
+tamaño de la figura no crece con el número de escenarios guardados.
+"""
+import numpy as np
+import plotly.graph_objs as go
+
+VARIABLES_COMPARADOR = {
+    "productivo": {
+        "peso_fin": "Peso final",
+        "consumo": "Consumo acumulado",
+        "fcr": "FCR",
+        "gdp": "GDP",
+        "iep": "IEP",
+        "prod_total": "Producción total",
+        "costo_alim": "Costo alimento",
+        "ingreso_bruto": "Ingreso bruto",
+        "margen_neto": "Rentabilidad",
+        "consumo_diario": "Consumo diario",
+    },
+    "economico": {
+        "margen_neto": "Margen neto total",
+        "margen_ave": "Margen neto por ave",
+        "rentabilidad": "Rentabilidad (%)",
+        "prod_total": "Producción total",
+        "costo_total": "Costo total",
+        "ingreso_bruto": "Ingreso bruto",
+    },
+}
+MODOS = ["Ranking (top N)", "Distribución de todos"]
+TOP_N = 30
+MAX_BARRAS = 200
+# Por encima de este número de escenarios no se envían nombres al navegador.
+UMBRAL_NOMBRES = 10_000
+# Por encima de este número de escenarios la distribución se agrega en un histograma.
+UMBRAL_AGREGADO = 10_000
+N_BINS_AGREGADO = 100
+
+
+def figura_ranking(df, variable, etiqueta):
+    """Barras (una sola traza) con los escenarios de `df`, ya filtrados y ordenados.
+
+    Cada barra va en su posición del ranking, así que dos escenarios con el
+    mismo nombre no se funden en una; el nombre (y el id, si viene en `df`)
+    aparece en las etiquetas del eje y al pasar el cursor.
+    """
+    df = df.head(MAX_BARRAS)
+    posiciones = np.arange(1, len(df) + 1)
+    valores = df[variable].to_numpy(dtype=float)
+    nombres = df["nombre"].astype(str).to_numpy()
+    textos = nombres if "id" not in df.columns else np.char.add(nombres, " · id " + df["id"].astype(str).to_numpy())
+    fig = go.Figure(go.Bar(
+        x=posiciones, y=valores, name=etiqueta, hovertext=textos,
+        hovertemplate="#%{x} %{hovertext}<br>%{y}<extra></extra>",
+        marker_color=np.where(valores < 0, "#c0392b", "#19345c")
+    ))
+    fig.update_layout(title=f"Comparativa de {etiqueta} (top {len(df)})", xaxis_title="Escenario", yaxis_title=etiqueta)
+    fig.update_xaxes(tickmode="array", tickvals=posiciones, ticktext=nombres)
+    return fig
+
+
+def figura_distribucion(valores, etiqueta, nombres=None):
+    """Distribución de `valores` de todos los escenarios.
+
+    Hasta `UMBRAL_AGREGADO` escenarios dibuja la curva ordenada con WebGL;
+    por encima, un histograma de `N_BINS_AGREGADO` barras.
+    """
+    valores = np.asarray(valores, dtype=float)
+    validos = ~np.isnan(valores)
+    valores = valores[validos]
+    if len(valores) > UMBRAL_AGREGADO:
+        conteos, bordes = np.histogram(valores, bins=N_BINS_AGREGADO)
+        fig = go.Figure(go.Bar(x=(bordes[:-1] + bordes[1:]) / 2, y=conteos, width=np.diff(bordes), name=etiqueta))
+        fig.update_layout(
+            title=f"Distribución de {etiqueta} ({len(valores):,} escenarios)",
+            xaxis_title=etiqueta, yaxis_title="Escenarios", bargap=0
+        )
+        return fig
+    orden = np.argsort(-valores, kind="stable")
+    traza = dict(x=np.arange(1, len(valores) + 1), y=valores[orden], mode="markers", name=etiqueta, marker=dict(size=4))
+    if nombres is not None and len(valores) <= UMBRAL_NOMBRES:
+        traza["hovertext"] = np.asarray(nombres, dtype=str)[validos][orden]
+    fig = go.Figure(go.Scattergl(**traza))
+    fig.update_layout(
+        title=f"{etiqueta} de todos los escenarios, ordenados ({len(valores):,})",
+        xaxis_title="Posición en el ranking", yaxis_title=etiqueta
+    )
+    return fig
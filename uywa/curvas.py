@@ -0,0 +1,254 @@
+"""Curvas diarias y derivadas por línea genética a partir de la tabla de genética.
+
+La tabla de genética solo trae algunas edades (p. ej. 28/35/42/49). Cada
+línea se interpola día a día (0 a `DIA_MAX`) con un spline cúbico monótono
+(PCHIP), de modo que cualquier edad se resuelve por índice; todas las líneas
+se interpolan juntas sobre una matriz líneas x puntos, sin recorrerlas una a
+una. La tabla
+derivada solo depende del contenido de la genética, así que se memoiza
+sobre un hash de ese contenido en una caché compartida por todas las
+sesiones: mientras la genética no cambie, mover un slider no vuelve a
+recorrer la tabla, y dos usuarios con la misma genética comparten las curvas.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from uywa.cache import cache
+from uywa.kpis import _dividir
+
+COLUMNAS_GENETICA = ["linea", "edad", "peso", "consumo", "fcr"]
+
+DIA_MAX = 70
+# Peso al nacimiento (kg) usado cuando la línea no trae la edad 0.
+PESO_NACIMIENTO = 0.04
+
+_tablas = cache("curvas", max_entradas=32, max_bytes=256 * 2**20)
+_referencia = cache("genetica_referencia", max_entradas=1)
+
+
+def genetica_base():
+    """Tabla de genética de referencia con la que arranca la app.
+
+    Es una sola instancia por proceso, compartida por todas las sesiones: no
+    debe modificarse (`data_editor` y las importaciones devuelven tablas nuevas).
+    """
+    return _referencia.obtener("base", _construir_genetica_base)
+
+
+def _construir_genetica_base():
+    return pd.DataFrame({
+        "linea": ["Cobb", "Cobb", "Cobb", "Cobb", "Ross", "Ross", "Ross", "Ross"],
+        "edad": [28, 35, 42, 49, 28, 35, 42, 49],
+        "peso": [1.35, 1.95, 2.5, 3.05, 1.35, 1.95, 2.5, 3.05],
+        "consumo": [2.2, 3.1, 4.3, 5.6, 2.2, 3.1, 4.3, 5.6],
+        "fcr": [1.63, 1.59, 1.72, 1.84, 1.63, 1.59, 1.72, 1.84]
+    })
+
+
+def _normalizar(df_genetica):
+    df = df_genetica[COLUMNAS_GENETICA].dropna(subset=["linea", "edad"])
+    return df.astype({"linea": str}).sort_values(["linea", "edad"], kind="stable").reset_index(drop=True)
+
+
+def hash_genetica(df_genetica):
+    """Hash estable del contenido de la tabla de genética (ignora el índice)."""
+    df = df_genetica[COLUMNAS_GENETICA]
+    h = hashlib.sha1(",".join(df.columns).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _extremo_pchip(h0, h1, d0, d1):
+    """Pendiente de un extremo (fórmula de tres puntos acotada), por filas."""
+    m = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+    m = np.where(np.sign(m) != np.sign(d0), 0.0, m)
+    return np.where((np.sign(d0) != np.sign(d1)) & (np.abs(m) > 3 * np.abs(d0)), 3 * d0, m)
+
+
+def _pendientes_pchip(x, y, n):
+    """Pendientes de Fritsch-Carlson: el spline no oscila ni rompe la monotonía.
+
+    Calcula todas las filas de `x`/`y` a la vez; cada fila tiene sus `n`
+    puntos al inicio y NaN después.
+    """
+    filas = np.arange(len(x))
+    d = np.zeros_like(y)
+    if x.shape[1] < 2:
+        return d
+    h = np.diff(x, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = np.diff(y, axis=1) / h
+    if x.shape[1] > 2:
+        w1 = 2 * h[:, 1:] + h[:, :-1]
+        w2 = h[:, 1:] + 2 * h[:, :-1]
+        mismo_signo = delta[:, :-1] * delta[:, 1:] > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            armonica = (w1 + w2) / (w1 / delta[:, :-1] + w2 / delta[:, 1:])
+        d[:, 1:-1] = np.where(mismo_signo, armonica, 0.0)
+    # Con dos puntos la pendiente es la de la recta en ambos extremos.
+    ultimo = np.maximum(n - 1, 1)
+    d[:, 0] = delta[:, 0]
+    d[filas, ultimo] = delta[filas, ultimo - 1]
+    tres = filas[n >= 3]
+    if len(tres):
+        u = ultimo[tres]
+        d[tres, 0] = _extremo_pchip(h[tres, 0], h[tres, 1], delta[tres, 0], delta[tres, 1])
+        d[tres, u] = _extremo_pchip(h[tres, u - 1], h[tres, u - 2], delta[tres, u - 1], delta[tres, u - 2])
+    return d
+
+
+def interpolar_pchip(x, y, xi):
+    """Evalúa en `xi` el spline PCHIP por los puntos `(x, y)`; NaN fuera de rango."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    xi = np.asarray(xi, dtype=float)
+    if len(x) == 1:
+        return np.where(xi == x[0], y[0], np.nan)
+    d = _pendientes_pchip(x[None, :], y[None, :], np.array([len(x)]))[0]
+    k = np.clip(np.searchsorted(x, xi, side="right") - 1, 0, len(x) - 2)
+    h = x[k + 1] - x[k]
+    t = (xi - x[k]) / h
+    t2, t3 = t * t, t * t * t
+    yi = ((2 * t3 - 3 * t2 + 1) * y[k] + (t3 - 2 * t2 + t) * h * d[k]
+          + (-2 * t3 + 3 * t2) * y[k + 1] + (t3 - t2) * h * d[k + 1])
+    return np.where((xi >= x[0]) & (xi <= x[-1]), yi, np.nan)
+
+
+def _curvas_diarias(df):
+    """Interpola todas las líneas de `df` (normalizado) día a día hasta su
+    última edad (máx. `DIA_MAX`) con un solo PCHIP sobre la matriz líneas x
+    puntos. Devuelve `(lineas, largos, dias, peso, consumo)`: las curvas de
+    todas las líneas van concatenadas, `largos[i]` días por línea."""
+    lineas = df["linea"].unique()
+    if not len(lineas):
+        vacio = np.array([])
+        return lineas, np.array([], dtype=np.int64), np.array([], dtype=np.int64), vacio, vacio
+    df = df[(df["edad"] >= 0) & (df["edad"] <= DIA_MAX)]
+    puntos = df.groupby(["linea", "edad"], sort=False)[["peso", "consumo"]].mean().dropna().reset_index()
+    fila = pd.Categorical(puntos["linea"], categories=lineas).codes.astype(np.int64)
+    edad = puntos["edad"].to_numpy(dtype=float)
+    valores = puntos[["peso", "consumo"]].to_numpy(dtype=float)
+    # Las líneas sin la edad 0 arrancan del peso al nacimiento.
+    sin_cero = np.ones(len(lineas), dtype=bool)
+    sin_cero[fila[edad == 0]] = False
+    faltan = np.flatnonzero(sin_cero)
+    fila = np.concatenate([fila, faltan])
+    edad = np.concatenate([edad, np.zeros(len(faltan))])
+    valores = np.concatenate([valores, np.tile([PESO_NACIMIENTO, 0.0], (len(faltan), 1))])
+    orden = np.lexsort((edad, fila))
+    fila, edad, valores = fila[orden], edad[orden], valores[orden]
+
+    n = np.bincount(fila, minlength=len(lineas))
+    columna = np.arange(len(fila)) - (np.cumsum(n) - n)[fila]
+    x = np.full((len(lineas), n.max()), np.nan)
+    x[fila, columna] = edad
+    largos = np.floor(x[np.arange(len(lineas)), n - 1]).astype(np.int64) + 1
+    fila_dia = np.repeat(np.arange(len(lineas)), largos)
+    dias = np.arange(len(fila_dia)) - (np.cumsum(largos) - largos)[fila_dia]
+
+    # Tramo de cada día: búsqueda en los nodos de todas las líneas, separados
+    # por un desplazamiento por línea mayor que cualquier edad.
+    desplazamiento = 2.0 * (DIA_MAX + 1)
+    tramo = np.searchsorted(edad + fila * desplazamiento, dias + fila_dia * desplazamiento, side="right") - 1
+    tramo = np.clip(tramo - (np.cumsum(n) - n)[fila_dia], 0, np.maximum(n - 2, 0)[fila_dia])
+    siguiente = np.minimum(tramo + 1, x.shape[1] - 1)
+    h = x[fila_dia, siguiente] - x[fila_dia, tramo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (dias - x[fila_dia, tramo]) / h
+    t2, t3 = t * t, t * t * t
+    curvas = []
+    for v in range(valores.shape[1]):
+        y = np.full_like(x, np.nan)
+        y[fila, columna] = valores[:, v]
+        d = _pendientes_pchip(x, y, n)
+        yi = ((2 * t3 - 3 * t2 + 1) * y[fila_dia, tramo] + (t3 - 2 * t2 + t) * h * d[fila_dia, tramo]
+              + (-2 * t3 + 3 * t2) * y[fila_dia, siguiente] + (t3 - t2) * h * d[fila_dia, siguiente])
+        # Una línea con un solo punto (la edad 0) solo tiene ese día.
+        curvas.append(np.where(n[fila_dia] == 1, y[fila_dia, 0], yi))
+    return lineas, largos, dias, curvas[0], curvas[1]
+
+
+def _construir_tabla(df_genetica):
+    lineas, largos, dias, peso, consumo = _curvas_diarias(_normalizar(df_genetica))
+    dias_f = dias.astype(float)
+    inicio = np.cumsum(largos) - largos
+    fcr = _dividir(consumo, peso)
+    columnas = {
+        "edad": dias,
+        "peso": peso,
+        "consumo": consumo,
+        "fcr": fcr,
+        "gdp": _dividir(peso - np.repeat(peso[inicio], largos), dias_f),
+        "consumo_diario": _dividir(consumo, dias_f),
+        # IEP con 100 % de viabilidad; se escala por la supervivencia del escenario.
+        "iep_base": _dividir(peso * 100, dias_f * fcr),
+    }
+    # Una sola tabla con todas las líneas; cada línea es un tramo de ella con
+    # la edad como índice.
+    todas = pd.DataFrame(columnas, index=dias)
+    return {linea: todas.iloc[a:a + largo] for linea, a, largo in zip(lineas, inicio, largos)}
+
+
+def tabla_curvas(df_genetica, clave=None):
+    """Devuelve `{linea: DataFrame}` con las curvas diarias y derivadas.
+
+    Cada DataFrame tiene una fila por día desde 0 hasta la última edad de la
+    línea, con índice igual a la edad, así que `df.at[edad, "peso"]` es una
+    búsqueda directa. El resultado se comparte entre llamadas (y sesiones)
+    con la misma genética, por lo que no debe modificarse. `clave` es
+    `hash_genetica(df_genetica)` si quien llama ya lo tiene calculado.
+    """
+    clave = clave or hash_genetica(df_genetica)
+    return _tablas.obtener(clave, lambda: _construir_tabla(df_genetica))
+
+
+def invalidar_curvas(clave):
+    """Descarta las curvas derivadas de la genética con hash `clave`.
+
+    La caché es de todo el proceso: una sesión no debe llamarla por cambiar
+    su genética, porque otras sesiones pueden seguir usando esa clave.
+    """
+    _tablas.invalidar(clave)
+
+
+def curvas_escenario(df_linea, aves_ini, aves_finales, precio_alimento_kg, precio_venta_kg,
+                     alimento_total=None):
+    """Curvas que dependen del escenario (aves y precios) sobre una línea derivada.
+
+    `alimento_total`, si se indica, es el alimento del lote (kg) para cada
+    edad de salida y reemplaza a `consumo * aves_ini` en la rentabilidad.
+    """
+    prod_total = aves_finales * df_linea["peso"].to_numpy(dtype=float)
+    if alimento_total is None:
+        alimento_total = df_linea["consumo"].to_numpy(dtype=float) * aves_ini
+    return {
+        "iep": df_linea["iep_base"].to_numpy() * (aves_finales / aves_ini),
+        "prod_total": prod_total,
+        "rentabilidad": prod_total * precio_venta_kg - alimento_total * precio_alimento_kg,
+    }
+
+
+def matriz_diaria(tabla, variable):
+    """`(lineas, matriz)` con la curva diaria de `variable` de cada línea en una
+    fila de `DIA_MAX + 1` columnas (NaN después de la última edad)."""
+    lineas = list(tabla)
+    matriz = np.full((len(lineas), DIA_MAX + 1), np.nan)
+    for i, linea in enumerate(lineas):
+        valores = tabla[linea][variable].to_numpy(dtype=float)
+        matriz[i, :len(valores)] = valores
+    return lineas, matriz
+
+
+def valores_en_edad(tabla, variable, lineas, edades):
+    """Valor de `variable` para cada par (línea, edad) por indexación directa.
+
+    Las líneas desconocidas o las edades fuera de la curva dan NaN.
+    """
+    nombres, matriz = matriz_diaria(tabla, variable)
+    codigos = pd.Index(nombres).get_indexer(np.asarray(lineas, dtype=object))
+    edades = np.asarray(edades, dtype=float)
+    validas = (codigos >= 0) & (edades >= 0) & (edades <= DIA_MAX)
+    idx_edad = np.where(validas, edades, 0).astype(np.int64)
+    return np.where(validas, matriz[np.maximum(codigos, 0), idx_edad], np.nan)
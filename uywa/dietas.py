@@ -0,0 +1,328 @@
+"""Formulación de dietas a mínimo costo por fase de crianza.
+
+Cada fase es un programa lineal: minimizar el costo por kg de la mezcla
+sujeto a que las proporciones sumen 1, a los límites de inclusión de cada
+ingrediente y a los mínimos y máximos de nutrientes de la fase. Se resuelve
+con un simplex revisado propio (problemas de decenas de filas, sin
+dependencias nuevas).
+
+Entre escenarios de precios solo cambia el vector de costos, no las
+restricciones, así que la base óptima anterior sigue siendo factible: cada
+problema guarda su última base y arranca desde ella. En lote, los costos
+reducidos de todos los escenarios se evalúan de una vez contra cada base;
+los que ya son óptimos se resuelven sin pivotear y solo los restantes
+provocan nuevas iteraciones. Las soluciones se memoizan por vector de
+precios.
+
+Las tablas editadas en la app pasan siempre por `preparar_ingredientes`:
+una celda vacía de composición o de inclusión no puede llegar al simplex.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from uywa.cache import cache
+from uywa.curvas import DIA_MAX
+
+NUTRIENTES = {
+    "em_kcal": "Energía metabolizable (kcal/kg)",
+    "proteina": "Proteína bruta (%)",
+    "lisina": "Lisina (%)",
+    "metionina": "Metionina (%)",
+    "calcio": "Calcio (%)",
+    "fosforo_disp": "Fósforo disponible (%)",
+    "sodio": "Sodio (%)",
+}
+# Edades (días) de cada fase, extremos incluidos.
+FASES = {
+    "inicio": (0, 10),
+    "crecimiento": (11, 24),
+    "finalizador": (25, DIA_MAX),
+}
+TOLERANCIA = 1e-9
+MAX_ITERACIONES = 500
+_MAX_CACHE = 4096
+_problemas = cache("problemas_dieta", max_entradas=16)
+
+
+def ingredientes_base():
+    """Ingredientes de referencia: precio (USD/kg), límites de inclusión (fracción) y composición."""
+    return pd.DataFrame({
+        "ingrediente": ["Maíz", "Torta de soya 46%", "Aceite de soya", "Afrecho de trigo",
+                        "Carbonato de calcio", "Fosfato dicálcico", "Sal", "DL-Metionina", "L-Lisina HCl"],
+        "precio_kg": [0.28, 0.48, 1.10, 0.20, 0.08, 0.70, 0.15, 4.00, 2.20],
+        "min_inclusion": [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+        "max_inclusion": [0.70, 0.45, 0.06, 0.10, 0.03, 0.03, 0.006, 0.005, 0.005],
+        "em_kcal": [3380, 2250, 8790, 1900, 0, 0, 0, 0, 0],
+        "proteina": [7.9, 46.0, 0.0, 15.5, 0.0, 0.0, 0.0, 58.4, 95.0],
+        "lisina": [0.24, 2.80, 0.0, 0.60, 0.0, 0.0, 0.0, 0.0, 78.0],
+        "metionina": [0.17, 0.62, 0.0, 0.23, 0.0, 0.0, 0.0, 99.0, 0.0],
+        "calcio": [0.03, 0.30, 0.0, 0.12, 38.0, 24.0, 0.0, 0.0, 0.0],
+        "fosforo_disp": [0.08, 0.20, 0.0, 0.30, 0.0, 18.5, 0.0, 0.0, 0.0],
+        "sodio": [0.02, 0.02, 0.0, 0.05, 0.0, 0.0, 39.0, 0.0, 0.0],
+    })
+
+
+def requisitos_base():
+    """Mínimos y máximos de nutrientes por fase (NaN = sin límite)."""
+    filas = [
+        ("inicio", "em_kcal", 3000, np.nan), ("inicio", "proteina", 22.0, np.nan),
+        ("inicio", "lisina", 1.32, np.nan), ("inicio", "metionina", 0.55, np.nan),
+        ("inicio", "calcio", 0.90, 1.00), ("inicio", "fosforo_disp", 0.45, np.nan),
+        ("inicio", "sodio", 0.18, 0.23),
+        ("crecimiento", "em_kcal", 3100, np.nan), ("crecimiento", "proteina", 20.0, np.nan),
+        ("crecimiento", "lisina", 1.18, np.nan), ("crecimiento", "metionina", 0.50, np.nan),
+        ("crecimiento", "calcio", 0.84, 0.95), ("crecimiento", "fosforo_disp", 0.42, np.nan),
+        ("crecimiento", "sodio", 0.16, 0.23),
+        ("finalizador", "em_kcal", 3200, np.nan), ("finalizador", "proteina", 18.0, np.nan),
+        ("finalizador", "lisina", 1.05, np.nan), ("finalizador", "metionina", 0.45, np.nan),
+        ("finalizador", "calcio", 0.76, 0.90), ("finalizador", "fosforo_disp", 0.38, np.nan),
+        ("finalizador", "sodio", 0.15, 0.23),
+    ]
+    return pd.DataFrame(filas, columns=["fase", "nutriente", "minimo", "maximo"])
+
+
+def preparar_ingredientes(ingredientes):
+    """Ingredientes con nombre y precio; composición vacía = 0 e inclusión vacía = sin límite.
+
+    Lanza `ValueError` si queda algún coeficiente no finito.
+    """
+    ingredientes = ingredientes.dropna(subset=["ingrediente", "precio_kg"]).fillna(
+        {"min_inclusion": 0.0, "max_inclusion": 1.0, **{n: 0.0 for n in NUTRIENTES}}
+    ).reset_index(drop=True)
+    columnas = ["precio_kg", "min_inclusion", "max_inclusion", *NUTRIENTES]
+    valores = ingredientes[columnas].apply(pd.to_numeric, errors="coerce")
+    malos = ~np.isfinite(valores.to_numpy(dtype=float)).all(axis=1)
+    if malos.any():
+        raise ValueError(f"Valores no numéricos en: {', '.join(map(str, ingredientes.loc[malos, 'ingrediente']))}")
+    ingredientes[columnas] = valores
+    return ingredientes
+
+
+def _forma_estandar(composicion, min_inclusion, max_inclusion, requisitos):
+    """Restricciones `A x = b`, `x >= 0` con una holgura por cada desigualdad.
+
+    Las primeras `n` columnas son los ingredientes; `b >= 0` en todas las filas.
+    """
+    if not (np.isfinite(composicion).all() and np.isfinite(min_inclusion).all()
+            and np.isfinite(max_inclusion).all()):
+        raise ValueError("La composición y los límites de inclusión deben ser numéricos")
+    n = composicion.shape[1]
+    # (coeficientes, lado derecho, signo de la holgura: -1 mínimo, +1 máximo, 0 igualdad)
+    restricciones = [(np.ones(n), 1.0, 0)]
+    for _, r in requisitos.iterrows():
+        fila = composicion[list(NUTRIENTES).index(r["nutriente"])]
+        if pd.notna(r["minimo"]):
+            restricciones.append((fila, float(r["minimo"]), -1))
+        if pd.notna(r["maximo"]):
+            restricciones.append((fila, float(r["maximo"]), 1))
+    identidad = np.eye(n)
+    for i in range(n):
+        if min_inclusion[i] > 0:
+            restricciones.append((identidad[i], float(min_inclusion[i]), -1))
+        if max_inclusion[i] < 1:
+            restricciones.append((identidad[i], float(max_inclusion[i]), 1))
+    filas, lados, signos = zip(*restricciones)
+    A = np.array(filas, dtype=float)
+    b = np.array(lados, dtype=float)
+    signos = np.array(signos)
+    con_holgura = np.flatnonzero(signos)
+    holguras = np.zeros((len(b), len(con_holgura)))
+    holguras[con_holgura, np.arange(len(con_holgura))] = signos[con_holgura]
+    A = np.hstack([A, holguras])
+    negativas = b < 0
+    A[negativas] *= -1
+    b[negativas] *= -1
+    return A, b
+
+
+def _simplex(A, b, c, base):
+    """Simplex revisado con la regla de Bland desde una base factible.
+
+    Devuelve la base óptima; lanza `ValueError` si el problema no es acotado.
+    """
+    base = list(base)
+    for _ in range(MAX_ITERACIONES):
+        B = A[:, base]
+        y = np.linalg.solve(B.T, c[base])
+        reducidos = c - y @ A
+        reducidos[base] = 0.0
+        candidatas = np.flatnonzero(reducidos < -TOLERANCIA)
+        if len(candidatas) == 0:
+            return base
+        entra = candidatas[0]
+        x_b = np.linalg.solve(B, b)
+        d = np.linalg.solve(B, A[:, entra])
+        positivas = d > TOLERANCIA
+        if not positivas.any():
+            raise ValueError("El problema de dieta no es acotado")
+        cocientes = np.full(len(d), np.inf)
+        cocientes[positivas] = x_b[positivas] / d[positivas]
+        empates = np.flatnonzero(cocientes <= cocientes.min() + TOLERANCIA)
+        sale = empates[np.argmin(np.asarray(base)[empates])]
+        base[sale] = entra
+    raise ValueError("El simplex no convergió")
+
+
+def _base_inicial(A, b):
+    """Base factible por fase 1 con variables artificiales.
+
+    Cada desigualdad tiene su holgura y la fila de suma no, así que `A` tiene
+    rango completo y toda artificial que quede básica en cero puede salir.
+    """
+    m, n = A.shape
+    A1 = np.hstack([A, np.eye(m)])
+    c1 = np.concatenate([np.zeros(n), np.ones(m)])
+    base = _simplex(A1, b, c1, list(range(n, n + m)))
+    if c1[base] @ np.linalg.solve(A1[:, base], b) > 1e-7:
+        raise ValueError("No existe una mezcla que cumpla los requisitos de la fase")
+    for pos in [p for p, j in enumerate(base) if j >= n]:
+        alfa = np.linalg.solve(A1[:, base].T, np.eye(m)[pos]) @ A
+        alfa[[j for j in base if j < n]] = 0.0
+        base[pos] = int(np.argmax(np.abs(alfa)))
+    return base
+
+
+class ProblemaDieta:
+    """Programa lineal de una fase con restricciones fijas y precios variables.
+
+    Guarda la última base óptima para arrancar en caliente y memoiza las
+    soluciones por vector de precios redondeado. Las instancias se comparten
+    entre sesiones, así que ambos estados se actualizan bajo un lock.
+    """
+
+    def __init__(self, composicion, min_inclusion, max_inclusion, requisitos):
+        self.n = composicion.shape[1]
+        A, b = _forma_estandar(composicion, min_inclusion, max_inclusion, requisitos)
+        self.A, self.b = A, b
+        self.base = _base_inicial(A, b)
+        self._soluciones = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _costos(self, precios):
+        precios = np.atleast_2d(np.asarray(precios, dtype=float))
+        return np.hstack([precios, np.zeros((len(precios), self.A.shape[1] - self.n))])
+
+    def _mezcla(self, base):
+        x = np.zeros(self.A.shape[1])
+        x[base] = np.linalg.solve(self.A[:, base], self.b)
+        return np.clip(x[:self.n], 0.0, None)
+
+    def resolver(self, precios):
+        """Proporciones óptimas (fracción por ingrediente) para un vector de precios."""
+        clave = tuple(np.round(np.asarray(precios, dtype=float), 6))
+        with self._lock:
+            if clave in self._soluciones:
+                self._soluciones.move_to_end(clave)
+                return self._soluciones[clave]
+            self.base = _simplex(self.A, self.b, self._costos(precios)[0], self.base)
+            mezcla = self._mezcla(self.base)
+            mezcla.setflags(write=False)
+            self._soluciones[clave] = mezcla
+            if len(self._soluciones) > _MAX_CACHE:
+                self._soluciones.popitem(last=False)
+        return mezcla
+
+    def resolver_lote(self, precios):
+        """Mezclas óptimas para una matriz `(escenarios, ingredientes)` de precios.
+
+        Devuelve `(costos, mezclas)`. Cada base visitada se prueba contra todos
+        los escenarios pendientes con un solo producto de matrices. Los
+        escenarios sin solución (precios no finitos, o el simplex no llega a
+        una base óptima para ellos) quedan en NaN en vez de reintentarse.
+        """
+        C = self._costos(precios)
+        mezclas = np.full((len(C), self.n), np.nan)
+        pendientes = np.flatnonzero(np.isfinite(C).all(axis=1))
+        resuelto = None
+        # Cada vuelta retira al menos el escenario pivoteado en la anterior
+        # (óptimo o atascado), así que hay como mucho `len(C)` vueltas y cada
+        # `_simplex` está acotado por `MAX_ITERACIONES` pivotes.
+        with self._lock:
+            while len(pendientes):
+                B = self.A[:, self.base]
+                y = np.linalg.solve(B.T, C[pendientes][:, self.base].T).T
+                reducidos = C[pendientes] - y @ self.A
+                optimos = (reducidos >= -TOLERANCIA).all(axis=1)
+                mezclas[pendientes[optimos]] = self._mezcla(self.base)
+                # El escenario recién pivoteado debe ser óptimo en su base: si
+                # no lo es, el simplex se estancó y no se vuelve a intentar.
+                atascado = pendientes == resuelto
+                pendientes = pendientes[~optimos & ~atascado]
+                if not len(pendientes):
+                    break
+                resuelto = pendientes[0]
+                try:
+                    self.base = _simplex(self.A, self.b, C[resuelto], self.base)
+                except ValueError:
+                    pendientes = pendientes[1:]
+                    resuelto = None
+        costos = np.einsum("ij,ij->i", mezclas, C[:, :self.n])
+        return costos, mezclas
+
+
+def _hash(*tablas):
+    h = hashlib.sha1()
+    for t in tablas:
+        h.update(",".join(map(str, t.columns)).encode())
+        h.update(pd.util.hash_pandas_object(t, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def problema_fase(ingredientes, requisitos, fase):
+    """`ProblemaDieta` de una fase, reutilizado mientras no cambien la
+    composición, los límites ni los requisitos (los precios no cuentan)."""
+    ingredientes = preparar_ingredientes(ingredientes)
+    req = requisitos[requisitos["fase"] == fase].reset_index(drop=True)
+    estructura = ingredientes.drop(columns=["precio_kg"]).reset_index(drop=True)
+    composicion = ingredientes[list(NUTRIENTES)].to_numpy(dtype=float).T
+    return _problemas.obtener((_hash(estructura, req), fase), lambda: ProblemaDieta(
+        composicion, ingredientes["min_inclusion"].to_numpy(dtype=float),
+        ingredientes["max_inclusion"].to_numpy(dtype=float), req
+    ))
+
+
+def formular(ingredientes, requisitos):
+    """Dieta de mínimo costo de cada fase.
+
+    Devuelve `(mezclas, precios)`: un DataFrame de inclusión (fracción) con
+    una columna por fase y una fila por ingrediente, y un dict
+    `{fase: USD/kg}`. Lanza `ValueError` si alguna fase no es factible.
+    """
+    ingredientes = preparar_ingredientes(ingredientes)
+    precios_kg = ingredientes["precio_kg"].to_numpy(dtype=float)
+    mezclas, precios = {}, {}
+    for fase in FASES:
+        mezcla = problema_fase(ingredientes, requisitos, fase).resolver(precios_kg)
+        mezclas[fase] = mezcla
+        precios[fase] = float(mezcla @ precios_kg)
+    return pd.DataFrame(mezclas, index=ingredientes["ingrediente"]), precios
+
+
+def aporte_nutrientes(ingredientes, mezclas):
+    """Nivel de cada nutriente que alcanza la mezcla de cada fase."""
+    composicion = ingredientes.set_index("ingrediente")[list(NUTRIENTES)].reindex(mezclas.index).fillna(0.0)
+    return composicion.T @ mezclas
+
+
+def precio_por_edad(precios_fase, n_dias=DIA_MAX + 1):
+    """Precio del alimento (USD/kg) para cada día de edad según su fase."""
+    precio = np.full(n_dias, np.nan)
+    for fase, (desde, hasta) in FASES.items():
+        precio[desde:hasta + 1] = precios_fase[fase]
+    return precio
+
+
+def precio_medio(precios_fase, consumo, edad_inicial, edad_salida):
+    """Precio medio del alimento ponderado por lo que se come en cada fase.
+
+    `consumo` es la curva diaria de consumo acumulado por ave.
+    """
+    consumo = np.asarray(consumo, dtype=float)
+    dia = np.diff(consumo)[edad_inicial:edad_salida]
+    precio = precio_por_edad(precios_fase, len(consumo))[edad_inicial + 1:edad_salida + 1]
+    total = dia.sum()
+    return float(dia @ precio / total) if total > 0 else float(precio.mean())
@@ -0,0 +1,186 @@
+"""Dinámica diaria de lotes: aves vivas, consumo, biomasa y costo de alimento.
+
+Cada lote es una fila y cada día de edad (0 a `DIA_MAX`) una columna; todo
+se calcula con operaciones sobre la matriz lotes x días. La mortalidad total
+del ciclo se reparte por día con una curva cargada en la primera semana, y
+el alimento de cada día lo comen las aves vivas al inicio de ese día, según
+el consumo diario de la curva genética.
+"""
+import numpy as np
+import pandas as pd
+
+from uywa.curvas import DIA_MAX, matriz_diaria
+
+# Parte de la mortalidad del ciclo que ocurre en los primeros 7 días.
+FRACCION_PRIMERA_SEMANA = 0.4
+# Decaimiento diario de la mortalidad dentro de la primera semana.
+DECAIMIENTO_PRIMERA_SEMANA = 0.8
+
+
+def _columna(x, n):
+    return np.broadcast_to(np.asarray(x, dtype=float).reshape(-1, 1), (n, 1))
+
+
+def pesos_mortalidad(edad_inicial, edad_salida, fraccion_primera_semana=FRACCION_PRIMERA_SEMANA,
+                     n_dias=DIA_MAX + 1):
+    """Fracción de la mortalidad del ciclo que ocurre cada día, forma `(lotes, n_dias)`.
+
+    Los días 1 a 7 del ciclo reciben `fraccion_primera_semana` con decaimiento
+    geométrico y el resto se reparte por igual hasta la salida; cada fila
+    suma 1. Con ciclos de 7 días o menos toda la mortalidad cae en ellos.
+    """
+    ei, es, fraccion = (
+        x.reshape(-1, 1) for x in np.broadcast_arrays(*(
+            np.asarray(x, dtype=float).ravel() for x in (edad_inicial, edad_salida, fraccion_primera_semana)
+        ))
+    )
+    k = np.arange(n_dias) - ei
+    largo = es - ei
+    n_semana = np.minimum(7, largo)
+    r = DECAIMIENTO_PRIMERA_SEMANA
+    potencias = r ** np.arange(n_dias)
+    geometrica = potencias[np.clip(k - 1, 0, n_dias - 1).astype(np.int64)]
+    fraccion = np.where(largo > 7, fraccion, 1.0)
+    geometrica *= fraccion * (1 - r) / (1 - r ** np.maximum(n_semana, 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resto = (1 - fraccion) / (largo - 7)
+    w = np.where(k <= n_semana, geometrica, resto)
+    w[(k < 1) | (k > largo)] = 0.0
+    return w
+
+
+def _perfiles_ciclo(edad_inicial, edad_salida, fraccion_primera_semana, n_lotes, n_dias):
+    """Perfiles diarios que solo dependen de (edad inicial, salida, fracción).
+
+    Los lotes suelen compartir pocas combinaciones, así que los perfiles se
+    calculan una vez por combinación y se reparten a cada lote por índice.
+    """
+    ei, es, fraccion = (
+        np.broadcast_to(np.asarray(x, dtype=float).ravel(), (n_lotes,))
+        for x in (edad_inicial, edad_salida, fraccion_primera_semana)
+    )
+    codigo_fraccion, fracciones = pd.factorize(fraccion)
+    clave = (ei.astype(np.int64) * n_dias + es.astype(np.int64)) * len(fracciones) + codigo_fraccion
+    inversa, unicas = pd.factorize(clave)
+    representante = np.empty(len(unicas), dtype=np.int64)
+    representante[inversa[::-1]] = np.arange(n_lotes)[::-1]
+    ei, es, fraccion = (x[representante].reshape(-1, 1) for x in (ei, es, fraccion))
+    dias = np.arange(n_dias)
+    w = pesos_mortalidad(ei, es, fraccion, n_dias)
+    perfiles = {
+        "w": w,
+        "acumulada": np.cumsum(w, axis=1),
+        "en_ciclo": ((dias >= ei) & (dias <= es)).astype(float),
+        "comiendo": ((dias > ei) & (dias <= es)).astype(float),
+    }
+    return perfiles, inversa
+
+
+def simular_dinamica(peso, consumo, aves_ini, mortalidad, edad_inicial, edad_salida,
+                     precio_alimento_kg, peso_final=None, consumo_total=None,
+                     fraccion_primera_semana=FRACCION_PRIMERA_SEMANA):
+    """Simula día a día un conjunto de lotes.
+
+    `peso` y `consumo` son las curvas diarias por ave (acumuladas desde el día
+    0) con forma `(lotes, días)` o `(días,)`. Si se dan `peso_final` o
+    `consumo_total`, la curva de cada lote se escala para terminar en ese
+    valor a `edad_salida`. `precio_alimento_kg` puede ser por lote o por
+    lote y día. Devuelve un dict con matrices `(lotes, días)` (`vivos`,
+    `muertes`, `alimento_dia`, `alimento_acum`, `biomasa`, `costo_alim_acum`)
+    y totales por lote (`aves_finales`, `alimento_total`, `costo_alim`,
+    `biomasa_final`).
+    """
+    peso = np.atleast_2d(np.asarray(peso, dtype=float))
+    consumo = np.atleast_2d(np.asarray(consumo, dtype=float))
+    por_lote = [aves_ini, mortalidad, edad_inicial, edad_salida, peso_final, consumo_total, fraccion_primera_semana]
+    (n_lotes,) = np.broadcast_shapes(
+        (peso.shape[0],), (consumo.shape[0],), *((np.size(x),) for x in por_lote if x is not None)
+    )
+    n_dias = peso.shape[1]
+    idx = np.arange(n_lotes)
+    fin = np.broadcast_to(np.asarray(edad_salida, dtype=np.int64).ravel(), (n_lotes,))
+    peso = np.broadcast_to(peso, (n_lotes, n_dias))
+    consumo = np.broadcast_to(consumo, (n_lotes, n_dias))
+    if peso_final is not None:
+        peso = peso * (_columna(peso_final, n_lotes) / peso[idx, fin].reshape(-1, 1))
+    if consumo_total is not None:
+        consumo = consumo * (_columna(consumo_total, n_lotes) / consumo[idx, fin].reshape(-1, 1))
+
+    perfiles, inversa = _perfiles_ciclo(edad_inicial, edad_salida, fraccion_primera_semana, n_lotes, n_dias)
+    aves = _columna(aves_ini, n_lotes)
+    bajas = aves * _columna(mortalidad, n_lotes) / 100
+    muertes = bajas * perfiles["w"][inversa]
+    vivos = (aves - bajas * perfiles["acumulada"][inversa]) * perfiles["en_ciclo"][inversa]
+
+    # Consumo del día t por las aves vivas al comenzar el día (vivos de t-1).
+    alimento_dia = np.empty((n_lotes, n_dias))
+    alimento_dia[:, 0] = 0.0
+    np.multiply(vivos[:, :-1], np.diff(consumo, axis=1), out=alimento_dia[:, 1:])
+    alimento_dia *= perfiles["comiendo"][inversa]
+    # Pasada la última edad de la curva el consumo es NaN; esos días no cuentan.
+    np.copyto(alimento_dia, 0.0, where=np.isnan(alimento_dia))
+    alimento_acum = np.cumsum(alimento_dia, axis=1)
+    precio = np.asarray(precio_alimento_kg, dtype=float)
+    if precio.ndim == 1 and precio.size == n_lotes:
+        precio = precio.reshape(-1, 1)
+    costo_alim_acum = np.cumsum(alimento_dia * precio, axis=1)
+    biomasa = vivos * peso
+    np.copyto(biomasa, 0.0, where=np.isnan(biomasa))
+
+    return {
+        "vivos": vivos,
+        "muertes": muertes,
+        "alimento_dia": alimento_dia,
+        "alimento_acum": alimento_acum,
+        "biomasa": biomasa,
+        "costo_alim_acum": costo_alim_acum,
+        "aves_finales": vivos[idx, fin],
+        "alimento_total": alimento_acum[idx, fin],
+        "costo_alim": costo_alim_acum[idx, fin],
+        "biomasa_final": biomasa[idx, fin],
+    }
+
+
+def simular_por_linea(curvas, lineas, aves_ini, mortalidad, edad_inicial, edad_salida,
+                      precio_alimento_kg, peso_final=None, consumo_total=None,
+                      fraccion_primera_semana=FRACCION_PRIMERA_SEMANA):
+    """`simular_dinamica` tomando las curvas de cada lote de `tabla_curvas` por su línea.
+
+    Los lotes de líneas desconocidas, o con edades fuera de su curva, quedan
+    con totales NaN.
+    """
+    nombres, pesos = matriz_diaria(curvas, "peso")
+    _, consumos = matriz_diaria(curvas, "consumo")
+    codigos = pd.Index(nombres).get_indexer(np.asarray(lineas, dtype=object))
+    validos = codigos >= 0
+    peso = pesos[np.maximum(codigos, 0)]
+    consumo = consumos[np.maximum(codigos, 0)]
+    if not validos.all():
+        peso[~validos] = np.nan
+        consumo[~validos] = np.nan
+    resultado = simular_dinamica(peso, consumo, aves_ini, mortalidad, edad_inicial, edad_salida,
+                                 precio_alimento_kg, peso_final, consumo_total, fraccion_primera_semana)
+    if not validos.all():
+        for k in ("alimento_total", "costo_alim", "biomasa_final"):
+            resultado[k][~validos] = np.nan
+    return resultado
+
+
+def alimento_por_edad_salida(df_linea, aves_ini, mortalidad, edad_inicial=0,
+                             fraccion_primera_semana=FRACCION_PRIMERA_SEMANA):
+    """Alimento total del lote (kg) si saliera a cada edad de `df_linea`.
+
+    Simula un lote por cada edad de salida posible en una sola matriz; las
+    edades hasta `edad_inicial` quedan en NaN.
+    """
+    edades = df_linea["edad"].to_numpy()
+    salidas = edades[edades > edad_inicial]
+    alimento = np.full(len(edades), np.nan)
+    if len(salidas):
+        resultado = simular_dinamica(
+            df_linea["peso"].to_numpy(dtype=float), df_linea["consumo"].to_numpy(dtype=float),
+            np.full(len(salidas), float(aves_ini)), mortalidad, edad_inicial, salidas, 0.0,
+            fraccion_primera_semana=fraccion_primera_semana
+        )
+        alimento[edades > edad_inicial] = resultado["alimento_total"]
+    return alimento
@@ -0,0 +1,325 @@
+"""Exportación en streaming a Excel, Parquet o CSV.
+
+Cada tabla a exportar es un DataFrame o un iterable de bloques
+(DataFrames con las mismas columnas); los bloques se escriben a disco a
+medida que se generan, así que exportar un millón de filas no arma el
+libro completo en memoria. Excel usa el modo de solo escritura de
+openpyxl y reparte en varias hojas las tablas que superan el límite de
+filas. Con varias tablas, CSV y Parquet se entregan como un ZIP con un
+archivo por tabla.
+
+`Exportacion` corre la escritura en un hilo de fondo y expone el progreso,
+para que la interfaz solo consulte su estado y ofrezca la descarga al final.
+"""
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+FORMATOS = {"xlsx": "Excel (.xlsx)", "parquet": "Parquet", "csv": "CSV"}
+MIME = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+    "zip": "application/zip",
+}
+TAM_BLOQUE = 50_000
+# Filas de datos por hoja de Excel (1 048 576 menos el encabezado).
+MAX_FILAS_HOJA = 1_048_575
+DIR_EXPORTACIONES = os.path.join(tempfile.gettempdir(), "uywa_exportaciones")
+# Las exportaciones no descargadas se borran pasado este tiempo.
+ANTIGUEDAD_MAX_S = 24 * 3600
+
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="uywa-exportar")
+
+
+def formato_archivo(ruta):
+    ext = os.path.splitext(ruta)[1].lower()
+    if ext in (".csv", ".txt"):
+        return "csv"
+    if ext in (".xlsx", ".xlsm"):
+        return "xlsx"
+    if ext in (".parquet", ".pq"):
+        return "parquet"
+    raise ValueError(f"Formato no soportado: {ruta}")
+
+
+def _nombre_hoja(nombre, parte):
+    # Excel no admite []:*?/\ en los nombres de hoja ni más de 31 caracteres.
+    nombre = re.sub(r"[\[\]:*?/\\]", "-", nombre)
+    sufijo = f" ({parte})" if parte > 1 else ""
+    return nombre[:31 - len(sufijo)] + sufijo
+
+
+class Escritor:
+    """Escribe bloques de resultados en CSV, Parquet o XLSX sin acumularlos.
+
+    En XLSX cada `hoja` distinta abre una hoja nueva, y una hoja que llega a
+    `MAX_FILAS_HOJA` filas sigue en "hoja (2)", "hoja (3)"...
+    """
+
+    def __init__(self, ruta, hoja="Datos"):
+        self.ruta = ruta
+        self.formato = formato_archivo(ruta)
+        self.hoja = hoja
+        self._destino = None
+        self._hoja = None
+        self._nombre_hoja = None
+        self._parte = 0
+        self._filas_hoja = 0
+        self._columnas = None
+
+    def escribir(self, df, hoja=None):
+        if self.formato == "csv":
+            df.to_csv(self.ruta, mode="a" if self._destino else "w", header=self._destino is None, index=False)
+            self._destino = True
+        elif self.formato == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._destino is None:
+                tabla = pa.Table.from_pandas(df, preserve_index=False)
+                self._destino = pq.ParquetWriter(self.ruta, tabla.schema)
+            else:
+                tabla = pa.Table.from_pandas(df, schema=self._destino.schema, preserve_index=False)
+            self._destino.write_table(tabla)
+        else:
+            self._escribir_xlsx(df, hoja or self.hoja)
+
+    def _nueva_hoja(self, nombre, columnas):
+        if nombre != self._nombre_hoja:
+            self._nombre_hoja, self._parte = nombre, 0
+        self._parte += 1
+        self._hoja = self._destino.create_sheet(_nombre_hoja(nombre, self._parte))
+        self._hoja.append(columnas)
+        self._columnas = columnas
+        self._filas_hoja = 0
+
+    def _escribir_xlsx(self, df, hoja):
+        if self._destino is None:
+            from openpyxl import Workbook
+
+            self._destino = Workbook(write_only=True)
+        columnas = [str(c) for c in df.columns]
+        if hoja != self._nombre_hoja:
+            self._nueva_hoja(hoja, columnas)
+        # NaN y NaT pasan a celdas vacías; openpyxl no los admite.
+        valores = df.astype(object).where(df.notna(), None)
+        inicio = 0
+        while inicio < len(valores):
+            if self._filas_hoja == MAX_FILAS_HOJA:
+                self._nueva_hoja(hoja, self._columnas)
+            fin = min(len(valores), inicio + MAX_FILAS_HOJA - self._filas_hoja)
+            for fila in valores.iloc[inicio:fin].itertuples(index=False, name=None):
+                self._hoja.append(fila)
+            self._filas_hoja += fin - inicio
+            inicio = fin
+
+    def cerrar(self):
+        if self.formato == "parquet" and self._destino is not None:
+            self._destino.close()
+        elif self.formato == "xlsx" and self._destino is not None:
+            self._destino.save(self.ruta)
+
+
+def bloques(df, tam_bloque=TAM_BLOQUE):
+    """Bloques de `tam_bloque` filas de un DataFrame en memoria."""
+    for inicio in range(0, max(len(df), 1), tam_bloque):
+        yield df.iloc[inicio:inicio + tam_bloque]
+
+
+def bloques_escenarios(almacen, tipo, tam_bloque=TAM_BLOQUE, **filtros):
+    """Escenarios guardados de `tipo` que cumplen `filtros`, leídos del almacén por páginas."""
+    desplazamiento = 0
+    while True:
+        bloque = almacen.leer(tipo, limite=tam_bloque, desplazamiento=desplazamiento, **filtros)
+        if len(bloque) == 0 and desplazamiento > 0:
+            return
+        yield bloque
+        if len(bloque) < tam_bloque:
+            return
+        desplazamiento += tam_bloque
+
+
+def bloques_grilla(coordenadas, margen, tam_bloque=TAM_BLOQUE):
+    """Grilla de sensibilidad en formato largo: una columna por eje y `margen_neto`.
+
+    `coordenadas` es el dict `{variable: valores}` de `grilla_margen`, en el
+    orden de los ejes de `margen`.
+    """
+    ejes = list(coordenadas.items())
+    plano = margen.reshape(-1)
+    for inicio in range(0, plano.size, tam_bloque):
+        indices = np.unravel_index(np.arange(inicio, min(inicio + tam_bloque, plano.size)), margen.shape)
+        bloque = {variable: valores[i] for (variable, valores), i in zip(ejes, indices)}
+        bloque["margen_neto"] = plano[inicio:inicio + tam_bloque]
+        yield pd.DataFrame(bloque)
+
+
+def resumen_riesgo(resultado):
+    """Tablas de una simulación Monte Carlo: estadísticos y el histograma fino."""
+    estadisticos = pd.DataFrame([{
+        k: resultado[k] for k in ("n_sorteos", "media", "desv", "min", "p5", "p50", "p95", "max", "prob_perdida")
+    }])
+    bordes, conteos = resultado["bordes"], resultado["conteos"]
+    histograma = pd.DataFrame({
+        "margen_desde": bordes[:-1],
+        "margen_hasta": bordes[1:],
+        "conteo": conteos,
+        "probabilidad": conteos / resultado["n_sorteos"],
+    })
+    return {"Resumen": estadisticos, "Histograma": histograma}
+
+
+def curvas_diarias(curvas):
+    """Curvas diarias de todas las líneas en una sola tabla larga."""
+    return pd.concat(
+        [df.assign(linea=linea)[["linea", *df.columns]] for linea, df in curvas.items()], ignore_index=True
+    )
+
+
+def _como_bloques(tabla, tam_bloque):
+    return bloques(tabla, tam_bloque) if isinstance(tabla, pd.DataFrame) else tabla
+
+
+def exportar(tablas, ruta, tam_bloque=TAM_BLOQUE, al_escribir=None):
+    """Escribe `{nombre: DataFrame o iterable de bloques}` en `ruta`; devuelve las filas escritas.
+
+    Con XLSX cada tabla va en su hoja. Con CSV o Parquet y una sola tabla,
+    `ruta` es ese archivo; con varias, `ruta` debe terminar en `.zip` y el
+    formato se toma de la extensión de `ruta` sin el `.zip` (p. ej.
+    `escenarios.csv.zip`). `al_escribir(filas)` se llama tras cada bloque.
+    """
+    filas = 0
+
+    def escribir(escritor, tabla, hoja=None):
+        nonlocal filas
+        for bloque in _como_bloques(tabla, tam_bloque):
+            escritor.escribir(bloque, hoja)
+            filas += len(bloque)
+            if al_escribir:
+                al_escribir(filas)
+
+    if not ruta.lower().endswith(".zip"):
+        escritor = Escritor(ruta)
+        try:
+            if escritor.formato != "xlsx" and len(tablas) > 1:
+                raise ValueError("Varias tablas en CSV o Parquet se exportan como .zip")
+            for nombre, tabla in tablas.items():
+                escribir(escritor, tabla, nombre)
+        finally:
+            escritor.cerrar()
+        return filas
+
+    ext = os.path.splitext(ruta[:-4])[1]
+    directorio = tempfile.mkdtemp(dir=os.path.dirname(ruta) or None)
+    try:
+        with zipfile.ZipFile(ruta, "w", zipfile.ZIP_DEFLATED) as zf:
+            for nombre, tabla in tablas.items():
+                archivo = os.path.join(directorio, re.sub(r"[^\w\-. ]", "_", nombre) + ext)
+                escritor = Escritor(archivo)
+                try:
+                    escribir(escritor, tabla)
+                finally:
+                    escritor.cerrar()
+                zf.write(archivo, os.path.basename(archivo))
+                os.remove(archivo)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return filas
+
+
+def limpiar(antiguedad_max_s=ANTIGUEDAD_MAX_S, directorio=DIR_EXPORTACIONES):
+    """Borra las exportaciones de `directorio` más viejas que `antiguedad_max_s`."""
+    if not os.path.isdir(directorio):
+        return
+    limite = time.time() - antiguedad_max_s
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        try:
+            if os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+        except OSError:
+            pass
+
+
+class Exportacion:
+    """Exportación que se escribe en un hilo de fondo.
+
+    `tablas` se consume en ese hilo: los bloques que lee del almacén o
+    genera a partir de grillas no pasan por el hilo de la interfaz.
+    `total` (filas) es opcional y solo sirve para mostrar el progreso.
+    """
+
+    def __init__(self, tablas, nombre, formato, total=None, tam_bloque=TAM_BLOQUE,
+                 directorio=DIR_EXPORTACIONES):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato}")
+        os.makedirs(directorio, exist_ok=True)
+        limpiar(directorio=directorio)
+        comprimido = formato != "xlsx" and len(tablas) > 1
+        self.nombre_archivo = f"{nombre}.{formato}" + (".zip" if comprimido else "")
+        self.mime = MIME["zip" if comprimido else formato]
+        descriptor, self.ruta = tempfile.mkstemp(suffix="_" + self.nombre_archivo, dir=directorio)
+        os.close(descriptor)
+        self.total = total
+        self.filas = 0
+        self.inicio = time.perf_counter()
+        self.duracion = None
+        self._cancelada = False
+        self._futuro = _pool.submit(self._generar, tablas, tam_bloque)
+
+    def _generar(self, tablas, tam_bloque):
+        try:
+            exportar(tablas, self.ruta, tam_bloque, al_escribir=self._avanzar)
+        except BaseException:
+            self._borrar()
+            raise
+        finally:
+            self.duracion = time.perf_counter() - self.inicio
+
+    def _avanzar(self, filas):
+        if self._cancelada:
+            raise RuntimeError("Exportación cancelada")
+        self.filas = filas
+
+    def listo(self):
+        return self._futuro.done()
+
+    def error(self):
+        """Excepción de la escritura, o None si terminó bien (o no ha terminado)."""
+        return self._futuro.exception() if self.listo() else None
+
+    def progreso(self):
+        """Fracción escrita en [0, 1], o None si no se conoce el total."""
+        if self.listo():
+            return 1.0
+        if not self.total:
+            return None
+        return min(self.filas / self.total, 1.0)
+
+    def tamano_mb(self):
+        return os.path.getsize(self.ruta) / 2**20 if os.path.exists(self.ruta) else 0.0
+
+    def contenido(self):
+        """Bytes del archivo generado; se leen recién al pedir la descarga."""
+        with open(self.ruta, "rb") as f:
+            return f.read()
+
+    def descartar(self):
+        """Detiene la exportación (en el siguiente bloque) y borra el archivo."""
+        self._cancelada = True
+        self._futuro.cancel()
+        self._borrar()
+
+    def _borrar(self):
+        try:
+            os.remove(self.ruta)
+        except OSError:
+            pass
@@ -0,0 +1,220 @@
+"""Portafolio de galpones: ciclos escalonados y flujo de caja en el calendario.
+
+Cada galpón repite ciclos (colocación, crianza hasta la edad de salida y
+vacío sanitario) desde su primera colocación hasta el fin del calendario.
+Todos los ciclos de todos los galpones se simulan juntos con
+`uywa.dinamica` (una fila por ciclo) y sus valores diarios se proyectan al
+calendario con `np.bincount`, de modo que el costo no depende del número de
+galpones sino del total de días-ciclo. Los resúmenes semanales o mensuales
+son remuestreos de pandas sobre la serie diaria.
+"""
+import numpy as np
+import pandas as pd
+
+from uywa.curvas import DIA_MAX, valores_en_edad
+from uywa.dinamica import FRACCION_PRIMERA_SEMANA, simular_por_linea
+from uywa.kpis import _dividir, calcular_kpis
+
+COLUMNAS_GALPONES = {
+    "galpon": "Galpón",
+    "linea": "Línea",
+    "aves_ini": "Aves por ciclo",
+    "mortalidad": "Mortalidad (%)",
+    "edad_salida": "Edad de salida (días)",
+    "dias_vacio": "Días de vacío",
+    "primera_colocacion": "Primera colocación",
+    "otros_costos": "Otros costos por ave (USD)",
+}
+VARIABLES_DIARIAS = {
+    "aves": "Inventario de aves",
+    "galpones_ocupados": "Galpones ocupados",
+    "alimento_kg": "Demanda de alimento (kg)",
+    "carne_kg": "Carne producida (kg)",
+    "ingresos": "Ingresos (USD)",
+    "costo_alimento": "Costo de alimento (USD)",
+    "otros_costos": "Otros costos (USD)",
+    "flujo_caja": "Flujo de caja (USD)",
+    "flujo_acumulado": "Flujo de caja acumulado (USD)",
+}
+# Cómo se resume cada variable diaria al remuestrear: existencias en
+# promedio, flujos sumados y el acumulado al cierre del período.
+AGREGACION = {
+    "aves": "mean",
+    "galpones_ocupados": "mean",
+    "alimento_kg": "sum",
+    "carne_kg": "sum",
+    "ingresos": "sum",
+    "costo_alimento": "sum",
+    "otros_costos": "sum",
+    "flujo_caja": "sum",
+    "flujo_acumulado": "last",
+}
+FRECUENCIAS = {"Diaria": "D", "Semanal": "W", "Mensual": "MS"}
+
+
+def galpones_ejemplo(n_galpones, inicio, lineas, escalonamiento=7, aves_ini=20_000,
+                     edad_salida=42, dias_vacio=14):
+    """Tabla de `n_galpones` con colocaciones escalonadas cada `escalonamiento` días
+    y las líneas repartidas en rotación."""
+    i = np.arange(n_galpones)
+    periodo = edad_salida + dias_vacio
+    return pd.DataFrame({
+        "galpon": [f"G{k + 1:03d}" for k in i],
+        "linea": np.asarray(lineas, dtype=object)[i % len(lineas)],
+        "aves_ini": aves_ini,
+        "mortalidad": 5.0,
+        "edad_salida": edad_salida,
+        "dias_vacio": dias_vacio,
+        "primera_colocacion": pd.Timestamp(inicio) + pd.to_timedelta((i * escalonamiento) % periodo, unit="D"),
+        "otros_costos": 0.5,
+    })
+
+
+def trayectoria_precios(anclas, calendario):
+    """Precios diarios sobre `calendario` interpolando en el tiempo una tabla de
+    anclas (`fecha`, `precio_venta_kg`, `precio_alimento_kg`); fuera de las
+    anclas se mantiene el precio más cercano."""
+    anclas = anclas.dropna(subset=["fecha"]).assign(fecha=lambda d: pd.to_datetime(d["fecha"]))
+    anclas = anclas.groupby("fecha")[["precio_venta_kg", "precio_alimento_kg"]].mean()
+    if anclas.empty:
+        raise ValueError("La trayectoria de precios no tiene fechas")
+    indice = anclas.index.union(calendario)
+    diaria = anclas.reindex(indice).interpolate(method="time").ffill().bfill()
+    return diaria.reindex(calendario)
+
+
+def ciclos_portafolio(galpones, inicio, fin, edad_inicial=0):
+    """Un registro por ciclo de cada galpón con colocación dentro del calendario.
+
+    `dia_colocacion` y `dia_salida` son índices de día desde `inicio`.
+    """
+    inicio, fin = pd.Timestamp(inicio), pd.Timestamp(fin)
+    n_cal = (fin - inicio).days + 1
+    g = galpones.reset_index(drop=True)
+    edad_salida = g["edad_salida"].to_numpy(dtype=np.int64)
+    if ((edad_salida <= edad_inicial) | (edad_salida > DIA_MAX)).any():
+        raise ValueError(f"Las edades de salida deben estar entre {edad_inicial + 1} y {DIA_MAX} días")
+    periodo = edad_salida - edad_inicial + np.maximum(g["dias_vacio"].to_numpy(dtype=np.int64), 0)
+    primera = (pd.to_datetime(g["primera_colocacion"]) - inicio).dt.days.to_numpy()
+    n_ciclos = np.where(primera < n_cal, (n_cal - 1 - primera) // periodo + 1, 0)
+    # Los ciclos anteriores al inicio que terminan antes de él no aportan nada.
+    largo = edad_salida - edad_inicial
+    saltar = np.where(primera < 0, np.maximum(-((primera + largo) // periodo), 0), 0)
+    n_ciclos = np.maximum(n_ciclos - saltar, 0)
+
+    fila = np.repeat(np.arange(len(g)), n_ciclos)
+    inicio_fila = np.cumsum(n_ciclos) - n_ciclos
+    k = np.arange(len(fila)) - inicio_fila[fila] + saltar[fila]
+    ciclos = g.iloc[fila].reset_index(drop=True)
+    ciclos["ciclo"] = k + 1
+    ciclos["dia_colocacion"] = primera[fila] + k * periodo[fila]
+    ciclos["dia_salida"] = ciclos["dia_colocacion"] + edad_salida[fila] - edad_inicial
+    ciclos["colocacion"] = inicio + pd.to_timedelta(ciclos["dia_colocacion"], unit="D")
+    ciclos["salida"] = inicio + pd.to_timedelta(ciclos["dia_salida"], unit="D")
+    ciclos["completo"] = ciclos["dia_salida"] < n_cal
+    return ciclos
+
+
+def simular_portafolio(galpones, curvas, precios, inicio, fin, edad_inicial=0,
+                       fraccion_primera_semana=FRACCION_PRIMERA_SEMANA):
+    """Simula todos los ciclos de `galpones` sobre el calendario `inicio`–`fin`.
+
+    `precios` es la tabla diaria de `trayectoria_precios`: cada día de un
+    ciclo paga el alimento a su precio y la venta se valora al precio del día
+    de salida. Devuelve `(ciclos, diario)`: los KPIs de cada ciclo
+    (`calcular_kpis` con el alimento integrado) y la serie diaria de
+    inventario, alimento, carne y flujo de caja del portafolio.
+    """
+    calendario = pd.date_range(inicio, fin, freq="D")
+    n_cal = len(calendario)
+    desconocidas = sorted(set(galpones["linea"]) - set(curvas))
+    if desconocidas:
+        raise ValueError(f"Líneas sin curva genética: {desconocidas}")
+    # Más allá de la última edad de la curva el peso y el consumo son NaN, y
+    # el ciclo perdería sus ingresos en el flujo de caja pero no su alimento.
+    ultima_edad = galpones["linea"].map({linea: int(curvas[linea].index[-1]) for linea in curvas})
+    pasados = galpones[galpones["edad_salida"].to_numpy(dtype=float) > ultima_edad.to_numpy(dtype=float)]
+    if len(pasados):
+        detalle = ", ".join(
+            f"{fila.galpon} ({fila.linea}: {int(fila.edad_salida)} > {int(ultima_edad[i])} días)"
+            for i, fila in zip(pasados.index, pasados.itertuples())
+        )
+        raise ValueError(f"Edad de salida posterior a la última edad de la curva: {detalle}")
+    ciclos = ciclos_portafolio(galpones, inicio, fin, edad_inicial)
+    pv = precios["precio_venta_kg"].to_numpy(dtype=float)
+    pa = precios["precio_alimento_kg"].to_numpy(dtype=float)
+
+    colocacion = ciclos["dia_colocacion"].to_numpy()
+    salida = ciclos["dia_salida"].to_numpy()
+    edad_salida = ciclos["edad_salida"].to_numpy(dtype=np.int64)
+    aves_ini = ciclos["aves_ini"].to_numpy(dtype=float)
+    mortalidad = ciclos["mortalidad"].to_numpy(dtype=float)
+    lineas = ciclos["linea"].to_numpy(dtype=object)
+
+    # Día del calendario de cada celda ciclo x edad, y su precio de alimento.
+    dia = colocacion[:, None] + np.arange(DIA_MAX + 1) - edad_inicial
+    dentro = (dia >= 0) & (dia < n_cal)
+    dinamica = simular_por_linea(
+        curvas, lineas, aves_ini, mortalidad, edad_inicial, edad_salida,
+        pa[np.clip(dia, 0, n_cal - 1)], fraccion_primera_semana=fraccion_primera_semana
+    )
+
+    peso_final = valores_en_edad(curvas, "peso", lineas, edad_salida)
+    precio_venta = pv[np.clip(salida, 0, n_cal - 1)]
+    kpis = calcular_kpis(
+        peso_final=peso_final, consumo_total=valores_en_edad(curvas, "consumo", lineas, edad_salida),
+        aves_ini=aves_ini, mortalidad=mortalidad,
+        precio_alimento_kg=_dividir(dinamica["costo_alim"], dinamica["alimento_total"]),
+        precio_venta_kg=precio_venta, edad_salida=edad_salida, edad_inicial=edad_inicial,
+        peso_inicial=valores_en_edad(curvas, "peso", lineas, np.full(len(ciclos), edad_inicial)),
+        otros_costos=ciclos["otros_costos"].to_numpy(dtype=float),
+        alimento_total=dinamica["alimento_total"]
+    )
+    for k, v in kpis.items():
+        ciclos[k] = np.broadcast_to(v, len(ciclos))
+    ciclos["precio_venta_kg"] = precio_venta
+
+    def al_calendario(dias, valores):
+        return np.bincount(dias, weights=valores, minlength=n_cal)[:n_cal]
+
+    celdas = dia[dentro]
+    costo_dia = np.diff(dinamica["costo_alim_acum"], axis=1, prepend=0.0)
+    # Los ciclos que empezaron antes del inicio venden y colocan fuera del calendario.
+    vende = (salida >= 0) & (salida < n_cal)
+    coloca = (colocacion >= 0) & (colocacion < n_cal)
+    diario = pd.DataFrame({
+        "aves": al_calendario(celdas, dinamica["vivos"][dentro]),
+        "galpones_ocupados": al_calendario(celdas, (dinamica["vivos"] > 0)[dentro]),
+        "alimento_kg": al_calendario(celdas, dinamica["alimento_dia"][dentro]),
+        "carne_kg": al_calendario(salida[vende], ciclos["prod_total"].to_numpy()[vende]),
+        "ingresos": al_calendario(salida[vende], ciclos["ingreso_bruto"].to_numpy()[vende]),
+        "costo_alimento": al_calendario(celdas, costo_dia[dentro]),
+        "otros_costos": al_calendario(
+            colocacion[coloca], (aves_ini * ciclos["otros_costos"].to_numpy(dtype=float))[coloca]
+        ),
+    }, index=calendario)
+    diario.index.name = "fecha"
+    diario["flujo_caja"] = diario["ingresos"] - diario["costo_alimento"] - diario["otros_costos"]
+    diario["flujo_acumulado"] = diario["flujo_caja"].cumsum()
+    return ciclos, diario
+
+
+def resumir_calendario(diario, frecuencia="MS"):
+    """Remuestrea la serie diaria del portafolio (`D`, `W`, `MS`, ...)."""
+    if frecuencia == "D":
+        return diario
+    return diario.resample(frecuencia).agg(AGREGACION)
+
+
+def resumen_por(ciclos, clave="galpon"):
+    """Totales de los ciclos completos agrupados por galpón o por línea."""
+    completos = ciclos[ciclos["completo"]]
+    return completos.groupby(clave, observed=True).agg(
+        ciclos=("ciclo", "size"),
+        aves_vendidas=("aves_finales", "sum"),
+        carne_kg=("prod_total", "sum"),
+        costo_alimento=("costo_alim", "sum"),
+        ingresos=("ingreso_bruto", "sum"),
+        margen_neto=("margen_neto", "sum"),
+        fcr=("fcr", "mean"),
+    )
@@ -0,0 +1,109 @@
+"""KPIs productivos y económicos de un lote de pollos de engorde.
+
+Todas las funciones aceptan escalares, arrays de NumPy o columnas de un
+DataFrame y se evalúan con broadcasting, de modo que N escenarios se
+resuelven en una sola pasada. Las divisiones conservan las mismas guardas
+que usaba la app: FCR es NaN si el peso es 0; GDP, IEP, consumo diario,
+margen por ave y rentabilidad valen 0 cuando su denominador no es positivo.
+"""
+import numpy as np
+import pandas as pd
+
+# Columnas que espera `kpis_dataframe` y sus valores por defecto.
+COLUMNAS_ENTRADA = {
+    "peso_final": None,
+    "consumo_total": None,
+    "aves_ini": None,
+    "mortalidad": 0.0,
+    "precio_alimento_kg": None,
+    "precio_venta_kg": None,
+    "edad_salida": None,
+    "edad_inicial": 0,
+    "peso_inicial": 0.04,
+    "otros_costos": 0.0,
+    "alimento_total": None,
+}
+
+
+def _dividir(num, den, defecto=0.0):
+    """`num / den` donde `den > 0`; `defecto` en el resto (incluye NaN)."""
+    num, den = np.broadcast_arrays(np.asarray(num, dtype=float), np.asarray(den, dtype=float))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / den, defecto)
+
+
+def margen_neto(peso_final, consumo_total, aves_ini, mortalidad,
+                precio_alimento_kg, precio_venta_kg, otros_costos=0.0):
+    """Margen neto (USD) con el mínimo de temporales; útil para barridos grandes."""
+    aves_ini = np.asarray(aves_ini, dtype=float)
+    aves_finales = aves_ini * (1 - np.asarray(mortalidad, dtype=float) / 100)
+    ingreso = (aves_finales * peso_final) * precio_venta_kg
+    costo = (aves_ini * consumo_total) * precio_alimento_kg + aves_ini * otros_costos
+    return ingreso - costo
+
+
+def calcular_kpis(peso_final, consumo_total, aves_ini, mortalidad,
+                  precio_alimento_kg, precio_venta_kg, edad_salida=None,
+                  edad_inicial=0, peso_inicial=0.04, otros_costos=0.0,
+                  alimento_total=None):
+    """Devuelve un dict con todos los KPIs como arrays de NumPy.
+
+    Los KPIs dependientes de la edad (`gdp`, `consumo_diario`, `iep`) solo
+    se calculan si se indica `edad_salida`. Si se indica `alimento_total`
+    (kg consumidos por el lote, p. ej. integrados día a día con la
+    mortalidad), el costo de alimento se calcula con él en lugar de
+    `consumo_total * aves_ini`.
+    """
+    peso_final = np.asarray(peso_final, dtype=float)
+    consumo_total = np.asarray(consumo_total, dtype=float)
+    aves_ini = np.asarray(aves_ini, dtype=float)
+    mortalidad = np.asarray(mortalidad, dtype=float)
+
+    aves_finales = aves_ini * (1 - mortalidad / 100)
+    prod_total = aves_finales * peso_final
+    if alimento_total is None:
+        costo_alim = consumo_total * aves_ini * precio_alimento_kg
+    else:
+        costo_alim = np.asarray(alimento_total, dtype=float) * precio_alimento_kg
+    costo_total = costo_alim + aves_ini * otros_costos
+    ingreso_bruto = prod_total * precio_venta_kg
+    margen = ingreso_bruto - costo_total
+    fcr_real = _dividir(consumo_total, peso_final, np.nan)
+
+    kpis = {
+        "aves_finales": aves_finales,
+        "fcr": fcr_real,
+        "prod_total": prod_total,
+        "costo_alim": costo_alim,
+        "costo_total": costo_total,
+        "ingreso_bruto": ingreso_bruto,
+        "margen_neto": margen,
+        "margen_ave": _dividir(margen, aves_finales),
+        "rentabilidad": _dividir(margen, costo_total) * 100,
+    }
+    if edad_salida is not None:
+        edad_salida = np.asarray(edad_salida, dtype=float)
+        dias = edad_salida - np.asarray(edad_inicial, dtype=float)
+        kpis["gdp"] = _dividir(peso_final - peso_inicial, dias)
+        kpis["consumo_diario"] = _dividir(consumo_total, edad_salida)
+        supervivencia = _dividir(aves_finales, aves_ini)
+        kpis["iep"] = _dividir(peso_final * supervivencia * 100, edad_salida * fcr_real)
+    return kpis
+
+
+def kpis_dataframe(df):
+    """Evalúa `calcular_kpis` sobre las columnas de `df` (una fila por escenario).
+
+    Las columnas opcionales de `COLUMNAS_ENTRADA` que falten toman su valor
+    por defecto; las obligatorias que falten levantan `KeyError`.
+    """
+    args = {}
+    for col, defecto in COLUMNAS_ENTRADA.items():
+        if col in df.columns:
+            args[col] = df[col].to_numpy(dtype=float)
+        elif defecto is not None or col in ("edad_salida", "alimento_total"):
+            args[col] = defecto
+        else:
+            raise KeyError(f"Falta la columna obligatoria '{col}'")
+    kpis = calcular_kpis(**args)
+    return pd.DataFrame({k: np.broadcast_to(v, len(df)) for k, v in kpis.items()}, index=df.index)
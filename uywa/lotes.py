@@ -0,0 +1,208 @@
+"""Procesamiento por lotes: puntúa archivos de lotes reales sin la interfaz.
+
+Lee CSV, XLSX o Parquet por bloques, calcula todos los KPIs productivos y
+económicos de cada fila, reparte los bloques entre un pool de procesos y
+escribe los resultados en streaming, sin cargar el archivo completo.
+
+Uso:
+    python -m uywa.lotes entrada.xlsx salida.parquet [--genetica tabla.csv]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from uywa.curvas import DIA_MAX, PESO_NACIMIENTO, genetica_base, tabla_curvas, valores_en_edad
+from uywa.dinamica import simular_por_linea
+from uywa.exportar import Escritor, formato_archivo
+from uywa.kpis import calcular_kpis
+
+TAM_BLOQUE = 100_000
+# Lotes por matriz lotes x días en la dinámica diaria (acota la memoria).
+TAM_DINAMICA = 10_000
+COLUMNAS_OBLIGATORIAS = ["linea", "edad_salida", "aves_ini", "precio_alimento_kg", "precio_venta_kg"]
+DEFECTOS = {"edad_inicial": 0, "mortalidad": 0.0, "otros_costos": 0.0}
+# Nombres alternativos aceptados (los de los escenarios guardados en la app).
+ALIAS = {
+    "edad_ini": "edad_inicial",
+    "edad_fin": "edad_salida",
+    "peso_fin": "peso_final",
+    "consumo": "consumo_total",
+    "peso_ini": "peso_inicial",
+}
+
+
+def leer_bloques(ruta, tam_bloque=TAM_BLOQUE, hoja=None):
+    """Genera DataFrames de hasta `tam_bloque` filas leídos en streaming."""
+    formato = formato_archivo(ruta)
+    if formato == "csv":
+        yield from pd.read_csv(ruta, chunksize=tam_bloque)
+    elif formato == "parquet":
+        import pyarrow.parquet as pq
+
+        for lote in pq.ParquetFile(ruta).iter_batches(batch_size=tam_bloque):
+            yield lote.to_pandas()
+    else:
+        from openpyxl import load_workbook
+
+        libro = load_workbook(ruta, read_only=True, data_only=True)
+        try:
+            filas = (libro[hoja] if hoja else libro.active).iter_rows(values_only=True)
+            encabezado = next(filas, None)
+            if encabezado is None:
+                raise ValueError(f"La hoja '{hoja or libro.active.title}' está vacía: falta la fila de encabezados")
+            encabezado = [str(c).strip() for c in encabezado]
+            bloque = []
+            for fila in filas:
+                bloque.append(fila)
+                if len(bloque) == tam_bloque:
+                    yield pd.DataFrame(bloque, columns=encabezado)
+                    bloque = []
+            if bloque:
+                yield pd.DataFrame(bloque, columns=encabezado)
+        finally:
+            libro.close()
+
+
+def _alimento_integrado(df, curvas):
+    """Alimento del lote (kg) integrado día a día sobre las aves vivas.
+
+    Donde la línea no está en las curvas o las edades no caben en ellas se
+    usa `consumo_total * aves_ini`.
+    """
+    ei = df["edad_inicial"].to_numpy(dtype=float)
+    es = df["edad_salida"].to_numpy(dtype=float)
+    validas = (ei >= 0) & (es > ei) & (es <= DIA_MAX)
+    ei = np.where(validas, ei, 0).astype(np.int64)
+    es = np.where(validas, es, 1).astype(np.int64)
+    columnas = {c: df[c].to_numpy(dtype=float) for c in ("aves_ini", "mortalidad", "peso_final", "consumo_total")}
+    lineas = df["linea"].to_numpy(dtype=object)
+    alimento = columnas["consumo_total"] * columnas["aves_ini"]
+    integrado = np.empty(len(df))
+    for i in range(0, len(df), TAM_DINAMICA):
+        t = slice(i, i + TAM_DINAMICA)
+        integrado[t] = simular_por_linea(
+            curvas, lineas[t], columnas["aves_ini"][t], columnas["mortalidad"][t], ei[t], es[t], 0.0,
+            peso_final=columnas["peso_final"][t], consumo_total=columnas["consumo_total"][t]
+        )["alimento_total"]
+    usar = validas & np.isfinite(integrado) & np.isfinite(alimento)
+    alimento[usar] = integrado[usar]
+    return alimento
+
+
+def puntuar_bloque(df, curvas):
+    """Añade a `df` los KPIs de cada lote; completa peso y consumo con la curva
+    de la línea cuando faltan."""
+    df = df.rename(columns=ALIAS)
+    faltan = [c for c in COLUMNAS_OBLIGATORIAS if c not in df.columns]
+    if faltan:
+        raise KeyError(f"Faltan columnas obligatorias: {faltan}")
+    for col, defecto in DEFECTOS.items():
+        df[col] = df[col].fillna(defecto) if col in df.columns else defecto
+
+    for col, variable, edad in (("peso_final", "peso", "edad_salida"),
+                                ("consumo_total", "consumo", "edad_salida"),
+                                ("peso_inicial", "peso", "edad_inicial")):
+        desde_curva = valores_en_edad(curvas, variable, df["linea"], df[edad])
+        if col == "peso_inicial":
+            desde_curva = np.where(np.isnan(desde_curva), PESO_NACIMIENTO, desde_curva)
+        df[col] = df[col].fillna(pd.Series(desde_curva, index=df.index)) if col in df.columns else desde_curva
+
+    alimento = _alimento_integrado(df, curvas)
+    kpis = calcular_kpis(
+        peso_final=df["peso_final"], consumo_total=df["consumo_total"],
+        aves_ini=df["aves_ini"], mortalidad=df["mortalidad"],
+        precio_alimento_kg=df["precio_alimento_kg"], precio_venta_kg=df["precio_venta_kg"],
+        edad_salida=df["edad_salida"], edad_inicial=df["edad_inicial"],
+        peso_inicial=df["peso_inicial"], otros_costos=df["otros_costos"],
+        alimento_total=alimento
+    )
+    for k, v in kpis.items():
+        df[k] = np.broadcast_to(v, len(df))
+    return df
+
+
+# Estado de cada proceso del pool: las curvas se construyen una vez por proceso.
+_curvas_proceso = None
+
+
+def _iniciar_proceso(df_genetica):
+    global _curvas_proceso
+    _curvas_proceso = tabla_curvas(df_genetica)
+
+
+def _puntuar_en_proceso(df):
+    return puntuar_bloque(df, _curvas_proceso)
+
+
+def procesar_archivo(entrada, salida, df_genetica=None, tam_bloque=TAM_BLOQUE,
+                     procesos=None, hoja=None):
+    """Puntúa `entrada` y escribe `salida`; devuelve el número de filas procesadas.
+
+    Se mantienen como máximo `2 * procesos` bloques en vuelo y los resultados
+    se escriben en el orden de entrada. Con `procesos=1` todo corre en el
+    proceso actual.
+    """
+    df_genetica = genetica_base() if df_genetica is None else df_genetica
+    procesos = procesos or os.cpu_count() or 1
+    escritor = Escritor(salida, hoja="KPIs")
+    filas = 0
+    try:
+        if procesos == 1:
+            curvas = tabla_curvas(df_genetica)
+            for bloque in leer_bloques(entrada, tam_bloque, hoja):
+                escritor.escribir(puntuar_bloque(bloque, curvas))
+                filas += len(bloque)
+            return filas
+        with ProcessPoolExecutor(procesos, initializer=_iniciar_proceso, initargs=(df_genetica,)) as pool:
+            en_vuelo = deque()
+            for bloque in leer_bloques(entrada, tam_bloque, hoja):
+                en_vuelo.append(pool.submit(_puntuar_en_proceso, bloque))
+                if len(en_vuelo) >= 2 * procesos:
+                    resultado = en_vuelo.popleft().result()
+                    escritor.escribir(resultado)
+                    filas += len(resultado)
+            while en_vuelo:
+                resultado = en_vuelo.popleft().result()
+                escritor.escribir(resultado)
+                filas += len(resultado)
+        return filas
+    finally:
+        escritor.cerrar()
+
+
+def _leer_genetica(ruta):
+    formato = formato_archivo(ruta)
+    if formato == "csv":
+        return pd.read_csv(ruta)
+    if formato == "parquet":
+        return pd.read_parquet(ruta)
+    return pd.read_excel(ruta)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m uywa.lotes",
+        description="Calcula los KPIs productivos y económicos de un archivo de lotes."
+    )
+    parser.add_argument("entrada", help="Archivo de lotes (.csv, .xlsx o .parquet)")
+    parser.add_argument("salida", help="Archivo de resultados (.csv, .xlsx o .parquet)")
+    parser.add_argument("--genetica", help="Tabla de genética (linea, edad, peso, consumo, fcr); por defecto la de referencia")
+    parser.add_argument("--hoja", help="Hoja a leer si la entrada es XLSX")
+    parser.add_argument("--tam-bloque", type=int, default=TAM_BLOQUE, help="Filas por bloque")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo)")
+    args = parser.parse_args(argv)
+
+    df_genetica = _leer_genetica(args.genetica) if args.genetica else None
+    inicio = time.perf_counter()
+    filas = procesar_archivo(args.entrada, args.salida, df_genetica, args.tam_bloque, args.procesos, args.hoja)
+    print(f"{filas:,} lotes procesados en {time.perf_counter() - inicio:.1f} s -> {args.salida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Edad de salida óptima y precios de equilibrio sobre las curvas diarias.
+
+Para una línea se evalúan a la vez todas las edades factibles (una columna
+por día) y, en el modo por lotes, todos los escenarios de precios (una fila
+por escenario), con broadcasting sobre `calcular_kpis`.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from uywa.dinamica import alimento_por_edad_salida
+from uywa.kpis import _dividir, calcular_kpis
+
+OBJETIVOS = {
+    "margen_neto": "Margen neto (USD)",
+    "iep": "IEP",
+    "margen_dia": "Margen por día de galpón (USD/día)",
+}
+TAM_BLOQUE = 20_000
+# Edad mínima de salida por defecto: antes de ~3 semanas las curvas
+# interpoladas dan índices sin sentido comercial (p. ej. IEP del día 1).
+EDAD_MIN_SALIDA = 21
+
+
+def evaluar_edades(df_linea, precio_venta_kg, precio_alimento_kg, aves_ini,
+                   mortalidad, otros_costos=0.0, edad_inicial=0, dias_vacio=0,
+                   edad_min=None, fraccion_primera_semana=None):
+    """KPIs para cada edad de salida factible de una línea de `tabla_curvas`.
+
+    Los precios pueden ser escalares o vectores de S escenarios; cada KPI se
+    devuelve con forma `(S, D)` (o `(D,)` con precios escalares), donde D son
+    las edades de `edad_min` (por defecto `EDAD_MIN_SALIDA`, y siempre
+    posterior a `edad_inicial`) a la última
+    edad de la línea. Añade `margen_dia` (margen por día de ocupación del
+    galpón, incluido el vacío sanitario) y los precios de equilibrio de
+    alimento y de venta. Con `fraccion_primera_semana` el alimento de cada
+    edad se integra día a día con la curva de mortalidad (`uywa.dinamica`)
+    en lugar de `consumo * aves_ini`.
+    """
+    peso = df_linea["peso"].to_numpy(dtype=float)
+    consumo = df_linea["consumo"].to_numpy(dtype=float)
+    edad_min = max(EDAD_MIN_SALIDA if edad_min is None else edad_min, edad_inicial + 1)
+    edades = np.arange(edad_min, len(peso))
+    if len(edades) == 0:
+        raise ValueError(f"No hay edades de salida factibles desde el día {edad_min}")
+    escalar = np.ndim(precio_venta_kg) == 0 and np.ndim(precio_alimento_kg) == 0
+    pv = np.atleast_1d(np.asarray(precio_venta_kg, dtype=float))[:, None]
+    pa = np.atleast_1d(np.asarray(precio_alimento_kg, dtype=float))[:, None]
+
+    alimento = consumo[edades] * aves_ini
+    if fraccion_primera_semana is not None:
+        alimento = alimento_por_edad_salida(df_linea, aves_ini, mortalidad, edad_inicial,
+                                            fraccion_primera_semana)[edades]
+    kpis = calcular_kpis(
+        peso_final=peso[edades], consumo_total=consumo[edades], aves_ini=aves_ini,
+        mortalidad=mortalidad, precio_alimento_kg=pa, precio_venta_kg=pv,
+        edad_salida=edades, edad_inicial=edad_inicial,
+        peso_inicial=peso[edad_inicial], otros_costos=otros_costos,
+        alimento_total=alimento
+    )
+    kpis["margen_dia"] = kpis["margen_neto"] / (edades - edad_inicial + dias_vacio)
+    costo_fijo = aves_ini * otros_costos
+    kpis["equilibrio_alimento"] = _dividir(kpis["ingreso_bruto"] - costo_fijo, alimento, np.nan)
+    kpis["equilibrio_venta"] = _dividir(kpis["costo_total"], kpis["prod_total"], np.nan)
+    forma = (len(pv) if len(pv) > 1 else len(pa), len(edades))
+    kpis = {k: np.broadcast_to(v, forma) for k, v in kpis.items()}
+    if escalar:
+        kpis = {k: v[0] for k, v in kpis.items()}
+    kpis["edad"] = edades
+    return kpis
+
+
+def edad_optima(df_linea, precio_venta_kg, precio_alimento_kg, aves_ini, mortalidad,
+                otros_costos=0.0, edad_inicial=0, dias_vacio=0, edad_min=None,
+                fraccion_primera_semana=None):
+    """Tabla por edad y edad óptima de cada objetivo para un escenario de precios.
+
+    Devuelve `(tabla, optimos)`, donde `optimos` es `{objetivo: (edad, valor)}`.
+    """
+    kpis = evaluar_edades(df_linea, precio_venta_kg, precio_alimento_kg, aves_ini,
+                          mortalidad, otros_costos, edad_inicial, dias_vacio, edad_min,
+                          fraccion_primera_semana)
+    tabla = pd.DataFrame({k: v for k, v in kpis.items() if np.ndim(v) == 1})
+    optimos = {}
+    for objetivo in OBJETIVOS:
+        i = int(np.argmax(tabla[objetivo].to_numpy()))
+        optimos[objetivo] = (int(tabla["edad"].iat[i]), float(tabla[objetivo].iat[i]))
+    return tabla, optimos
+
+
+def _optimizar_bloque(args):
+    df_linea, pv, pa, objetivo, parametros = args
+    kpis = evaluar_edades(df_linea, pv, pa, **parametros)
+    i = np.argmax(kpis[objetivo], axis=1)
+    filas = np.arange(len(i))
+    salida = {"precio_venta_kg": pv, "precio_alimento_kg": pa, "edad_optima": kpis["edad"][i]}
+    for k in ("margen_neto", "iep", "margen_dia", "equilibrio_alimento", "equilibrio_venta"):
+        salida[k] = kpis[k][filas, i]
+    return pd.DataFrame(salida)
+
+
+def optimizar_lote(df_linea, precios_venta, precios_alimento, aves_ini, mortalidad,
+                   objetivo="margen_neto", otros_costos=0.0, edad_inicial=0,
+                   dias_vacio=0, edad_min=None, fraccion_primera_semana=None,
+                   tam_bloque=TAM_BLOQUE, n_hilos=None):
+    """Edad óptima para cada escenario de precios (`precios_venta[i]`, `precios_alimento[i]`).
+
+    Los escenarios se dividen en bloques de `tam_bloque` filas para acotar la
+    memoria de la matriz escenarios x edades, y los bloques se reparten entre
+    `n_hilos` hilos (NumPy libera el GIL en las operaciones de arrays).
+    Devuelve un DataFrame con una fila por escenario con la edad óptima, sus
+    KPIs y los precios de equilibrio a esa edad.
+    """
+    if objetivo not in OBJETIVOS:
+        raise ValueError(f"Objetivo desconocido: {objetivo}")
+    pv, pa = np.broadcast_arrays(np.ravel(precios_venta).astype(float), np.ravel(precios_alimento).astype(float))
+    parametros = dict(aves_ini=aves_ini, mortalidad=mortalidad, otros_costos=otros_costos,
+                      edad_inicial=edad_inicial, dias_vacio=dias_vacio, edad_min=edad_min,
+                      fraccion_primera_semana=fraccion_primera_semana)
+    bloques = [(df_linea, pv[i:i + tam_bloque], pa[i:i + tam_bloque], objetivo, parametros)
+               for i in range(0, len(pv), tam_bloque)]
+    n_hilos = n_hilos or min(len(bloques), os.cpu_count() or 1)
+    if n_hilos <= 1:
+        resultados = [_optimizar_bloque(b) for b in bloques]
+    else:
+        with ThreadPoolExecutor(n_hilos) as ex:
+            resultados = list(ex.map(_optimizar_bloque, bloques))
+    return pd.concat(resultados, ignore_index=True)
@@ -0,0 +1,118 @@
+"""Perfilado opcional de las ejecuciones de la app.
+
+Cada ejecución (la app completa o un fragmento) crea un `Perfil` que mide
+secciones con `with perfil.seccion(nombre):` y registra el tamaño de las
+figuras que se envían al navegador. Desactivado, `seccion` devuelve un
+contexto nulo compartido y `figura` no hace nada, así que el costo es una
+llamada y un `if` por sección.
+
+Los registros pueden añadirse a un archivo JSON-lines (`RUTA_LOG`) para
+agregarlos entre sesiones; al leerlo solo se toman las últimas ejecuciones
+y la lectura se memoiza por la fecha de modificación y el tamaño del archivo.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+import pandas as pd
+
+from uywa.cache import cache
+
+ACTIVO_DEFECTO = os.environ.get("UYWA_PERFIL", "") not in ("", "0")
+RUTA_LOG = os.environ.get("UYWA_PERFIL_LOG", "perfil_uywa.jsonl")
+MAX_EJECUCIONES_LOG = 2_000
+BLOQUE_LECTURA = 1 << 16
+
+_NULO = nullcontext()
+_lock_log = threading.Lock()
+_logs = cache("perfil_log", max_entradas=4, max_bytes=64 * 2**20)
+
+
+class Perfil:
+    """Tiempos por sección (ms) y tamaños de figura (bytes) de una ejecución."""
+
+    def __init__(self, etiqueta, activo=ACTIVO_DEFECTO):
+        self.etiqueta = etiqueta
+        self.activo = activo
+        self.secciones = []
+        self.figuras = []
+        self._inicio = time.perf_counter()
+
+    def seccion(self, nombre):
+        return self._medir(nombre) if self.activo else _NULO
+
+    @contextmanager
+    def _medir(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.secciones.append((nombre, (time.perf_counter() - inicio) * 1000))
+
+    def figura(self, nombre, fig):
+        """Registra el tamaño del JSON de `fig`, el que viaja al navegador."""
+        if self.activo:
+            self.figuras.append((nombre, len(fig.to_json())))
+
+    def registro(self):
+        return {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "ejecucion": self.etiqueta,
+            "total_ms": (time.perf_counter() - self._inicio) * 1000,
+            "secciones": [{"seccion": n, "ms": ms} for n, ms in self.secciones],
+            "figuras": [{"figura": n, "bytes": b} for n, b in self.figuras],
+        }
+
+    def guardar(self, ruta=RUTA_LOG):
+        """Añade el registro de esta ejecución como una línea de `ruta`."""
+        linea = json.dumps(self.registro(), ensure_ascii=False)
+        with _lock_log, open(ruta, "a", encoding="utf-8") as f:
+            f.write(linea + "\n")
+
+
+def _ultimas_lineas(ruta, n):
+    """Las últimas `n` líneas de `ruta`, leyendo el archivo en bloques desde el final."""
+    with open(ruta, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        posicion = f.tell()
+        bloques = []
+        saltos = 0
+        while posicion > 0 and saltos <= n:
+            tam = min(BLOQUE_LECTURA, posicion)
+            posicion -= tam
+            f.seek(posicion)
+            bloques.append(f.read(tam))
+            saltos += bloques[-1].count(b"\n")
+    lineas = b"".join(reversed(bloques)).splitlines()
+    return [l.decode("utf-8", errors="replace") for l in lineas[-n:]] if n else []
+
+
+def _leer_log(ruta, max_ejecuciones):
+    filas = []
+    for linea in _ultimas_lineas(ruta, max_ejecuciones):
+        # Una línea a medio escribir o editada a mano no invalida el resto.
+        try:
+            registro = json.loads(linea)
+            filas += [{"fecha": registro["fecha"], "ejecucion": registro["ejecucion"],
+                       "seccion": s["seccion"], "ms": s["ms"]} for s in registro["secciones"]]
+        except (ValueError, KeyError, TypeError):
+            continue
+    return pd.DataFrame(filas, columns=["fecha", "ejecucion", "seccion", "ms"])
+
+
+def leer_log(ruta=RUTA_LOG, max_ejecuciones=MAX_EJECUCIONES_LOG):
+    """Secciones de las últimas `max_ejecuciones` ejecuciones registradas en
+    `ruta`, una fila por sección; las líneas que no se pueden leer se omiten.
+
+    El resultado se comparte entre sesiones mientras el archivo no cambie:
+    no debe modificarse.
+    """
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return pd.DataFrame(columns=["fecha", "ejecucion", "seccion", "ms"])
+    clave = (os.path.abspath(ruta), estado.st_mtime_ns, estado.st_size, max_ejecuciones)
+    return _logs.obtener(clave, lambda: _leer_log(ruta, max_ejecuciones))
@@ -0,0 +1,128 @@
+"""Riesgo del margen neto por Monte Carlo con muestreo vectorizado por bloques.
+
+Los sorteos se procesan en bloques de tamaño fijo y solo se acumula un
+histograma fino del margen (más conteos y momentos), de modo que la memoria
+no crece con el número de sorteos. Los percentiles se leen del histograma
+acumulado. Con la misma semilla el resultado es reproducible.
+"""
+import numpy as np
+
+from uywa.kpis import margen_neto
+
+TAM_BLOQUE = 250_000
+N_BINS = 8192
+DISTRIBUCIONES = ["Fija", "Normal", "Uniforme", "Triangular"]
+# Variables inciertas y sentido en que mueven el margen (+1 sube, -1 baja).
+VARIABLES_RIESGO = {
+    "precio_venta_kg": 1,
+    "peso_final": 1,
+    "precio_alimento_kg": -1,
+    "mortalidad": -1,
+}
+_LIMITES_FISICOS = {"mortalidad": (0.0, 100.0)}
+
+
+def distribucion(tipo, base, variacion=0.0):
+    """Especificación de una variable: `variacion` es la desviación estándar
+    (Normal) o la semiamplitud alrededor de `base` (Uniforme, Triangular)."""
+    if tipo not in DISTRIBUCIONES:
+        raise ValueError(f"Distribución desconocida: {tipo}")
+    if tipo == "Fija" or variacion <= 0:
+        return {"tipo": "Fija", "base": float(base), "variacion": 0.0}
+    return {"tipo": tipo, "base": float(base), "variacion": float(variacion)}
+
+
+def _rango(nombre, spec):
+    lo, hi = _LIMITES_FISICOS.get(nombre, (0.0, np.inf))
+    ancho = 6 * spec["variacion"] if spec["tipo"] == "Normal" else spec["variacion"]
+    return max(spec["base"] - ancho, lo), min(spec["base"] + ancho, hi)
+
+
+def _muestrear(nombre, spec, n, rng):
+    base, v = spec["base"], spec["variacion"]
+    if spec["tipo"] == "Fija":
+        return np.full(n, base)
+    if spec["tipo"] == "Normal":
+        x = rng.normal(base, v, n)
+    elif spec["tipo"] == "Uniforme":
+        x = rng.uniform(base - v, base + v, n)
+    else:
+        x = rng.triangular(base - v, base, base + v, n)
+    lo, hi = _LIMITES_FISICOS.get(nombre, (0.0, np.inf))
+    return np.clip(x, lo, hi, out=x)
+
+
+def _percentil_histograma(bordes, conteos, q):
+    acumulado = np.cumsum(conteos)
+    objetivo = q / 100 * acumulado[-1]
+    i = int(np.searchsorted(acumulado, objetivo))
+    previo = acumulado[i - 1] if i > 0 else 0
+    fraccion = (objetivo - previo) / conteos[i] if conteos[i] > 0 else 0.0
+    return float(bordes[i] + fraccion * (bordes[i + 1] - bordes[i]))
+
+
+def simular_margen(distribuciones, consumo_total, aves_ini, otros_costos=0.0,
+                   n_sorteos=1_000_000, semilla=42, tam_bloque=TAM_BLOQUE,
+                   n_bins=N_BINS):
+    """Simula el margen neto con las `distribuciones` de `VARIABLES_RIESGO`.
+
+    Devuelve un dict con P5/P50/P95, media, desviación, mínimo, máximo,
+    probabilidad de pérdida (margen < 0) y el histograma (`bordes`, `conteos`).
+    """
+    faltan = set(VARIABLES_RIESGO) - set(distribuciones)
+    if faltan:
+        raise KeyError(f"Faltan distribuciones para: {sorted(faltan)}")
+    rangos = {k: _rango(k, distribuciones[k]) for k in VARIABLES_RIESGO}
+    extremos = [
+        {k: rangos[k][(signo * sentido > 0)] for k, sentido in VARIABLES_RIESGO.items()}
+        for signo in (-1, 1)
+    ]
+    lo, hi = (float(margen_neto(consumo_total=consumo_total, aves_ini=aves_ini,
+                                otros_costos=otros_costos, **e)) for e in extremos)
+    if hi <= lo:
+        hi = lo + 1.0
+    bordes = np.linspace(lo, hi, n_bins + 1)
+    escala = n_bins / (hi - lo)
+
+    rng = np.random.default_rng(semilla)
+    conteos = np.zeros(n_bins, dtype=np.int64)
+    suma = suma_cuad = 0.0
+    perdidas = 0
+    minimo, maximo = np.inf, -np.inf
+    for inicio in range(0, n_sorteos, tam_bloque):
+        n = min(tam_bloque, n_sorteos - inicio)
+        muestras = {k: _muestrear(k, distribuciones[k], n, rng) for k in VARIABLES_RIESGO}
+        m = margen_neto(consumo_total=consumo_total, aves_ini=aves_ini,
+                        otros_costos=otros_costos, **muestras)
+        idx = ((m - lo) * escala).astype(np.int64)
+        np.clip(idx, 0, n_bins - 1, out=idx)
+        conteos += np.bincount(idx, minlength=n_bins)
+        suma += m.sum()
+        suma_cuad += np.dot(m, m)
+        perdidas += int(np.count_nonzero(m < 0))
+        minimo, maximo = min(minimo, m.min()), max(maximo, m.max())
+
+    media = suma / n_sorteos
+    return {
+        "n_sorteos": n_sorteos,
+        "p5": _percentil_histograma(bordes, conteos, 5),
+        "p50": _percentil_histograma(bordes, conteos, 50),
+        "p95": _percentil_histograma(bordes, conteos, 95),
+        "media": float(media),
+        "desv": float(np.sqrt(max(suma_cuad / n_sorteos - media ** 2, 0.0))),
+        "min": float(minimo),
+        "max": float(maximo),
+        "prob_perdida": perdidas / n_sorteos,
+        "bordes": bordes,
+        "conteos": conteos,
+    }
+
+
+def reagrupar_histograma(bordes, conteos, n_barras=80):
+    """Reduce el histograma fino a `n_barras` para graficarlo (recorta colas vacías)."""
+    ocupados = np.flatnonzero(conteos)
+    a, b = ocupados[0], ocupados[-1] + 1
+    grupos = np.array_split(np.arange(a, b), min(n_barras, b - a))
+    centros = np.array([(bordes[g[0]] + bordes[g[-1] + 1]) / 2 for g in grupos])
+    anchos = np.array([bordes[g[-1] + 1] - bordes[g[0]] for g in grupos])
+    return centros, anchos, np.add.reduceat(conteos[a:b], [g[0] - a for g in grupos])
@@ -0,0 +1,89 @@
+"""Sensibilidad del margen neto: barridos, grillas 2D/3D y gráfico tornado.
+
+Las grillas se evalúan por broadcasting: cada eje es un vector con su propia
+dimensión y `margen_neto` solo materializa el array completo en la última
+operación. Las grillas se memoizan por sus parámetros, excluyendo el valor
+base de las variables que recorren los ejes, así que mover el slider de una
+de esas variables no recalcula la grilla. La caché es compartida por todas
+las sesiones y está acotada en bytes: una grilla 3D completa ocupa ~50 MB.
+"""
+import numpy as np
+import pandas as pd
+
+from uywa.cache import cache
+from uywa.kpis import margen_neto
+
+# Variables de entrada de `margen_neto` y su etiqueta para la interfaz.
+VARIABLES = {
+    "precio_venta_kg": "Precio venta (USD/kg)",
+    "precio_alimento_kg": "Precio alimento (USD/kg)",
+    "peso_final": "Peso final (kg)",
+    "consumo_total": "Consumo acumulado (kg/ave)",
+    "mortalidad": "Mortalidad (%)",
+    "aves_ini": "Aves iniciales",
+    "otros_costos": "Otros costos por ave (USD)",
+}
+MAX_PUNTOS_GRILLA = 500 * 500 * 50
+
+_grillas = cache("grillas_sensibilidad", max_entradas=8, max_bytes=256 * 2**20)
+
+
+def barrido(base, variable, valores):
+    """Margen neto al recorrer `variable` sobre `valores`, con el resto en `base`."""
+    args = dict(base)
+    args[variable] = np.asarray(valores, dtype=float)
+    return margen_neto(**args)
+
+
+def _grilla(base_fija, ejes):
+    args = dict(base_fija)
+    n_ejes = len(ejes)
+    for dim, (variable, minimo, maximo, n) in enumerate(ejes):
+        forma = [1] * n_ejes
+        forma[dim] = n
+        args[variable] = np.linspace(minimo, maximo, n).reshape(forma)
+    margen = margen_neto(**args).astype(np.float32)
+    margen.flags.writeable = False
+    return margen
+
+
+def grilla_margen(base, ejes):
+    """Margen neto sobre la grilla definida por `ejes`.
+
+    `ejes` es una secuencia de `(variable, minimo, maximo, n)`; el resultado
+    tiene forma `(n_1, ..., n_k)` en float32 y es de solo lectura porque se
+    comparte desde la caché. Devuelve `(coordenadas, margen)`.
+    """
+    ejes = tuple((v, float(a), float(b), int(n)) for v, a, b, n in ejes)
+    if int(np.prod([e[3] for e in ejes])) > MAX_PUNTOS_GRILLA:
+        raise ValueError(f"La grilla supera {MAX_PUNTOS_GRILLA:,} puntos")
+    en_ejes = {e[0] for e in ejes}
+    base_fija = tuple(sorted((k, float(v)) for k, v in base.items() if k not in en_ejes))
+    coordenadas = {v: np.linspace(a, b, n) for v, a, b, n in ejes}
+    return coordenadas, _grillas.obtener((base_fija, ejes), lambda: _grilla(base_fija, ejes))
+
+
+def tornado(base, variacion_pct=10.0, variables=None):
+    """Impacto en el margen de mover cada variable ±`variacion_pct` % de su base.
+
+    Todas las evaluaciones se hacen en una sola llamada vectorizada. Devuelve
+    un DataFrame ordenado de mayor a menor impacto absoluto.
+    """
+    variables = list(variables or VARIABLES)
+    k = len(variables)
+    args = {v: np.full(2 * k, float(base[v])) for v in base}
+    factores = np.array([1 - variacion_pct / 100, 1 + variacion_pct / 100])
+    for i, v in enumerate(variables):
+        args[v][2 * i:2 * i + 2] *= factores
+    margen = margen_neto(**args).reshape(k, 2)
+    margen_base = float(margen_neto(**base))
+    df = pd.DataFrame({
+        "variable": variables,
+        "etiqueta": [VARIABLES[v] for v in variables],
+        "margen_bajo": margen[:, 0],
+        "margen_alto": margen[:, 1],
+    })
+    df["delta_bajo"] = df["margen_bajo"] - margen_base
+    df["delta_alto"] = df["margen_alto"] - margen_base
+    df["impacto"] = (df["margen_alto"] - df["margen_bajo"]).abs()
+    return df.sort_values("impacto", ascending=False, ignore_index=True)